@@ -1,7 +1,40 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from app.config.settings import settings
 from app.controllers.email_controller import router as email_router
+from app.controllers.history_controller import router as history_router
+from app.controllers.job_controller import router as job_router
+from app.controllers.stats_controller import router as stats_router
+from app.services.http_client import upstream_client
+from app.services.history_writer import history_writer
+from app.services.job_queue import job_queue
+from app.services.local_classifier import local_classifier
+from app.utils.metrics import PROMETHEUS_CONTENT_TYPE
+from app.utils.metrics_aggregator import metrics_aggregator
+from app.utils.pdf_extractor import pdf_extractor
+from app.utils.profiler import ProfilingMiddleware, request_profiler
+from app.utils.timing import ServerTimingMiddleware
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstream_client.start()
+    local_classifier.load()
+    pdf_extractor.start()
+    await history_writer.start()
+    await job_queue.start()
+    request_profiler.start()
+    await metrics_aggregator.start()
+    try:
+        yield
+    finally:
+        request_profiler.stop()
+        await job_queue.stop(settings.job_drain_seconds)
+        await history_writer.stop()
+        pdf_extractor.close()
+        await upstream_client.close()
+        await metrics_aggregator.stop()
 
 def create_app() -> FastAPI:
     app = FastAPI(
@@ -9,7 +42,8 @@ def create_app() -> FastAPI:
         description="API para classificação automática de emails usando Inteligência Artificial",
         version="1.0.0",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        lifespan=lifespan
     )
     app.add_middleware(
         CORSMiddleware,
@@ -17,9 +51,19 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["Server-Timing", "X-Profile-File", "X-Profile-Scope"],
     )
+    app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(ProfilingMiddleware)
     app.include_router(email_router, prefix="/api/v1", tags=["Email Classification"])
+    app.include_router(job_router, prefix="/api/v1", tags=["Jobs"])
+    app.include_router(history_router, prefix="/api/v1", tags=["History"])
+    app.include_router(stats_router, prefix="/api/v1", tags=["Monitoring"])
     @app.get("/health", tags=["Health"])
     async def health_check():
         return {"status": "healthy", "message": "SortMailBox API is running"}
+    @app.get("/metrics", tags=["Monitoring"])
+    async def metrics():
+        combined, _ = await run_in_threadpool(metrics_aggregator.collect)
+        return Response(combined.render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
     return app
@@ -0,0 +1,366 @@
+"""Reclassifica em lote um acervo de emails em disco (.txt, .pdf e .eml), sem passar pela API HTTP.
+
+Uso (a partir de backend/):
+    python -m app.cli.reclassify --input /arquivo/emails --output resultados.jsonl
+    python -m app.cli.reclassify --input /arquivo/emails --output resultados.csv --workers 8 --remote-uncertain
+
+Os arquivos são lidos e classificados em um pool de processos, em lotes de ``--chunk-size``, pelos tiers
+offline da cascata (assunto, frases de cortesia e modelo local). Os emails que nenhum tier decide com confiança
+saem pelo fallback; com ``--remote-uncertain``, só esses vão ao modelo zero-shot do Hugging Face.
+
+A saída (CSV ou JSONL, pela extensão ou ``--format``) é gravada um lote por vez. Cada lote gravado é
+registrado no checkpoint (``<saída>.checkpoint``) com o tamanho da saída até ali; rodar o mesmo comando de
+novo retoma de onde parou, descartando o que foi gravado depois do último lote registrado.
+"""
+import argparse
+import asyncio
+import csv
+import email
+import email.policy
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from app.config.settings import settings
+
+EXTENSIONS = (".txt", ".pdf", ".eml")
+# Tiers que não dependem do Hugging Face nem de estado aprendido em outro processo
+OFFLINE_TIERS = ("subject", "heuristics", "local_model")
+FIELDS = ("path", "subject", "category", "confidence", "decided_by", "degraded", "chars", "error")
+
+_worker: Optional[Tuple[Any, Any, Any]] = None
+
+
+def _init_worker() -> None:
+    global _worker
+    from app.services.ai_service import AIService
+    from app.services.classification_cascade import ClassificationCascade
+    from app.utils.file_processor import FileProcessor
+    from app.utils.single_flight import SingleFlight
+
+    ai_service = AIService()
+    tiers = [
+        tier for tier in ClassificationCascade.from_settings(ai_service, SingleFlight()).tiers
+        if tier.name in OFFLINE_TIERS
+    ]
+    _worker = (FileProcessor(), ClassificationCascade(tiers, ai_service, last_tier_decides=False), ai_service.text_processor)
+
+
+def parse_eml(content: bytes) -> Tuple[str, str]:
+    """Assunto e corpo (texto puro ou, na falta dele, HTML) de um arquivo .eml."""
+    message = email.message_from_bytes(content, policy=email.policy.default)
+    body = message.get_body(preferencelist=("plain", "html"))
+    text = body.get_content() if body is not None else ""
+    return str(message.get("subject") or ""), text
+
+
+def classify_files(root: str, paths: List[str]) -> List[Dict[str, Any]]:
+    """Roda no processo do pool: extrai o texto de cada arquivo e classifica o lote nos tiers offline.
+
+    Os incertos (decididos pelo fallback) levam o conteúdo original em ``_content`` e o pré-processado em
+    ``_processed``, para o modelo remoto."""
+    from app.services.classification_cascade import FALLBACK_TIER, CascadeItem
+
+    file_processor, cascade, text_processor = _worker
+    rows: List[Dict[str, Any]] = []
+    classified: List[Tuple[Dict[str, Any], CascadeItem]] = []
+    for path in paths:
+        row: Dict[str, Any] = {"path": path, "subject": "", "category": None, "confidence": None, "decided_by": None,
+                               "degraded": False, "chars": 0, "error": None}
+        rows.append(row)
+        try:
+            full_path = os.path.join(root, path)
+            if os.path.getsize(full_path) > settings.upload_max_bytes:
+                raise ValueError(f"Arquivo muito grande. Tamanho máximo: {settings.upload_max_bytes / 1_000_000:g}MB")
+            with open(full_path, "rb") as handle:
+                content = handle.read()
+            if path.lower().endswith(".eml"):
+                subject, text = parse_eml(content)
+            else:
+                subject, text = "", file_processor.extract_bytes(path.lower(), content)
+        except Exception as e:
+            row["error"] = str(e) or e.__class__.__name__
+            continue
+        row["subject"], row["chars"] = subject, len(text)
+        full_content = f"Assunto: {subject}\n\n{text}" if subject else text
+        classified.append((row, CascadeItem(subject, full_content, text_processor)))
+    if not classified:
+        return rows
+    decisions = asyncio.run(cascade.classify_many([item for _, item in classified]))
+    for (row, item), decision in zip(classified, decisions):
+        row.update(category=decision.category, confidence=decision.confidence, decided_by=decision.tier)
+        if decision.tier == FALLBACK_TIER:
+            row["_content"], row["_processed"] = item.full_content, item.processed_content
+    return rows
+
+
+def discover(root: str, done: Set[str]) -> Iterator[str]:
+    """Caminhos relativos dos arquivos suportados, em ordem estável, pulando os já gravados."""
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(EXTENSIONS):
+                continue
+            path = os.path.relpath(os.path.join(directory, filename), root)
+            if path not in done:
+                yield path
+
+
+def chunked(paths: Iterator[str], size: int) -> Iterator[List[str]]:
+    chunk: List[str] = []
+    for path in paths:
+        chunk.append(path)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Checkpoint:
+    """Uma linha JSON por lote gravado: tamanho da saída depois do lote e os arquivos dele."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        self.offset = 0
+        self._handle = None
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        valid = 0
+        with open(self.path, "rb") as handle:
+            for line in handle:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # última linha cortada por uma interrupção no meio da gravação
+                valid += len(line)
+                self.offset = entry["offset"]
+                self.done.update(entry["files"])
+        # Sem isso, o próximo lote seria anexado à linha cortada e ficaria ilegível na retomada seguinte
+        with open(self.path, "r+b") as handle:
+            handle.truncate(valid)
+
+    def commit(self, offset: int, files: List[str]) -> None:
+        if self._handle is None:
+            self._handle = open(self.path, "a", encoding="utf-8")
+        self._handle.write(json.dumps({"offset": offset, "files": files}, ensure_ascii=False) + "\n")
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self.offset = offset
+        self.done.update(files)
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+class ResultWriter:
+    def __init__(self, path: str, output_format: str, offset: int):
+        self.format = output_format
+        self._handle = open(path, "r+b" if os.path.exists(path) else "wb")
+        # Descarta o que foi gravado depois do último lote registrado no checkpoint
+        self._handle.truncate(offset)
+        self._handle.seek(offset)
+        if offset == 0 and output_format == "csv":
+            self._write_csv([dict(zip(FIELDS, FIELDS))])
+
+    def _write_csv(self, rows: List[Dict[str, Any]]) -> None:
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writerows(rows)
+        self._handle.write(buffer.getvalue().encode("utf-8"))
+
+    def write(self, rows: List[Dict[str, Any]]) -> int:
+        if self.format == "csv":
+            self._write_csv(rows)
+        else:
+            lines = "".join(json.dumps({field: row[field] for field in FIELDS}, ensure_ascii=False) + "\n" for row in rows)
+            self._handle.write(lines.encode("utf-8"))
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        return self._handle.tell()
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+class Progress:
+    def __init__(self, interval: float, skipped: int):
+        self.interval = interval
+        self.skipped = skipped
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        self.files = 0
+        self.errors = 0
+        self.uncertain = 0
+        self.remote = 0
+        self.categories: Counter = Counter()
+        self.decided_by: Counter = Counter()
+
+    def update(self, rows: List[Dict[str, Any]], uncertain: int, remote: int) -> None:
+        self.files += len(rows)
+        self.uncertain += uncertain
+        self.remote += remote
+        for row in rows:
+            if row["error"]:
+                self.errors += 1
+            else:
+                self.categories[row["category"]] += 1
+                self.decided_by[row["decided_by"]] += 1
+        now = time.perf_counter()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self, final: bool = False) -> None:
+        elapsed = time.perf_counter() - self.started
+        rate = self.files / elapsed if elapsed > 0 else 0.0
+        line = (
+            f"{self.files} arquivos em {elapsed:.1f}s ({rate:.1f}/s), {self.errors} erros, "
+            f"{self.uncertain} incertos, {self.remote} enviados ao modelo remoto"
+        )
+        if self.skipped:
+            line += f", {self.skipped} já feitos antes"
+        print(line, file=sys.stderr, flush=True)
+        if final:
+            print(f"Categorias: {dict(self.categories)}", file=sys.stderr)
+            print(f"Decididos por: {dict(self.decided_by)}", file=sys.stderr)
+
+
+class RemoteResolver:
+    """Manda os incertos de cada lote ao tier remoto da cascata (lotes zero-shot, cache e circuit breaker)."""
+
+    def __init__(self):
+        from app.services.ai_service import AIService
+        from app.services.classification_cascade import ClassificationCascade, RemoteModelTier
+        from app.utils.single_flight import SingleFlight
+
+        ai_service = AIService()
+        self.cascade = ClassificationCascade(
+            [RemoteModelTier(settings.cascade_remote_threshold, ai_service, SingleFlight())], ai_service
+        )
+
+    async def resolve(self, rows: List[Dict[str, Any]]) -> int:
+        from app.services.classification_cascade import CascadeItem
+
+        uncertain = [row for row in rows if "_content" in row]
+        if not uncertain:
+            return 0
+        text_processor = self.cascade.ai_service.text_processor
+        items = [
+            CascadeItem(row["subject"], row["_content"], text_processor, row["_processed"]) for row in uncertain
+        ]
+        decisions = await self.cascade.classify_many(items)
+        for row, decision in zip(uncertain, decisions):
+            row.update(
+                category=decision.category,
+                confidence=decision.confidence,
+                decided_by=decision.tier,
+                degraded=decision.degraded,
+            )
+        return len(uncertain)
+
+
+async def run(args: argparse.Namespace, output_format: str, checkpoint: Checkpoint) -> Progress:
+    from app.services.http_client import upstream_client
+
+    resolver = RemoteResolver() if args.remote_uncertain else None
+    progress = Progress(args.progress_interval, len(checkpoint.done))
+    writer = ResultWriter(args.output, output_format, checkpoint.offset)
+    pool = ProcessPoolExecutor(
+        max_workers=args.workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker
+    )
+    loop = asyncio.get_running_loop()
+    root = os.path.abspath(args.input)
+    if resolver is not None:
+        await upstream_client.start()
+
+    async def process(paths: List[str]) -> Tuple[List[str], List[Dict[str, Any]], int, int]:
+        rows = await loop.run_in_executor(pool, classify_files, root, paths)
+        uncertain = sum(1 for row in rows if "_content" in row)
+        remote = await resolver.resolve(rows) if resolver is not None else 0
+        return paths, rows, uncertain, remote
+
+    def save(task: "asyncio.Future") -> None:
+        paths, rows, uncertain, remote = task.result()
+        checkpoint.commit(writer.write(rows), paths)
+        progress.update(rows, uncertain, remote)
+
+    pending: Set[asyncio.Future] = set()
+    try:
+        for paths in chunked(discover(root, checkpoint.done), args.chunk_size):
+            if len(pending) >= args.workers * 2:
+                finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    save(task)
+            pending.add(asyncio.ensure_future(process(paths)))
+        while pending:
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                save(task)
+    finally:
+        for task in pending:
+            task.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+        writer.close()
+        checkpoint.close()
+        if resolver is not None:
+            await upstream_client.close()
+    return progress
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reclassifica em lote os emails (.txt, .pdf, .eml) de um diretório.")
+    parser.add_argument("--input", required=True, help="Diretório com os arquivos (percorrido recursivamente)")
+    parser.add_argument("--output", required=True, help="Arquivo de saída .csv ou .jsonl")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Formato da saída (padrão: pela extensão)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos de extração e classificação")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Arquivos por lote enviado a um processo")
+    parser.add_argument("--checkpoint", help="Arquivo de checkpoint (padrão: <saída>.checkpoint)")
+    parser.add_argument("--restart", action="store_true", help="Ignora o checkpoint e recomeça do zero")
+    parser.add_argument("--remote-uncertain", action="store_true",
+                        help="Envia ao modelo zero-shot os emails que nenhum tier offline decidiu com confiança")
+    parser.add_argument("--progress-interval", type=float, default=5.0, help="Segundos entre as linhas de progresso")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input):
+        print(f"Diretório não encontrado: {args.input}", file=sys.stderr)
+        return 1
+    if args.remote_uncertain and not settings.huggingface_api_key:
+        print("--remote-uncertain precisa de HUGGINGFACE_API_KEY.", file=sys.stderr)
+        return 1
+    output_format = args.format or ("csv" if args.output.lower().endswith(".csv") else "jsonl")
+    args.workers = max(args.workers, 1)
+    args.chunk_size = max(args.chunk_size, 1)
+    checkpoint = Checkpoint(args.checkpoint or f"{args.output}.checkpoint")
+    if args.restart:
+        for path in (checkpoint.path, args.output):
+            if os.path.exists(path):
+                os.remove(path)
+    checkpoint.load()
+    if checkpoint.done and not os.path.exists(args.output):
+        print(f"O checkpoint {checkpoint.path} existe, mas a saída {args.output} não. Use --restart.", file=sys.stderr)
+        return 1
+    if checkpoint.done:
+        print(f"Retomando: {len(checkpoint.done)} arquivos já gravados em {args.output}", file=sys.stderr)
+
+    try:
+        progress = asyncio.run(run(args, output_format, checkpoint))
+    except KeyboardInterrupt:
+        print("Interrompido; rode o mesmo comando para continuar de onde parou.", file=sys.stderr)
+        return 130
+    progress.report(final=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+"""Treina o classificador local a partir do histórico rotulado.
+
+Uso (a partir de backend/):
+    python -m app.cli.train_local_model --input historico.jsonl --output models/local_classifier
+
+A entrada pode ser JSONL ou CSV com os campos ``content``, ``subject`` (opcional) e ``category``
+("Produtivo" ou "Improdutivo").
+"""
+import argparse
+import csv
+import json
+import random
+import sys
+from typing import Iterator, List, Tuple
+from app.config.settings import settings
+from app.services.local_classifier import (
+    LABELS,
+    HashedFeatureExtractor,
+    LocalClassifier,
+    np,
+    save_model,
+    train_logistic_regression,
+)
+from app.utils.text_processor import TextProcessor
+
+
+def _read_records(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8", newline="") as handle:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(handle)
+        else:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def load_dataset(path: str) -> Tuple[List[str], List[int]]:
+    text_processor = TextProcessor()
+    texts: List[str] = []
+    labels: List[int] = []
+    for record in _read_records(path):
+        category = (record.get("category") or "").strip()
+        if category not in LABELS:
+            continue
+        content = record.get("content") or ""
+        subject = record.get("subject") or ""
+        full_content = f"Assunto: {subject}\n\n{content}" if subject else content
+        texts.append(text_processor.preprocess(full_content))
+        labels.append(LABELS.index(category))
+    return texts, labels
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Treina o classificador local (n-gramas com hashing + regressão logística).")
+    parser.add_argument("--input", required=True, help="Arquivo JSONL ou CSV com content, subject e category")
+    parser.add_argument("--output", default=settings.local_model_path, help="Diretório dos artefatos do modelo")
+    parser.add_argument("--features", type=int, default=2 ** 18, help="Dimensão do vetor de features")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--learning-rate", type=float, default=0.5)
+    parser.add_argument("--l2", type=float, default=1e-6)
+    parser.add_argument("--validation-split", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    if np is None:
+        print("NumPy não está instalado. Instale com: pip install numpy", file=sys.stderr)
+        return 1
+    texts, labels = load_dataset(args.input)
+    if len(set(labels)) < 2:
+        print("O histórico precisa ter exemplos das duas categorias.", file=sys.stderr)
+        return 1
+
+    order = list(range(len(texts)))
+    random.Random(args.seed).shuffle(order)
+    validation_size = int(len(order) * args.validation_split)
+    validation, training = order[:validation_size], order[validation_size:]
+    extractor = HashedFeatureExtractor(n_features=args.features)
+    weights, bias = train_logistic_regression(
+        extractor,
+        [texts[i] for i in training],
+        [labels[i] for i in training],
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        l2=args.l2,
+    )
+
+    validation_accuracy = None
+    if validation:
+        model = LocalClassifier(args.output)
+        model.extractor, model.weights, model.bias = extractor, weights, bias
+        predictions = model.predict([texts[i] for i in validation])
+        hits = sum(1 for i, p in zip(validation, predictions) if p["category"] == LABELS[labels[i]])
+        validation_accuracy = round(hits / len(validation), 4)
+
+    save_model(args.output, extractor, weights, bias, {
+        "training_samples": len(training),
+        "validation_samples": len(validation),
+        "validation_accuracy": validation_accuracy,
+    })
+    print(f"Modelo salvo em {args.output} ({len(training)} exemplos de treino, acurácia de validação: {validation_accuracy})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
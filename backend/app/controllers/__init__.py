@@ -1,3 +1,6 @@
 from app.controllers.email_controller import router
+from app.controllers.history_controller import router as history_router
+from app.controllers.job_controller import router as job_router
+from app.controllers.stats_controller import router as stats_router
 
-__all__ = ["router"]
+__all__ = ["router", "history_router", "job_router", "stats_router"]
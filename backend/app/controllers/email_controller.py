@@ -1,10 +1,20 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from typing import Optional
-from app.models.schemas import EmailInput, EmailClassificationResponse
-from app.services.email_service import EmailService
+import json
+from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.config.settings import settings
+from app.models.schemas import (
+    EmailInput,
+    EmailClassificationResponse,
+    BatchClassificationResponse,
+    ResponseMode,
+    SuggestedResponse,
+)
+from app.services.email_service import build_batch_response, email_service
+from app.utils.file_processor import UploadTooLargeError
+from app.utils.rate_limiter import enforce_rate_limit
 
-router = APIRouter()
-email_service = EmailService()
+router = APIRouter(dependencies=[Depends(enforce_rate_limit)])
 @router.post("/classify", response_model=EmailClassificationResponse)
 async def classify_email(email_input: EmailInput):
     try:
@@ -12,10 +22,39 @@ async def classify_email(email_input: EmailInput):
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao classificar email: {str(e)}")
+@router.post("/classify/stream")
+async def classify_email_stream(email_input: EmailInput):
+    async def events():
+        try:
+            async for event, data in email_service.classify_email_stream(email_input):
+                yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+        except Exception as e:
+            error = {"detail": f"Erro ao classificar email: {str(e)}"}
+            yield f"event: error\ndata: {json.dumps(error, ensure_ascii=False)}\n\n"
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+@router.post("/classify/batch", response_model=BatchClassificationResponse)
+async def classify_email_batch(emails: List[EmailInput]):
+    if not emails:
+        raise HTTPException(status_code=400, detail="Envie ao menos um email")
+    if len(emails) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Lote muito grande. Máximo de {settings.batch_max_items} emails por requisição"
+        )
+    try:
+        results = await email_service.classify_batch(emails)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao classificar lote: {str(e)}")
+    return build_batch_response(results)
 @router.post("/classify/upload", response_model=EmailClassificationResponse)
 async def classify_email_upload(
     file: UploadFile = File(...),
-    subject: Optional[str] = Form(None)
+    subject: Optional[str] = Form(None),
+    response_mode: ResponseMode = Form(ResponseMode.INLINE)
 ):
     allowed_types = [
         "text/plain",
@@ -28,7 +67,38 @@ async def classify_email_upload(
             detail="Tipo de arquivo não suportado. Use .txt ou .pdf"
         )
     try:
-        result = await email_service.classify_email_from_file(file, subject)
+        result = await email_service.classify_email_from_file(file, subject, response_mode)
         return result
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao processar arquivo: {str(e)}")
+@router.get("/responses/{response_id}", response_model=SuggestedResponse)
+async def get_suggested_response(response_id: str):
+    try:
+        result = await email_service.get_suggested_response(response_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar resposta: {str(e)}")
+    if result is None:
+        raise HTTPException(status_code=404, detail="Resposta não encontrada ou expirada")
+    return result
+@router.post("/classify/mailbox")
+async def classify_mailbox(file: UploadFile = File(...)):
+    filename = (file.filename or "").lower()
+    if not filename.endswith((".mbox", ".eml", ".zip")):
+        raise HTTPException(
+            status_code=400,
+            detail="Tipo de arquivo não suportado. Use .mbox, .eml ou .zip com arquivos .eml"
+        )
+    async def stream_results():
+        total = 0
+        failed = 0
+        try:
+            async for item in email_service.classify_mailbox(file):
+                total += 1
+                failed += item.error is not None
+                yield item.model_dump_json() + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"Erro ao processar arquivo: {str(e)}"}, ensure_ascii=False) + "\n"
+        yield json.dumps({"done": True, "total": total, "succeeded": total - failed, "failed": failed}) + "\n"
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
@@ -0,0 +1,95 @@
+import base64
+import binascii
+from collections import Counter
+from datetime import date, datetime, timezone
+from fastapi import APIRouter, HTTPException, Query
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from app.models.schemas import (
+    ClassificationCategory,
+    DailyCategoryCount,
+    HistoryAggregatesResponse,
+    HistoryItem,
+    HistoryPage,
+)
+from app.repositories.email_repository import HistoryKey
+from app.services.history_writer import history_writer
+
+router = APIRouter()
+
+def _encode_cursor(key: HistoryKey) -> str:
+    created_at, record_id = key
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{record_id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> HistoryKey:
+    try:
+        created_at, record_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(record_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def _history_item(record) -> HistoryItem:
+    return HistoryItem(
+        id=record.id,
+        category=record.category,
+        confidence=record.confidence,
+        subject=record.subject,
+        content=record.content,
+        suggested_response=record.suggested_response,
+        decided_by=record.decided_by,
+        # Gravado em UTC sem fuso; sai com "Z" para o cliente não ler como horário local
+        created_at=record.created_at.replace(tzinfo=timezone.utc) if record.created_at.tzinfo is None else record.created_at,
+    )
+@router.get("/history", response_model=HistoryPage)
+async def list_history(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    category: Optional[ClassificationCategory] = None,
+    start: Optional[datetime] = Query(None, description="Início do período (inclusivo; sem fuso = UTC)"),
+    end: Optional[datetime] = Query(None, description="Fim do período (exclusivo; sem fuso = UTC)")
+):
+    before = _decode_cursor(cursor) if cursor else None
+    records, next_key = await run_in_threadpool(
+        history_writer.repository.find_page,
+        limit, before, category.value if category else None, start, end
+    )
+    return HistoryPage(
+        items=[_history_item(record) for record in records],
+        next_cursor=_encode_cursor(next_key) if next_key else None,
+    )
+@router.get("/history/aggregates", response_model=HistoryAggregatesResponse)
+async def history_aggregates(
+    start: Optional[date] = Query(None, description="Primeiro dia UTC (inclusivo)"),
+    end: Optional[date] = Query(None, description="Último dia UTC (inclusivo)"),
+    category: Optional[ClassificationCategory] = None
+):
+    aggregates = await run_in_threadpool(
+        history_writer.repository.find_daily_aggregates,
+        start, end, category.value if category else None
+    )
+    by_category = Counter()
+    confidence_sum = 0.0
+    for aggregate in aggregates:
+        by_category[aggregate.category] += aggregate.count
+        confidence_sum += aggregate.confidence_sum
+    total = sum(by_category.values())
+    return HistoryAggregatesResponse(
+        days=[
+            DailyCategoryCount(
+                day=aggregate.day,
+                category=aggregate.category,
+                count=aggregate.count,
+                mean_confidence=aggregate.confidence_sum / aggregate.count,
+            )
+            for aggregate in aggregates
+        ],
+        total=total,
+        by_category=dict(by_category),
+        mean_confidence=confidence_sum / total if total else None,
+    )
+@router.get("/history/{record_id}", response_model=HistoryItem)
+async def get_history_item(record_id: int):
+    record = await run_in_threadpool(history_writer.repository.find_by_id, record_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Classificação não encontrada")
+    return _history_item(record)
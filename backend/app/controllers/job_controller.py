@@ -0,0 +1,83 @@
+from datetime import datetime
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from typing import Optional
+from app.config.settings import settings
+from app.models.schemas import JobRequest, JobResponse, ResponseMode
+from app.repositories.job_repository import JobRecord
+from app.services.job_queue import job_queue, is_allowed_callback, QueueFullError
+from app.utils.file_processor import UploadTooLargeError, check_upload_size
+
+router = APIRouter()
+
+def _timestamp(value: Optional[float]) -> Optional[datetime]:
+    return datetime.fromtimestamp(value) if value is not None else None
+
+def _job_response(record: JobRecord) -> JobResponse:
+    return JobResponse(
+        id=record.id,
+        kind=record.kind,
+        status=record.status,
+        created_at=_timestamp(record.created_at),
+        started_at=_timestamp(record.started_at),
+        finished_at=_timestamp(record.finished_at),
+        result=record.result,
+        error=record.error,
+        callback_status=record.callback_status,
+    )
+
+def _check_callback(callback_url: Optional[str]) -> None:
+    if callback_url and not is_allowed_callback(callback_url):
+        raise HTTPException(
+            status_code=400,
+            detail=f"callback_url deve apontar para um destes hosts: {', '.join(settings.job_callback_host_list)}"
+        )
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(job_request: JobRequest):
+    if (job_request.email is None) == (job_request.emails is None):
+        raise HTTPException(status_code=400, detail="Envie 'email' ou 'emails', não ambos")
+    if job_request.emails is not None:
+        if not job_request.emails:
+            raise HTTPException(status_code=400, detail="Envie ao menos um email")
+        if len(job_request.emails) > settings.batch_max_items:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Lote muito grande. Máximo de {settings.batch_max_items} emails por requisição"
+            )
+    _check_callback(job_request.callback_url)
+    if job_request.email is not None:
+        kind, payload = "email", {"email": job_request.email.model_dump()}
+    else:
+        kind, payload = "batch", {"emails": [email.model_dump() for email in job_request.emails]}
+    try:
+        record = await job_queue.submit(kind, payload, job_request.callback_url)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return _job_response(record)
+@router.post("/jobs/upload", response_model=JobResponse, status_code=202)
+async def create_file_job(
+    file: UploadFile = File(...),
+    subject: Optional[str] = Form(None),
+    callback_url: Optional[str] = Form(None),
+    response_mode: ResponseMode = Form(ResponseMode.INLINE)
+):
+    if not (file.filename or "").endswith(('.txt', '.pdf')):
+        raise HTTPException(
+            status_code=400,
+            detail="Tipo de arquivo não suportado. Use .txt ou .pdf"
+        )
+    _check_callback(callback_url)
+    try:
+        check_upload_size(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    try:
+        record = await job_queue.submit_file(file, subject, callback_url, response_mode.value)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return _job_response(record)
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    record = job_queue.get(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return _job_response(record)
@@ -0,0 +1,38 @@
+import os
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import settings
+from app.services.admission import classification_admission, generation_admission
+from app.services.http_client import upstream_client
+from app.services.email_service import classification_flights
+from app.services.job_queue import job_queue
+from app.services.local_classifier import local_classifier
+from app.services.resilience import classification_breaker, generation_breaker
+from app.utils.metrics_aggregator import metrics_aggregator
+from app.utils.near_duplicate import near_duplicate_index
+from app.utils.profiler import request_profiler
+from app.utils.rate_limiter import rate_limiter
+from app.utils.result_cache import result_cache
+
+router = APIRouter()
+@router.get("/stats")
+async def get_stats():
+    combined, reporting = await run_in_threadpool(metrics_aggregator.collect)
+    return {
+        "worker": {"pid": os.getpid(), "workers": settings.worker_count, "metrics_from": reporting},
+        "upstream_pool": upstream_client.stats(),
+        "result_cache": await run_in_threadpool(result_cache.stats),
+        "classification_single_flight": classification_flights.stats(),
+        "local_model": local_classifier.stats(),
+        "near_duplicate": near_duplicate_index.stats(),
+        "job_queue": job_queue.stats(),
+        "circuit_breakers": {
+            breaker.name: breaker.stats() for breaker in (classification_breaker, generation_breaker)
+        },
+        "admission": {
+            admission.name: admission.stats() for admission in (classification_admission, generation_admission)
+        },
+        "rate_limit": rate_limiter.stats(),
+        "profiler": request_profiler.stats(),
+        "metrics": combined.snapshot(),
+    }
@@ -1,3 +1,3 @@
-from app.entities.email_entity import EmailClassification
+from app.entities.email_entity import EmailClassification, DailyCategoryAggregate
 
-__all__ = ["EmailClassification"]
+__all__ = ["EmailClassification", "DailyCategoryAggregate"]
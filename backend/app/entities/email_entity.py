@@ -1,17 +1,36 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime
-from sqlalchemy.ext.declarative import declarative_base
-from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Date, Index
+from sqlalchemy.orm import declarative_base
+from datetime import datetime, timezone
 
 Base = declarative_base()
 
+def utc_now() -> datetime:
+    """Instante atual em UTC, sem fuso: o histórico guarda UTC tanto no SQLite quanto no PostgreSQL."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 class EmailClassification(Base):
     __tablename__ = "email_classifications"
+    __table_args__ = (
+        Index("ix_email_classifications_created_at_id", "created_at", "id"),
+        Index("ix_email_classifications_category_created_at_id", "category", "created_at", "id"),
+    )
     id = Column(Integer, primary_key=True, autoincrement=True)
     content = Column(Text, nullable=False)
     subject = Column(String(500), nullable=True)
     category = Column(String(50), nullable=False)
     confidence = Column(Float, nullable=False)
     suggested_response = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    decided_by = Column(String(32), nullable=True)
+    created_at = Column(DateTime, default=utc_now, nullable=False)
     def __repr__(self):
         return f"<EmailClassification(id={self.id}, category={self.category})>"
+
+class DailyCategoryAggregate(Base):
+    """Contagem e soma das confianças por dia e categoria, atualizadas junto com cada gravação do histórico."""
+    __tablename__ = "classification_daily_aggregates"
+    day = Column(Date, primary_key=True)
+    category = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    def __repr__(self):
+        return f"<DailyCategoryAggregate(day={self.day}, category={self.category}, count={self.count})>"
@@ -2,6 +2,17 @@ from app.models.schemas import (
     EmailInput,
     EmailClassificationResponse,
     ClassificationCategory,
+    BatchItemResult,
+    BatchClassificationResponse,
+    JobStatus,
+    JobRequest,
+    JobResponse,
+    HistoryItem,
+    HistoryPage,
+    DailyCategoryCount,
+    HistoryAggregatesResponse,
+    ResponseMode,
+    SuggestedResponse,
     HealthResponse
 )
 
@@ -9,5 +20,16 @@ __all__ = [
     "EmailInput",
     "EmailClassificationResponse",
     "ClassificationCategory",
+    "BatchItemResult",
+    "BatchClassificationResponse",
+    "JobStatus",
+    "JobRequest",
+    "JobResponse",
+    "HistoryItem",
+    "HistoryPage",
+    "DailyCategoryCount",
+    "HistoryAggregatesResponse",
+    "ResponseMode",
+    "SuggestedResponse",
     "HealthResponse"
 ]
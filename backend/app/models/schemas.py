@@ -1,16 +1,25 @@
 from pydantic import BaseModel, Field
 from enum import Enum
-from typing import Optional
-from datetime import datetime
+from typing import Dict, List, Optional, Union
+from datetime import date, datetime
 
 class ClassificationCategory(str, Enum):
     PRODUTIVO = "Produtivo"
     IMPRODUTIVO = "Improdutivo"
 
+class ResponseMode(str, Enum):
+    INLINE = "inline"
+    DEFER = "defer"
+    SKIP = "skip"
+
 class EmailInput(BaseModel):
     """Entrada para classificação. Funciona para qualquer remetente: a classificação é feita apenas por assunto e conteúdo."""
     content: Optional[str] = Field(None, description="Conteúdo do email em texto")
     subject: Optional[str] = Field(None, description="Assunto do email")
+    response_mode: ResponseMode = Field(
+        ResponseMode.INLINE,
+        description="inline gera a resposta sugerida junto; defer devolve response_id para buscar em /responses/{id}; skip não gera"
+    )
     class Config:
         json_schema_extra = {
             "example": {
@@ -22,9 +31,12 @@ class EmailInput(BaseModel):
 class EmailClassificationResponse(BaseModel):
     category: ClassificationCategory = Field(..., description="Categoria do email")
     confidence: float = Field(..., ge=0, le=1, description="Nível de confiança da classificação")
-    suggested_response: str = Field(..., description="Resposta sugerida para o email")
+    suggested_response: Optional[str] = Field(None, description="Resposta sugerida para o email (ausente com response_mode defer ou skip)")
+    response_id: Optional[str] = Field(None, description="Handle para buscar a resposta sugerida em /responses/{id} (response_mode defer)")
     original_content: str = Field(..., description="Conteúdo original do email")
     processed_at: datetime = Field(default_factory=datetime.now, description="Data/hora do processamento")
+    decided_by: Optional[str] = Field(None, description="Tier da cascata que decidiu a categoria (subject, heuristics, local_model, remote ou fallback)")
+    degraded: bool = Field(False, description="Classificação ou resposta sugerida veio do modo de contingência porque o Hugging Face falhou ou estava sobrecarregado")
     class Config:
         json_schema_extra = {
             "example": {
@@ -32,10 +44,86 @@ class EmailClassificationResponse(BaseModel):
                 "confidence": 0.95,
                 "suggested_response": "Prezado(a), agradecemos seu contato. Verificamos sua solicitação #12345 e ela está em processamento.",
                 "original_content": "Olá, gostaria de saber o status da minha solicitação #12345.",
-                "processed_at": "2024-01-15T10:30:00"
+                "processed_at": "2024-01-15T10:30:00",
+                "decided_by": "remote",
+                "degraded": False
+            }
+        }
+
+class BatchItemResult(BaseModel):
+    index: int = Field(..., description="Posição do email na lista enviada")
+    result: Optional[EmailClassificationResponse] = Field(None, description="Resultado da classificação, quando bem-sucedida")
+    error: Optional[str] = Field(None, description="Mensagem de erro, quando a classificação deste item falhou")
+
+class BatchClassificationResponse(BaseModel):
+    results: List[BatchItemResult] = Field(..., description="Resultados na mesma ordem da entrada")
+    total: int
+    succeeded: int
+    failed: int
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class JobRequest(BaseModel):
+    """Envie ``email`` para um único email ou ``emails`` para um lote."""
+    email: Optional[EmailInput] = Field(None, description="Email a classificar")
+    emails: Optional[List[EmailInput]] = Field(None, description="Lote de emails a classificar")
+    callback_url: Optional[str] = Field(None, description="URL local chamada com POST ao fim do job")
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "email": {"content": "Olá, gostaria de saber o status da minha solicitação #12345.", "subject": "Status da solicitação"},
+                "callback_url": "http://localhost:9000/jobs/concluidos"
             }
         }
 
+class JobResponse(BaseModel):
+    id: str = Field(..., description="Identificador do job")
+    kind: str = Field(..., description="Tipo do job: email, batch ou file")
+    status: JobStatus = Field(..., description="Situação do job")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Union[BatchClassificationResponse, EmailClassificationResponse]] = Field(None, description="Resultado, quando o job termina com sucesso")
+    error: Optional[str] = Field(None, description="Mensagem de erro, quando o job falha")
+    callback_status: Optional[str] = Field(None, description="Status HTTP (ou erro) da chamada ao callback_url")
+
+class HistoryItem(BaseModel):
+    id: int
+    category: ClassificationCategory
+    confidence: float
+    subject: Optional[str] = None
+    content: str
+    suggested_response: Optional[str] = None
+    decided_by: Optional[str] = None
+    created_at: datetime
+
+class HistoryPage(BaseModel):
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página; ausente na última")
+
+class DailyCategoryCount(BaseModel):
+    day: date
+    category: ClassificationCategory
+    count: int
+    mean_confidence: float
+
+class HistoryAggregatesResponse(BaseModel):
+    days: List[DailyCategoryCount] = Field(..., description="Contagem e confiança média por dia e categoria")
+    total: int
+    by_category: Dict[str, int] = Field(..., description="Total de classificações por categoria no período")
+    mean_confidence: Optional[float] = Field(None, description="Confiança média no período")
+
+class SuggestedResponse(BaseModel):
+    response_id: str
+    category: ClassificationCategory
+    suggested_response: str
+    degraded: bool = Field(False, description="Resposta veio do modo de contingência; uma nova busca tenta o modelo de novo")
+    generated_at: datetime
+
 class HealthResponse(BaseModel):
     status: str
     message: str
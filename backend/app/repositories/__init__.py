@@ -1,3 +1,4 @@
 from app.repositories.email_repository import EmailRepository
+from app.repositories.job_repository import JobRecord, JobRepository
 
-__all__ = ["EmailRepository"]
+__all__ = ["EmailRepository", "JobRecord", "JobRepository"]
@@ -1,49 +1,200 @@
-from typing import List, Optional
-from datetime import datetime
+import os
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import and_, create_engine, delete, event, insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from app.entities.email_entity import Base, DailyCategoryAggregate, EmailClassification, utc_now
+
+HistoryKey = Tuple[datetime, int]
+
+
+def to_utc(value: datetime) -> datetime:
+    """Normaliza para UTC sem fuso, como o histórico é gravado; datas sem fuso já são consideradas UTC."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _build_engine(database_url: str) -> Engine:
+    if not database_url.startswith("sqlite"):
+        return create_engine(database_url, pool_pre_ping=True)
+    path = database_url.split(":///", 1)[-1]
+    directory = os.path.dirname(path)
+    if path and path != ":memory:" and directory:
+        os.makedirs(directory, exist_ok=True)
+    engine = create_engine(database_url, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _configure(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    return engine
 
-class EmailClassificationRecord:
-    def __init__(
-        self,
-        id: int,
-        content: str,
-        category: str,
-        confidence: float,
-        suggested_response: str,
-        created_at: datetime
-    ):
-        self.id = id
-        self.content = content
-        self.category = category
-        self.confidence = confidence
-        self.suggested_response = suggested_response
-        self.created_at = created_at
 
 class EmailRepository:
-    def __init__(self):
-        self._records: List[EmailClassificationRecord] = []
-        self._current_id = 0
-
-    def save(self, record: EmailClassificationRecord) -> EmailClassificationRecord:
-        self._current_id += 1
-        record.id = self._current_id
-        self._records.append(record)
+    """Histórico de classificações na tabela ``email_classifications`` (SQLite local ou o banco de DATABASE_URL)."""
+
+    def __init__(self, database_url: str):
+        self.database_url = database_url
+        self._engine: Optional[Engine] = None
+        self._sessions: Optional[sessionmaker] = None
+
+    def _session(self) -> Session:
+        if self._sessions is None:
+            self._engine = _build_engine(self.database_url)
+            Base.metadata.create_all(self._engine)
+            self._sessions = sessionmaker(bind=self._engine, expire_on_commit=False)
+        return self._sessions()
+
+    def _apply_aggregates(self, session: Session, rows: List[Dict[str, Any]], sign: int = 1) -> None:
+        increments: Dict[Tuple[date, str], List[float]] = defaultdict(lambda: [0, 0.0])
+        for row in rows:
+            increment = increments[(row["created_at"].date(), row["category"])]
+            increment[0] += sign
+            increment[1] += sign * row["confidence"]
+        values = [
+            {"day": day, "category": category, "count": count, "confidence_sum": confidence_sum}
+            for (day, category), (count, confidence_sum) in increments.items()
+        ]
+        dialect = session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            upsert = (sqlite if dialect == "sqlite" else postgresql).insert(DailyCategoryAggregate).values(values)
+            session.execute(upsert.on_conflict_do_update(
+                index_elements=["day", "category"],
+                set_={
+                    "count": DailyCategoryAggregate.count + upsert.excluded.count,
+                    "confidence_sum": DailyCategoryAggregate.confidence_sum + upsert.excluded.confidence_sum,
+                },
+            ))
+            return
+        for value in values:
+            aggregate = session.get(DailyCategoryAggregate, (value["day"], value["category"]))
+            if aggregate is None:
+                session.add(DailyCategoryAggregate(**value))
+            else:
+                aggregate.count += value["count"]
+                aggregate.confidence_sum += value["confidence_sum"]
+
+    def save(self, record: EmailClassification) -> EmailClassification:
+        record.created_at = utc_now() if record.created_at is None else to_utc(record.created_at)
+        with self._session() as session, session.begin():
+            session.add(record)
+            self._apply_aggregates(session, [{
+                "created_at": record.created_at,
+                "category": record.category,
+                "confidence": record.confidence,
+            }])
         return record
 
-    def find_by_id(self, record_id: int) -> Optional[EmailClassificationRecord]:
-        for record in self._records:
-            if record.id == record_id:
-                return record
-        return None
+    def save_many(self, rows: List[Dict[str, Any]]) -> int:
+        """Insere várias classificações em um único INSERT em lote e atualiza os agregados diários na mesma transação."""
+        if not rows:
+            return 0
+        rows = [{**row, "created_at": to_utc(row["created_at"])} for row in rows]
+        with self._session() as session, session.begin():
+            session.execute(insert(EmailClassification), rows)
+            self._apply_aggregates(session, rows)
+        return len(rows)
+
+    def find_by_id(self, record_id: int) -> Optional[EmailClassification]:
+        with self._session() as session:
+            return session.get(EmailClassification, record_id)
 
-    def find_all(self) -> List[EmailClassificationRecord]:
-        return self._records.copy()
+    def find_all(self, limit: int = 100) -> List[EmailClassification]:
+        with self._session() as session:
+            query = select(EmailClassification).order_by(EmailClassification.created_at.desc()).limit(limit)
+            return list(session.scalars(query))
 
-    def find_by_category(self, category: str) -> List[EmailClassificationRecord]:
-        return [r for r in self._records if r.category == category]
+    def find_by_category(self, category: str, limit: int = 100) -> List[EmailClassification]:
+        with self._session() as session:
+            query = (
+                select(EmailClassification)
+                .where(EmailClassification.category == category)
+                .order_by(EmailClassification.created_at.desc())
+                .limit(limit)
+            )
+            return list(session.scalars(query))
+
+    def find_page(
+        self,
+        limit: int,
+        before: Optional[HistoryKey] = None,
+        category: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Tuple[List[EmailClassification], Optional[HistoryKey]]:
+        """Página do histórico, do mais recente para o mais antigo, com cursor (created_at, id) em vez de offset.
+
+        Devolve os registros e a chave a passar em ``before`` para a página seguinte (None na última)."""
+        conditions = []
+        if category is not None:
+            conditions.append(EmailClassification.category == category)
+        if start is not None:
+            conditions.append(EmailClassification.created_at >= to_utc(start))
+        if end is not None:
+            conditions.append(EmailClassification.created_at < to_utc(end))
+        if before is not None:
+            created_at, record_id = before
+            created_at = to_utc(created_at)
+            conditions.append(or_(
+                EmailClassification.created_at < created_at,
+                and_(EmailClassification.created_at == created_at, EmailClassification.id < record_id),
+            ))
+        query = (
+            select(EmailClassification)
+            .where(*conditions)
+            .order_by(EmailClassification.created_at.desc(), EmailClassification.id.desc())
+            .limit(limit + 1)
+        )
+        with self._session() as session:
+            records = list(session.scalars(query))
+        if len(records) <= limit:
+            return records, None
+        records = records[:limit]
+        return records, (records[-1].created_at, records[-1].id)
+
+    def find_daily_aggregates(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        category: Optional[str] = None,
+    ) -> List[DailyCategoryAggregate]:
+        conditions = [DailyCategoryAggregate.count > 0]
+        if start is not None:
+            conditions.append(DailyCategoryAggregate.day >= start)
+        if end is not None:
+            conditions.append(DailyCategoryAggregate.day <= end)
+        if category is not None:
+            conditions.append(DailyCategoryAggregate.category == category)
+        query = (
+            select(DailyCategoryAggregate)
+            .where(*conditions)
+            .order_by(DailyCategoryAggregate.day, DailyCategoryAggregate.category)
+        )
+        with self._session() as session:
+            return list(session.scalars(query))
 
     def delete(self, record_id: int) -> bool:
-        for i, record in enumerate(self._records):
-            if record.id == record_id:
-                self._records.pop(i)
-                return True
-        return False
+        with self._session() as session, session.begin():
+            record = session.get(EmailClassification, record_id)
+            if record is None:
+                return False
+            self._apply_aggregates(session, [{
+                "created_at": record.created_at,
+                "category": record.category,
+                "confidence": record.confidence,
+            }], sign=-1)
+            session.execute(delete(EmailClassification).where(EmailClassification.id == record_id))
+        return True
+
+    def close(self) -> None:
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+            self._sessions = None
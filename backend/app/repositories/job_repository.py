@@ -0,0 +1,194 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, List, Optional
+
+UNFINISHED_STATUSES = ("queued", "running")
+
+
+class JobRecord:
+    def __init__(
+        self,
+        id: str,
+        kind: str,
+        status: str,
+        payload: Any,
+        created_at: float,
+        callback_url: Optional[str] = None,
+        result: Any = None,
+        error: Optional[str] = None,
+        callback_status: Optional[str] = None,
+        started_at: Optional[float] = None,
+        finished_at: Optional[float] = None,
+        owner: Optional[str] = None,
+        lease_expires_at: Optional[float] = None
+    ):
+        self.id = id
+        self.kind = kind
+        self.status = status
+        self.payload = payload
+        self.created_at = created_at
+        self.callback_url = callback_url
+        self.result = result
+        self.error = error
+        self.callback_status = callback_status
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.owner = owner
+        self.lease_expires_at = lease_expires_at
+
+
+class JobRepository:
+    """Jobs em SQLite (WAL): a fila sobrevive a reinícios e jobs interrompidos voltam a ser processados.
+
+    Cada job pendente pertence a um processo (``owner``) enquanto a concessão (``lease_expires_at``) for renovada;
+    quando ela expira, qualquer outro processo pode assumir o job."""
+
+    COLUMNS = (
+        "id, kind, status, payload, created_at, callback_url, result, error, callback_status, started_at, finished_at, "
+        "owner, lease_expires_at"
+    )
+    LEASE_COLUMNS = (("owner", "TEXT"), ("lease_expires_at", "REAL"))
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, payload TEXT NOT NULL, "
+                "created_at REAL NOT NULL, callback_url TEXT, result TEXT, error TEXT, callback_status TEXT, "
+                "started_at REAL, finished_at REAL, owner TEXT, lease_expires_at REAL)"
+            )
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for name, kind in self.LEASE_COLUMNS:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {kind}")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_status_created_at ON jobs (status, created_at)")
+            self._conn = conn
+        return self._conn
+
+    def _record(self, row) -> JobRecord:
+        return JobRecord(
+            id=row[0],
+            kind=row[1],
+            status=row[2],
+            payload=json.loads(row[3]),
+            created_at=row[4],
+            callback_url=row[5],
+            result=json.loads(row[6]) if row[6] is not None else None,
+            error=row[7],
+            callback_status=row[8],
+            started_at=row[9],
+            finished_at=row[10],
+            owner=row[11],
+            lease_expires_at=row[12],
+        )
+
+    def create(self, record: JobRecord) -> JobRecord:
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO jobs (id, kind, status, payload, created_at, callback_url, owner, lease_expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.id,
+                    record.kind,
+                    record.status,
+                    json.dumps(record.payload, ensure_ascii=False),
+                    record.created_at,
+                    record.callback_url,
+                    record.owner,
+                    record.lease_expires_at,
+                )
+            )
+        return record
+
+    def find_by_id(self, job_id: str) -> Optional[JobRecord]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {self.COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._record(row) if row is not None else None
+
+    def find_unfinished(self) -> List[JobRecord]:
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT {self.COLUMNS} FROM jobs WHERE status IN (?, ?) ORDER BY created_at",
+                UNFINISHED_STATUSES
+            ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def find_expired(self, now: float) -> List[str]:
+        """Jobs pendentes cujo dono parou de renovar a concessão (processo reciclado, derrubado ou cancelado)."""
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) AND (lease_expires_at IS NULL OR lease_expires_at < ?) "
+                "ORDER BY created_at",
+                (*UNFINISHED_STATUSES, now)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def claim(self, job_id: str, owner: str, started_at: float, lease_expires_at: float) -> bool:
+        """Marca o job como em execução por ``owner`` se ele estiver na fila ou em execução com a concessão
+        vencida. Só um processo consegue reivindicar cada job."""
+        with self._lock:
+            cursor = self._connection().execute(
+                "UPDATE jobs SET status = 'running', started_at = ?, owner = ?, lease_expires_at = ? WHERE id = ? "
+                "AND (status = 'queued' OR (status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)))",
+                (started_at, owner, lease_expires_at, job_id, started_at)
+            )
+        return cursor.rowcount > 0
+
+    def renew_leases(self, owner: str, lease_expires_at: float) -> int:
+        with self._lock:
+            cursor = self._connection().execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE owner = ? AND status IN (?, ?)",
+                (lease_expires_at, owner, *UNFINISHED_STATUSES)
+            )
+        return cursor.rowcount
+
+    def release_leases(self, owner: str) -> int:
+        """Vence na hora as concessões de ``owner`` para que outro processo assuma seus jobs pendentes."""
+        return self.renew_leases(owner, 0.0)
+
+    def mark_finished(self, job_id: str, status: str, result: Any, error: Optional[str], finished_at: float) -> None:
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                (
+                    status,
+                    json.dumps(result, ensure_ascii=False) if result is not None else None,
+                    error,
+                    finished_at,
+                    job_id,
+                )
+            )
+
+    def set_callback_status(self, job_id: str, callback_status: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "UPDATE jobs SET callback_status = ? WHERE id = ?", (callback_status, job_id)
+            )
+
+    def delete_finished_before(self, timestamp: float) -> int:
+        with self._lock:
+            cursor = self._connection().execute(
+                "DELETE FROM jobs WHERE status NOT IN (?, ?) AND finished_at < ?", (*UNFINISHED_STATUSES, timestamp)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,93 @@
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+
+class PendingResponse:
+    def __init__(
+        self,
+        id: str,
+        category: str,
+        content: str,
+        created_at: float,
+        suggested_response: Optional[str] = None,
+        generated_at: Optional[float] = None
+    ):
+        self.id = id
+        self.category = category
+        self.content = content
+        self.created_at = created_at
+        self.suggested_response = suggested_response
+        self.generated_at = generated_at
+
+
+class ResponseRepository:
+    """Respostas sugeridas adiadas em SQLite (WAL): o handle devolvido na classificação vale em qualquer
+    worker do host e a resposta, depois de gerada, fica gravada junto dele."""
+
+    COLUMNS = "id, category, content, created_at, suggested_response, generated_at"
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pending_responses ("
+                "id TEXT PRIMARY KEY, category TEXT NOT NULL, content TEXT NOT NULL, created_at REAL NOT NULL, "
+                "suggested_response TEXT, generated_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_pending_responses_created_at ON pending_responses (created_at)")
+            self._conn = conn
+        return self._conn
+
+    def create(self, record: PendingResponse) -> PendingResponse:
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO pending_responses (id, category, content, created_at) VALUES (?, ?, ?, ?)",
+                (record.id, record.category, record.content, record.created_at)
+            )
+        return record
+
+    def find_by_id(self, response_id: str) -> Optional[PendingResponse]:
+        with self._lock:
+            row = self._connection().execute(
+                f"SELECT {self.COLUMNS} FROM pending_responses WHERE id = ?", (response_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return PendingResponse(
+            id=row[0],
+            category=row[1],
+            content=row[2],
+            created_at=row[3],
+            suggested_response=row[4],
+            generated_at=row[5],
+        )
+
+    def set_generated(self, response_id: str, suggested_response: str, generated_at: float) -> None:
+        with self._lock:
+            self._connection().execute(
+                "UPDATE pending_responses SET suggested_response = ?, generated_at = ? WHERE id = ?",
+                (suggested_response, generated_at, response_id)
+            )
+
+    def delete_created_before(self, timestamp: float) -> int:
+        with self._lock:
+            cursor = self._connection().execute("DELETE FROM pending_responses WHERE created_at < ?", (timestamp,))
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,162 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, Optional
+from app.config.settings import settings
+from app.utils.metrics import registry
+
+admission_in_flight = registry.gauge(
+    "sortmailbox_admission_in_flight",
+    "Chamadas ao upstream em andamento, por upstream",
+    ("upstream",),
+)
+admission_waiting = registry.gauge(
+    "sortmailbox_admission_waiting",
+    "Chamadas aguardando vaga para o upstream, por upstream",
+    ("upstream",),
+)
+admission_outcomes = registry.counter(
+    "sortmailbox_admission_total",
+    "Chamadas ao upstream por resultado da admissão (admitted, queued, shed_queue_full, shed_latency, shed_timeout)",
+    ("upstream", "outcome"),
+)
+admission_wait = registry.histogram(
+    "sortmailbox_admission_wait_seconds",
+    "Espera por uma vaga antes de chamar o upstream",
+    ("upstream",),
+)
+
+
+class UpstreamOverloadedError(Exception):
+    pass
+
+
+class AdmissionController:
+    """Limita as chamadas simultâneas a um upstream, com uma fila de espera limitada.
+
+    A chamada é recusada (e o chamador degrada para o fallback) quando a fila está cheia, quando a espera
+    estimada pela latência recente do upstream passa de ``latency_target`` ou quando a espera real passa
+    desse alvo. Assim, um provedor lento não acumula requisições sem limite no worker."""
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, latency_target: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max(max_queue, 0)
+        self.latency_target = latency_target
+        self._in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._service_time: Optional[float] = None
+        self._shed = 0
+
+    @classmethod
+    def from_settings(cls, name: str) -> "AdmissionController":
+        return cls(
+            name,
+            settings.admission_max_concurrency,
+            settings.admission_max_queue,
+            settings.admission_latency_target,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    def _estimated_wait(self) -> float:
+        # Cada vaga libera em média uma chamada a cada service_time; a fila anda max_concurrency por vez
+        return (self._service_time or 0.0) * (len(self._waiters) + 1) / self.max_concurrency
+
+    def _reject(self, reason: str) -> None:
+        self._shed += 1
+        admission_outcomes.inc(upstream=self.name, outcome=f"shed_{reason}")
+        raise UpstreamOverloadedError(f"Upstream {self.name} sobrecarregado ({reason})")
+
+    async def _acquire(self, budget: Optional[float]) -> None:
+        if self._in_flight < self.max_concurrency and not self._waiters:
+            self._in_flight += 1
+            admission_outcomes.inc(upstream=self.name, outcome="admitted")
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject("queue_full")
+        if self.latency_target > 0 and self._estimated_wait() > self.latency_target:
+            self._reject("latency")
+        timeout = self.latency_target if self.latency_target > 0 else None
+        if budget is not None:
+            timeout = budget if timeout is None else min(timeout, budget)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        admission_waiting.set(len(self._waiters), upstream=self.name)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                self._reject("timeout")
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            admission_waiting.set(len(self._waiters), upstream=self.name)
+            admission_wait.observe(time.perf_counter() - started, upstream=self.name)
+        admission_outcomes.inc(upstream=self.name, outcome="queued")
+
+    def _release_slot(self) -> None:
+        # A vaga passa direto para o próximo da fila, sem reabrir a disputa com quem chega depois
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    async def acquire(self, budget: Optional[float] = None) -> Callable[[], None]:
+        """Ocupa uma vaga e devolve a função que a libera (chamá-la de novo não tem efeito); levanta
+        UpstreamOverloadedError se a chamada deve ser descartada. Para vagas que duram além de um bloco, como
+        o corpo de uma resposta em stream."""
+        if not self.enabled:
+            return lambda: None
+        await self._acquire(budget)
+        admission_in_flight.set(self._in_flight, upstream=self.name)
+        started = time.perf_counter()
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            elapsed = time.perf_counter() - started
+            self._service_time = elapsed if self._service_time is None else 0.8 * self._service_time + 0.2 * elapsed
+            self._release_slot()
+            admission_in_flight.set(self._in_flight, upstream=self.name)
+
+        return release
+
+    @asynccontextmanager
+    async def slot(self, budget: Optional[float] = None):
+        """Ocupa uma vaga durante o bloco; levanta UpstreamOverloadedError se a chamada deve ser descartada."""
+        release = await self.acquire(budget)
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "latency_target": self.latency_target,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "service_time": round(self._service_time, 4) if self._service_time is not None else None,
+            "shed": self._shed,
+        }
+
+
+classification_admission = AdmissionController.from_settings("classification")
+generation_admission = AdmissionController.from_settings("generation")
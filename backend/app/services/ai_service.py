@@ -1,11 +1,22 @@
-import httpx
 import asyncio
-from typing import Dict, Any, Optional
+import json
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
+import httpx
 from app.config.settings import settings
+from app.services.admission import classification_admission, generation_admission
+from app.services.http_client import upstream_client
+from app.services.local_classifier import local_classifier
+from app.services.resilience import RetryPolicy, call_upstream, classification_breaker, generation_breaker
+from app.utils.response_cleaner import StreamingResponseCleaner, clean_response
+from app.utils.metrics import registry
+from app.utils.result_cache import result_cache
+from app.utils.text_processor import TextProcessor
+from app.utils.timing import timed
 from app.utils.classification_helpers import (
     parse_api_result,
     has_question,
     is_clear_greeting,
+    keyword_hits,
     is_unproductive_label,
     PRODUCTIVE_KEYWORDS,
     UNPRODUCTIVE_KEYWORDS,
@@ -13,13 +24,33 @@ from app.utils.classification_helpers import (
     fallback_is_clear_greeting,
 )
 
+degraded_results = registry.counter(
+    "sortmailbox_degraded_results_total",
+    "Resultados do fallback entregues porque o Hugging Face falhou, estava com o circuito aberto ou sobrecarregado",
+    ("kind",),
+)
+classification_chunks = registry.histogram(
+    "sortmailbox_classification_chunks",
+    "Trechos enviados ao zero-shot por email acima de CLASSIFICATION_CHUNK_TOKENS",
+    buckets=(2, 3, 4, 6, 8, 12, 16),
+)
+
 
 class AIService:
     def __init__(self):
         self.api_key = settings.huggingface_api_key
         self.classification_model = settings.classification_model
         self.generation_model = "mistralai/Mistral-7B-Instruct-v0.2"
-        self.api_url = "https://router.huggingface.co/hf-inference/models"
+        self.api_url = settings.huggingface_api_url
+        self.http = upstream_client
+        self.cache = result_cache
+        self.local_model = local_classifier
+        self.retry_policy = RetryPolicy.from_settings()
+        self.classification_breaker = classification_breaker
+        self.generation_breaker = generation_breaker
+        self.classification_admission = classification_admission
+        self.generation_admission = generation_admission
+        self.text_processor = TextProcessor()
 
     def _get_headers(self) -> Dict[str, str]:
         return {"Authorization": f"Bearer {self.api_key}"}
@@ -41,44 +72,155 @@ class AIService:
         top_label = labels[0].lower()
         top_score = float(scores[0])
         text_lower = text.lower()
-        if has_question(text_lower) and not is_clear_greeting(text_lower):
+        hits = keyword_hits(text_lower)
+        if has_question(text_lower, hits) and not is_clear_greeting(text_lower, hits):
             return {"category": "Produtivo", "confidence": max(top_score, 0.85)}
         category = "Improdutivo" if is_unproductive_label(top_label) else "Produtivo"
         return {"category": category, "confidence": top_score}
 
     async def classify_text(self, text: str) -> Dict[str, Any]:
         if not self.api_key:
-            return self._fallback_classification(text)
+            return self._offline_classification(text)
+        # O texto já chega pré-processado pela cascata: a chave é ele mesmo (preprocess não é idempotente)
+        cache_key = self.cache.make_key("classification", self.classification_model, text)
+        cached = await self.cache.aget(cache_key)
+        if cached is not None:
+            return dict(cached)
+        chunks = self.text_processor.split_chunks(text, settings.classification_chunk_tokens)
+        if len(chunks) > 1:
+            out = await self._classify_chunks(chunks)
+            if not out.get("degraded"):
+                await self.cache.aset(cache_key, out)
+            return out
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                url = f"{self.api_url}/{self.classification_model}"
-                response = await client.post(
-                    url,
-                    headers=self._get_headers(),
-                    json=self._request_payload(text)
-                )
-                if response.status_code == 200:
-                    labels, scores = parse_api_result(response.json())
-                    out = self._interpret_result(labels, scores, text)
-                    if out:
-                        return out
-                elif response.status_code == 503:
-                    await asyncio.sleep(5)
-                    response = await client.post(url, headers=self._get_headers(), json=self._request_payload(text))
-                    if response.status_code == 200:
-                        labels, scores = parse_api_result(response.json())
-                        out = self._interpret_result(labels, scores, text)
-                        if out:
-                            return out
-                return self._fallback_classification(text)
+            out = await self._classify_remote(text)
         except Exception:
-            return self._fallback_classification(text)
+            out = None
+        if out is None:
+            return self._degraded_classification(text)
+        await self.cache.aset(cache_key, out)
+        return out
+
+    async def _classify_remote(self, text: str) -> Optional[Dict[str, Any]]:
+        response = await self._post_zero_shot(self._request_payload(text))
+        if response.status_code == 200:
+            labels, scores = parse_api_result(response.json())
+            return self._interpret_result(labels, scores, text)
+        return None
+
+    async def _post_zero_shot(self, payload: Dict):
+        url = f"{self.api_url}/{self.classification_model}"
+        with timed("zero_shot"):
+            return await call_upstream(
+                self.classification_breaker,
+                self.retry_policy,
+                settings.classification_timeout,
+                lambda timeout: self.http.post(url, timeout, headers=self._get_headers(), json=payload),
+                self.classification_admission,
+            )
+
+    async def _classify_chunks(self, chunks: List[str]) -> Dict[str, Any]:
+        """Classifica os trechos de um email longo em paralelo e combina os resultados: o email é produtivo se
+        algum trecho pede ação (com a maior confiança entre eles); senão, improdutivo com a confiança média
+        ponderada pelo tamanho dos trechos."""
+        classification_chunks.observe(len(chunks))
+        size = max(settings.classification_batch_size, 1)
+        groups = await asyncio.gather(*(self.classify_texts(chunks[i:i + size]) for i in range(0, len(chunks), size)))
+        outputs = [output for group in groups for output in group]
+        degraded = any(output.get("degraded") for output in outputs)
+        productive = [output["confidence"] for output in outputs if output["category"] == "Produtivo"]
+        if productive:
+            out = {"category": "Produtivo", "confidence": max(productive)}
+        else:
+            weights = [self.text_processor.count_tokens(chunk) for chunk in chunks]
+            confidence = sum(o["confidence"] * w for o, w in zip(outputs, weights)) / max(sum(weights), 1)
+            out = {"category": "Improdutivo", "confidence": round(confidence, 4)}
+        return {**out, "degraded": True} if degraded else out
+
+    async def classify_texts(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """Classifica vários textos enviando-os juntos em uma única chamada zero-shot. Textos acima de
+        CLASSIFICATION_CHUNK_TOKENS seguem por classify_text, que os divide em trechos."""
+        if not self.api_key:
+            return self._offline_classifications(texts)
+        chunk_tokens = settings.classification_chunk_tokens
+        long_texts = [
+            i for i, text in enumerate(texts) if chunk_tokens > 0 and self.text_processor.count_tokens(text) > chunk_tokens
+        ]
+        if long_texts:
+            short_texts = sorted(set(range(len(texts))) - set(long_texts))
+            long_results, short_results = await asyncio.gather(
+                asyncio.gather(*(self.classify_text(texts[i]) for i in long_texts)),
+                self.classify_texts([texts[i] for i in short_texts]),
+            )
+            merged: List[Dict[str, Any]] = [{}] * len(texts)
+            for index, out in zip(long_texts + short_texts, list(long_results) + list(short_results)):
+                merged[index] = out
+            return merged
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        cache_keys = [self.cache.make_key("classification", self.classification_model, text) for text in texts]
+        missing = []
+        for index, cached in enumerate(await self.cache.aget_many(cache_keys)):
+            if cached is not None:
+                results[index] = dict(cached)
+            else:
+                missing.append(index)
+        if len(missing) == 1:
+            results[missing[0]] = await self.classify_text(texts[missing[0]])
+        elif missing:
+            batch_results = None
+            try:
+                batch_results = await self._classify_remote_batch([texts[i] for i in missing])
+            except Exception:
+                batch_results = None
+            if batch_results is None:
+                individual = await asyncio.gather(*(self.classify_text(texts[i]) for i in missing))
+                for index, out in zip(missing, individual):
+                    results[index] = out
+            else:
+                for index, out in zip(missing, batch_results):
+                    if out is None:
+                        results[index] = self._degraded_classification(texts[index])
+                    else:
+                        await self.cache.aset(cache_keys[index], out)
+                        results[index] = out
+        return results
+
+    async def _classify_remote_batch(self, texts: List[str]) -> Optional[List[Optional[Dict[str, Any]]]]:
+        payload = self._request_payload(texts[0])
+        payload["inputs"] = texts
+        response = await self._post_zero_shot(payload)
+        if response.status_code != 200:
+            return None
+        result = response.json()
+        if not isinstance(result, list) or len(result) != len(texts):
+            return None
+        if not all(isinstance(item, list) or (isinstance(item, dict) and "labels" in item) for item in result):
+            return None
+        outputs = []
+        for item, text in zip(result, texts):
+            labels, scores = parse_api_result(item)
+            outputs.append(self._interpret_result(labels, scores, text))
+        return outputs
+
+    def _offline_classification(self, text: str) -> Dict[str, Any]:
+        return self._offline_classifications([text])[0]
+
+    def _degraded_classification(self, text: str) -> Dict[str, Any]:
+        """Classificação offline no lugar da remota que falhou; ``degraded`` chega até a resposta da API."""
+        degraded_results.inc(kind="classification")
+        return {**self._offline_classification(text), "degraded": True}
+
+    def _offline_classifications(self, texts: List[str]) -> List[Dict[str, Any]]:
+        if self.local_model.is_available:
+            return self.local_model.predict(texts)
+        return [self._fallback_classification(text) for text in texts]
 
     def _fallback_classification(self, text: str) -> Dict[str, Any]:
         text_lower = text.lower()
-        productive_count = sum(1 for kw in PRODUCTIVE_KEYWORDS if kw in text_lower)
-        unproductive_count = sum(1 for kw in UNPRODUCTIVE_KEYWORDS if kw in text_lower)
-        if fallback_has_question(text_lower) and not fallback_is_clear_greeting(text_lower):
+        hits = keyword_hits(text_lower)
+        productive_count = sum(1 for kw in PRODUCTIVE_KEYWORDS if kw in hits)
+        unproductive_count = sum(1 for kw in UNPRODUCTIVE_KEYWORDS if kw in hits)
+        if fallback_has_question(text_lower, hits) and not fallback_is_clear_greeting(text_lower, hits):
             return {"category": "Produtivo", "confidence": min(0.85 + (productive_count * 0.05), 0.95)}
         if productive_count > 0:
             if unproductive_count > 0 and unproductive_count >= productive_count:
@@ -88,39 +230,131 @@ class AIService:
             return {"category": "Improdutivo", "confidence": min(0.7 + (unproductive_count * 0.05), 0.95)}
         return {"category": "Produtivo", "confidence": 0.65}
 
-    async def generate_response(self, original_content: str, category: str) -> str:
+    async def generate_response(self, original_content: str, category: str) -> Tuple[str, bool]:
+        """Devolve a resposta sugerida e se ela veio do modelo de contingência por falha ou sobrecarga do upstream."""
+        if not self.api_key:
+            return self._fallback_response(category, original_content), False
+        cache_key = self.cache.make_key(
+            "response", self.generation_model, self.text_processor.preprocess(original_content), category
+        )
+        cached = await self.cache.aget(cache_key)
+        if cached is not None:
+            return cached, False
+        try:
+            generated = await self._generate_remote(original_content, category)
+        except Exception:
+            generated = None
+        if generated is None:
+            degraded_results.inc(kind="generation")
+            return self._fallback_response(category, original_content), True
+        await self.cache.aset(cache_key, generated)
+        return generated, False
+
+    def _generation_payload(self, original_content: str, category: str, stream: bool = False) -> Dict:
+        payload = {
+            "inputs": self._build_response_prompt(original_content, category),
+            "parameters": {"max_new_tokens": 300, "temperature": 0.7, "return_full_text": False}
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    async def _generate_remote(self, original_content: str, category: str) -> Optional[str]:
+        url = f"{self.api_url}/{self.generation_model}"
+        payload = self._generation_payload(original_content, category)
+        with timed("generation"):
+            response = await call_upstream(
+                self.generation_breaker,
+                self.retry_policy,
+                settings.generation_timeout,
+                lambda timeout: self.http.post(url, timeout, headers=self._get_headers(), json=payload),
+                self.generation_admission,
+            )
+        if response.status_code == 200:
+            result = response.json()
+            if isinstance(result, list) and len(result) > 0:
+                generated_text = result[0].get("generated_text", "")
+                return self._clean_response(generated_text)
+        return None
+
+    async def stream_response(
+        self, original_content: str, category: str, status: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """Entrega a resposta sugerida em partes, à medida que o modelo gera os tokens.
+
+        Sem chave da API, com a resposta em cache ou se a chamada falhar antes do primeiro token, a resposta
+        inteira sai em uma única parte; no caso de falha, ``status["degraded"]`` passa a ``True``."""
         if not self.api_key:
-            return self._fallback_response(category, original_content)
+            yield self._fallback_response(category, original_content)
+            return
+        cache_key = self.cache.make_key(
+            "response", self.generation_model, self.text_processor.preprocess(original_content), category
+        )
+        cached = await self.cache.aget(cache_key)
+        if cached is not None:
+            yield cached
+            return
+        url = f"{self.api_url}/{self.generation_model}"
+        payload = self._generation_payload(original_content, category, stream=True)
         try:
-            prompt = self._build_response_prompt(original_content, category)
-            async with httpx.AsyncClient(timeout=120.0) as client:
-                response = await client.post(
-                    f"{self.api_url}/{self.generation_model}",
-                    headers=self._get_headers(),
-                    json={
-                        "inputs": prompt,
-                        "parameters": {"max_new_tokens": 300, "temperature": 0.7, "return_full_text": False}
-                    }
+            with timed("generation_stream_start"):
+                response = await call_upstream(
+                    self.generation_breaker,
+                    self.retry_policy,
+                    settings.generation_timeout,
+                    lambda timeout: self.http.stream(url, timeout, headers=self._get_headers(), json=payload),
+                    self.generation_admission,
+                    hold_slot=True,
                 )
-                if response.status_code == 200:
-                    result = response.json()
-                    if isinstance(result, list) and len(result) > 0:
-                        generated_text = result[0].get("generated_text", "")
-                        return self._clean_response(generated_text)
-                return self._fallback_response(category, original_content)
         except Exception:
-            return self._fallback_response(category, original_content)
+            response = None
+        if response is None or response.status_code != 200:
+            if response is not None:
+                await response.aclose()
+            degraded_results.inc(kind="generation")
+            if status is not None:
+                status["degraded"] = True
+            yield self._fallback_response(category, original_content)
+            return
+        cleaner = StreamingResponseCleaner()
+        parts: List[str] = []
+        complete = False
+        try:
+            async for token in _iter_stream_tokens(response):
+                text = cleaner.feed(token)
+                if text:
+                    parts.append(text)
+                    yield text
+            complete = True
+        except (httpx.HTTPError, ValueError):
+            complete = False
+        finally:
+            await response.aclose()
+        tail = cleaner.finish()
+        if tail:
+            parts.append(tail)
+            yield tail
+        if not parts:
+            degraded_results.inc(kind="generation")
+            if status is not None:
+                status["degraded"] = True
+            yield self._fallback_response(category, original_content)
+        elif complete:
+            await self.cache.aset(cache_key, "".join(parts))
 
     def _build_response_prompt(self, content: str, category: str) -> str:
+        # Só o pedido atual, sem histórico citado nem assinatura, limitado a RESPONSE_PROMPT_TOKENS palavras
+        budget = settings.response_prompt_tokens
+        content = self.text_processor.truncate(self.text_processor.preprocess(content), budget, tail_tokens=budget // 4)
         if category == "Produtivo":
             return f"""<s>[INST] Você é um assistente profissional de uma empresa financeira.
 Gere uma resposta formal e profissional em português para o seguinte email que requer ação:
-Email: {content[:500]}
+Email: {content}
 A resposta deve: Ser cordial e profissional, confirmar o recebimento, indicar que a solicitação será tratada, ter no máximo 3 parágrafos.
 [/INST]"""
         return f"""<s>[INST] Você é um assistente profissional de uma empresa financeira.
 Gere uma resposta curta e cordial em português para o seguinte email de cortesia:
-Email: {content[:500]}
+Email: {content}
 A resposta deve: Ser breve e educada, agradecer a mensagem, ter no máximo 2 parágrafos.
 [/INST]"""
 
@@ -138,8 +372,20 @@ Cordialmente,
 Equipe de Atendimento"""
 
     def _clean_response(self, text: str) -> str:
-        text = text.strip()
-        for prefix in ["Resposta:", "Email:", "Mensagem:"]:
-            if text.startswith(prefix):
-                text = text[len(prefix):].strip()
-        return text
+        return clean_response(text)
+
+
+async def _iter_stream_tokens(response: httpx.Response) -> AsyncIterator[str]:
+    """Lê os eventos ``data:`` do modo stream de text-generation e devolve o texto de cada token."""
+    async for line in response.aiter_lines():
+        if not line.startswith("data:"):
+            continue
+        data = line[5:].strip()
+        if not data or data == "[DONE]":
+            continue
+        event = json.loads(data)
+        if event.get("error"):
+            raise ValueError(event["error"])
+        token = event.get("token") or {}
+        if not token.get("special"):
+            yield token.get("text", "")
@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, List, Optional
+from app.config.settings import settings
+from app.services.ai_service import AIService
+from app.utils.classification_helpers import has_productive_subject, is_courtesy_only
+from app.utils.metrics import registry
+from app.utils.near_duplicate import NearDuplicateIndex, near_duplicate_index, reused_responses, simhash
+from app.utils.near_duplicate import lookups as near_duplicate_lookups
+from app.utils.single_flight import SingleFlight
+from app.utils.text_processor import TextProcessor
+from app.utils.timing import add_timing, timed
+
+FALLBACK_TIER = "fallback"
+
+tier_decisions = registry.counter(
+    "sortmailbox_cascade_decisions_total",
+    "Emails classificados por tier da cascata e categoria",
+    ("tier", "category"),
+)
+tier_evaluations = registry.counter(
+    "sortmailbox_cascade_tier_evaluations_total",
+    "Emails avaliados por tier, por resultado (accepted, below_threshold, abstained, error)",
+    ("tier", "outcome"),
+)
+tier_latency = registry.histogram(
+    "sortmailbox_cascade_tier_seconds",
+    "Duração de cada avaliação de tier da cascata",
+    ("tier",),
+)
+
+
+class CascadeItem:
+    def __init__(
+        self, subject: str, full_content: str, text_processor: TextProcessor, processed_content: Optional[str] = None
+    ):
+        self.subject = subject
+        self.full_content = full_content
+        self._text_processor = text_processor
+        # Quem já pré-processou o texto em outro processo o repassa aqui: preprocess não é idempotente
+        self._processed: Optional[str] = processed_content
+        self._fingerprint: Optional[int] = None
+        self._fingerprinted = False
+
+    @property
+    def processed_content(self) -> str:
+        if self._processed is None:
+            with timed("preprocess"):
+                self._processed = self._text_processor.preprocess(self.full_content)
+        return self._processed
+
+    @property
+    def content_key(self) -> str:
+        return hashlib.sha256(self.processed_content.encode("utf-8")).hexdigest()
+
+    @property
+    def fingerprint(self) -> Optional[int]:
+        if not self._fingerprinted:
+            with timed("fingerprint"):
+                self._fingerprint = simhash(self.processed_content, settings.near_duplicate_min_tokens)
+            self._fingerprinted = True
+        return self._fingerprint
+
+
+class CascadeDecision:
+    def __init__(self, category: str, confidence: float, tier: str, degraded: bool = False, response: Optional[str] = None):
+        self.category = category
+        self.confidence = confidence
+        self.tier = tier
+        self.degraded = degraded
+        # Resposta sugerida reaproveitada de um email quase idêntico (NEAR_DUPLICATE_REUSE_RESPONSE)
+        self.response = response
+
+
+class CascadeTier:
+    name = ""
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+
+    async def evaluate(self, items: List[CascadeItem]) -> List[Optional[Dict[str, Any]]]:
+        raise NotImplementedError
+
+    def observe(self, items: List[CascadeItem], decisions: List["CascadeDecision"]) -> None:
+        """Recebe as decisões finais da cascata (de qualquer tier), para tiers que aprendem com elas."""
+
+
+class SubjectRulesTier(CascadeTier):
+    name = "subject"
+
+    async def evaluate(self, items: List[CascadeItem]) -> List[Optional[Dict[str, Any]]]:
+        return [
+            {"category": "Produtivo", "confidence": 0.90} if has_productive_subject(item.subject) else None
+            for item in items
+        ]
+
+
+class PhraseHeuristicsTier(CascadeTier):
+    name = "heuristics"
+
+    async def evaluate(self, items: List[CascadeItem]) -> List[Optional[Dict[str, Any]]]:
+        return [
+            {"category": "Improdutivo", "confidence": 0.95} if is_courtesy_only(item.full_content) else None
+            for item in items
+        ]
+
+
+class LocalModelTier(CascadeTier):
+    name = "local_model"
+
+    def __init__(self, threshold: float, ai_service: AIService):
+        super().__init__(threshold)
+        self.ai_service = ai_service
+
+    async def evaluate(self, items: List[CascadeItem]) -> List[Optional[Dict[str, Any]]]:
+        if not self.ai_service.local_model.is_available:
+            return [None] * len(items)
+        return self.ai_service.local_model.predict([item.processed_content for item in items])
+
+
+class NearDuplicateTier(CascadeTier):
+    """Reaproveita a categoria de um email quase idêntico já classificado pelo modelo remoto (mesmo template
+    com outro nome, data ou número de protocolo), sem chamar o zero-shot."""
+    name = "near_duplicate"
+
+    def __init__(self, threshold: float, index: NearDuplicateIndex, learn_from: str = "remote"):
+        super().__init__(threshold)
+        self.index = index
+        self.learn_from = learn_from
+
+    async def evaluate(self, items: List[CascadeItem]) -> List[Optional[Dict[str, Any]]]:
+        outputs: List[Optional[Dict[str, Any]]] = []
+        for item in items:
+            fingerprint = item.fingerprint
+            if fingerprint is None:
+                near_duplicate_lookups.inc(outcome="too_short")
+                outputs.append(None)
+                continue
+            match = self.index.lookup(fingerprint)
+            if match is None:
+                outputs.append(None)
+                continue
+            entry = match[0]
+            output = {"category": entry.category, "confidence": entry.confidence}
+            if settings.near_duplicate_reuse_response and entry.response is not None:
+                output["response"] = entry.response
+            outputs.append(output)
+        return outputs
+
+    def observe(self, items: List[CascadeItem], decisions: List["CascadeDecision"]) -> None:
+        for item, decision in zip(items, decisions):
+            if decision.tier == self.learn_from and not decision.degraded and item.fingerprint is not None:
+                self.index.add(item.fingerprint, decision.category, decision.confidence)
+
+    def remember_response(self, item: CascadeItem, category: str, response: str) -> None:
+        entry = self.index.get(item.fingerprint) if item.fingerprint is not None else None
+        if entry is not None and entry.category == category:
+            entry.response = response
+
+
+class RemoteModelTier(CascadeTier):
+    name = "remote"
+
+    def __init__(self, threshold: float, ai_service: AIService, flights: SingleFlight):
+        super().__init__(threshold)
+        self.ai_service = ai_service
+        self.flights = flights
+
+    async def evaluate(self, items: List[CascadeItem]) -> List[Optional[Dict[str, Any]]]:
+        if not self.ai_service.api_key:
+            # Sem chave não há modelo remoto: abstém-se e o item sai como fallback, sem alimentar near_duplicate
+            return [None] * len(items)
+        if len(items) == 1:
+            item = items[0]
+            result = await self.flights.run(
+                f"classification:{item.content_key}",
+                lambda: self.ai_service.classify_text(item.processed_content),
+            )
+            return [result]
+        by_text: Dict[str, List[int]] = {}
+        for index, item in enumerate(items):
+            by_text.setdefault(item.processed_content, []).append(index)
+        texts = list(by_text)
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        semaphore = asyncio.Semaphore(settings.batch_concurrency)
+        size = max(settings.classification_batch_size, 1)
+
+        async def classify_chunk(chunk: List[str]) -> None:
+            async with semaphore:
+                outputs = await self.ai_service.classify_texts(chunk)
+            for text, output in zip(chunk, outputs):
+                for index in by_text[text]:
+                    results[index] = output
+
+        await asyncio.gather(*(classify_chunk(texts[i:i + size]) for i in range(0, len(texts), size)))
+        return results
+
+
+class ClassificationCascade:
+    """Avalia os tiers em ordem; cada email sai no primeiro tier cuja confiança atinge o limiar dele.
+    O último tier configurado decide sempre, a menos que ``last_tier_decides`` seja False: aí quem não atinge
+    nenhum limiar sai pelo fallback, o que marca os emails incertos."""
+
+    def __init__(self, tiers: List[CascadeTier], ai_service: AIService, last_tier_decides: bool = True):
+        self.tiers = tiers
+        self.ai_service = ai_service
+        self.last_tier_decides = last_tier_decides
+
+    @classmethod
+    def from_settings(cls, ai_service: AIService, flights: SingleFlight) -> "ClassificationCascade":
+        available = {
+            "subject": lambda: SubjectRulesTier(settings.cascade_subject_threshold),
+            "heuristics": lambda: PhraseHeuristicsTier(settings.cascade_heuristics_threshold),
+            "local_model": lambda: LocalModelTier(settings.cascade_local_model_threshold, ai_service),
+            "near_duplicate": lambda: NearDuplicateTier(settings.cascade_near_duplicate_threshold, near_duplicate_index),
+            "remote": lambda: RemoteModelTier(settings.cascade_remote_threshold, ai_service, flights),
+        }
+        tiers = [available[name]() for name in settings.cascade_tier_list if name in available]
+        return cls(tiers, ai_service)
+
+    async def classify(self, item: CascadeItem) -> CascadeDecision:
+        return (await self.classify_many([item]))[0]
+
+    async def classify_many(self, items: List[CascadeItem]) -> List[CascadeDecision]:
+        decisions: List[Optional[CascadeDecision]] = [None] * len(items)
+        pending = list(range(len(items)))
+        for position, tier in enumerate(self.tiers):
+            if not pending:
+                break
+            is_last = self.last_tier_decides and position == len(self.tiers) - 1
+            started = time.perf_counter()
+            try:
+                outputs = await tier.evaluate([items[i] for i in pending])
+            except Exception:
+                tier_evaluations.inc(len(pending), tier=tier.name, outcome="error")
+                continue
+            finally:
+                elapsed = time.perf_counter() - started
+                tier_latency.observe(elapsed, tier=tier.name)
+                add_timing(f"cascade_{tier.name}", elapsed)
+            still_pending = []
+            for index, output in zip(pending, outputs):
+                if output is None:
+                    tier_evaluations.inc(tier=tier.name, outcome="abstained")
+                    still_pending.append(index)
+                elif is_last or output["confidence"] >= tier.threshold:
+                    tier_evaluations.inc(tier=tier.name, outcome="accepted")
+                    # O tier remoto devolve a classificação offline quando o upstream falha ou está sobrecarregado
+                    degraded = bool(output.get("degraded"))
+                    decisions[index] = CascadeDecision(
+                        output["category"],
+                        output["confidence"],
+                        FALLBACK_TIER if degraded else tier.name,
+                        degraded,
+                        output.get("response"),
+                    )
+                else:
+                    tier_evaluations.inc(tier=tier.name, outcome="below_threshold")
+                    still_pending.append(index)
+            pending = still_pending
+        if pending:
+            fallbacks = self.ai_service._offline_classifications([items[i].processed_content for i in pending])
+            for index, output in zip(pending, fallbacks):
+                decisions[index] = CascadeDecision(output["category"], output["confidence"], FALLBACK_TIER)
+        for decision in decisions:
+            tier_decisions.inc(tier=decision.tier, category=decision.category)
+        for tier in self.tiers:
+            tier.observe(items, decisions)
+        return decisions
+
+    def remember_response(self, item: CascadeItem, decision: CascadeDecision, response: str) -> None:
+        """Guarda a resposta gerada para reaproveitá-la em emails quase idênticos (NEAR_DUPLICATE_REUSE_RESPONSE)."""
+        if not settings.near_duplicate_reuse_response or decision.degraded or decision.response is not None:
+            return
+        for tier in self.tiers:
+            if isinstance(tier, NearDuplicateTier):
+                tier.remember_response(item, decision.category, response)
+
+    def reused_response(self, decision: CascadeDecision) -> Optional[str]:
+        if decision.response is not None:
+            reused_responses.inc()
+        return decision.response
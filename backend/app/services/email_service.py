@@ -1,73 +1,66 @@
+import asyncio
+import time
+import uuid
+from collections import deque
 from fastapi import UploadFile
-from typing import Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime
-from app.models.schemas import EmailInput, EmailClassificationResponse, ClassificationCategory
+from app.config.settings import settings
+from app.models.schemas import (
+    EmailInput,
+    EmailClassificationResponse,
+    ClassificationCategory,
+    BatchItemResult,
+    BatchClassificationResponse,
+    ResponseMode,
+    SuggestedResponse,
+)
 from app.services.ai_service import AIService
+from app.services.classification_cascade import ClassificationCascade, CascadeDecision, CascadeItem
+from app.repositories.response_repository import PendingResponse, ResponseRepository
+from app.services.history_writer import history_writer
+from app.services.resilience import deadline_scope
 from app.utils.file_processor import FileProcessor
 from app.utils.text_processor import TextProcessor
+from app.utils.single_flight import SingleFlight
+from app.utils.mailbox_parser import iter_messages, message_text
+from app.utils.metrics import registry
+from app.utils.timing import timed
 
-def _is_courtesy_only(content: str) -> bool:
-    text = content.lower().strip()
-    has_direct_question = "?" in text
-    present_future_markers = [
-        "poderiam", "podem", "gostaria", "gostaríamos", "preciso", "precisamos",
-        "quero", "queria", "queria saber", "quero saber", "preciso saber",
-        "informar", "informe", "informem", "quando poderiam", "quando podem",
-        "como faço", "como fazer", "qual o", "quais os", "quanto tempo",
-        "onde posso", "por que", "porque preciso", "enviar o", "enviar os",
-        "encaminhar o", "encaminhar os", "fornecer", "disponibilizar"
-    ]
-    has_new_question = any(pattern in text for pattern in [
-        "tenho dúvida", "tenho uma dúvida", "minha dúvida", "uma dúvida sobre",
-        "dúvida sobre", "dúvida a respeito", "tenho pergunta", "minha pergunta",
-        "uma pergunta sobre", "pergunta sobre"
-    ])
-    past_references = any(pattern in text for pattern in [
-        "as dúvidas", "aquelas dúvidas", "suas dúvidas", "minhas dúvidas",
-        "resolveram as dúvidas", "ajudaram com as dúvidas", "tiraram as dúvidas",
-        "ajudaram com aquelas dúvidas", "me ajudaram com", "ajudaram muito com",
-        "as perguntas", "aquelas perguntas", "suas perguntas", "responderam as perguntas"
-    ])
-    financial_terms_in_context = any(pattern in text for pattern in [
-        "informar sobre rentabilidade", "qual a rentabilidade", "rentabilidade de",
-        "informar sobre liquidez", "qual a liquidez", "liquidez do",
-        "quero fazer aporte", "gostaria de aporte", "informar sobre aporte",
-        "informar sobre fundo", "qual fundo", "informação sobre fundo",
-        "diversificar carteira", "como diversificar"
-    ])
-    if has_direct_question or any(marker in text for marker in present_future_markers):
-        return False
-    if has_new_question and not past_references:
-        return False
-    if financial_terms_in_context:
-        return False
-    courtesy = (
-        "feliz natal" in text or "boas festas" in text or "feliz ano novo" in text
-        or "apenas para desejar" in text or "passando para desejar" in text
-        or "passando para agradecer" in text or "só para agradecer" in text
-        or "só para desejar" in text or "apenas para agradecer" in text
-        or ("parabéns" in text and "aniversário" in text)
-        or ("votos de" in text and ("feliz" in text or "ótimo" in text or "sucesso" in text))
-        or "que seja um ano" in text
-        or ("que" in text and "seja" in text and "ano" in text and "sucesso" in text)
-        or ("ano de" in text and "sucesso" in text and not financial_terms_in_context)
-        or ("desejar" in text and ("feliz" in text or "boas" in text or "sucesso" in text))
-        or ("foram excelentes" in text and "ajudaram" in text and not has_new_question)
-    )
-    if not courtesy:
-        return False
-    action = (
-        "solicito" in text or "solicitamos" in text or "preciso que" in text
-        or "precisamos que" in text or "gostaria de" in text or "gostaríamos de" in text
-        or "quando poderiam" in text or "podem enviar" in text or "por favor envie" in text
-        or "por favor enviar" in text or "urgente" in text or "confirmar" in text
-        or "preciso receber" in text or "precisamos receber" in text
-        or "dúvida sobre" in text or "pergunta sobre" in text or "como faço" in text
-        or "qual o prazo" in text or "qual a data" in text or "enviar o" in text
-        or "enviar os" in text or "encaminhar o" in text or "encaminhar os" in text
+classification_flights = SingleFlight()
+PRUNE_EVERY = 256
+
+speculative_outcomes = registry.counter(
+    "sortmailbox_speculative_generations_total",
+    "Gerações especulativas por resultado (hit: categoria prevista confirmada, miss: cancelada e refeita)",
+    ("outcome",),
+)
+speculative_seconds = registry.counter(
+    "sortmailbox_speculative_generation_seconds_total",
+    "Tempo de geração economizado (saved) ou descartado (wasted) pela geração especulativa",
+    ("kind",),
+)
+
+classification_seconds = registry.histogram(
+    "sortmailbox_classification_seconds",
+    "Duração total de cada classificação (cascata e resposta sugerida), por tier que decidiu e categoria",
+    ("decided_by", "category"),
+)
+
+def _build_full_content(email_input: EmailInput) -> str:
+    content = email_input.content or ""
+    subject = email_input.subject or ""
+    return f"Assunto: {subject}\n\n{content}" if subject else content
+
+
+def build_batch_response(results: List[BatchItemResult]) -> BatchClassificationResponse:
+    failed = sum(1 for item in results if item.error is not None)
+    return BatchClassificationResponse(
+        results=results,
+        total=len(results),
+        succeeded=len(results) - failed,
+        failed=failed,
     )
-    
-    return not action
 
 
 class EmailService:
@@ -75,65 +68,241 @@ class EmailService:
         self.ai_service = AIService()
         self.file_processor = FileProcessor()
         self.text_processor = TextProcessor()
+        self.flights = classification_flights
+        self.history = history_writer
+        self.cascade = ClassificationCascade.from_settings(self.ai_service, self.flights)
+        self.responses = ResponseRepository(settings.response_store_path)
+        self._deferred = 0
 
-    async def classify_email(self, email_input: EmailInput) -> EmailClassificationResponse:
-        content = email_input.content or ""
-        subject = email_input.subject or ""
-        full_content = f"Assunto: {subject}\n\n{content}" if subject else content
-        subject_lower = subject.lower()
-        has_productive_subject = any(keyword in subject_lower for keyword in [
-            "dúvida", "pergunta", "solicitação", "pedido", "informação",
-            "informações", "consulta", "questionamento"
-        ])
-        if has_productive_subject:
-            category = ClassificationCategory.PRODUTIVO
-            confidence = 0.90
-            suggested_response = await self.ai_service.generate_response(
-                original_content=full_content,
-                category=category.value,
-            )
-            return EmailClassificationResponse(
-                category=category,
-                confidence=confidence,
-                suggested_response=suggested_response,
-                original_content=full_content,
-                processed_at=datetime.now(),
-            )
-        is_courtesy = _is_courtesy_only(full_content)
-        if is_courtesy:
-            category = ClassificationCategory.IMPRODUTIVO
-            confidence = 0.95
-            suggested_response = await self.ai_service.generate_response(
-                original_content=full_content,
+    def _cascade_item(self, email_input: EmailInput) -> CascadeItem:
+        return CascadeItem(email_input.subject or "", _build_full_content(email_input), self.text_processor)
+
+    async def _generate_response(self, item: CascadeItem, category: ClassificationCategory) -> Tuple[str, bool]:
+        return await self.flights.run(
+            f"response:{category.value}:{item.content_key}",
+            lambda: self.ai_service.generate_response(
+                original_content=item.full_content,
                 category=category.value,
-            )
-            return EmailClassificationResponse(
+            ),
+        )
+
+    async def _response_for(self, item: CascadeItem, decision: CascadeDecision) -> Tuple[str, bool]:
+        reused = self.cascade.reused_response(decision)
+        if reused is not None:
+            return reused, False
+        suggested_response, degraded = await self._generate_response(item, ClassificationCategory(decision.category))
+        if not degraded:
+            self.cascade.remember_response(item, decision, suggested_response)
+        return suggested_response, degraded
+
+    async def _classify_and_generate(self, item: CascadeItem) -> Tuple[CascadeDecision, Tuple[str, bool]]:
+        if not (settings.speculative_generation and self.ai_service.api_key):
+            decision = await self.cascade.classify(item)
+            with timed("generate"):
+                return decision, await self._response_for(item, decision)
+        return await self._classify_speculatively(item)
+
+    async def _classify_speculatively(self, item: CascadeItem) -> Tuple[CascadeDecision, Tuple[str, bool]]:
+        """Começa a gerar a resposta para a categoria prevista pelo classificador offline enquanto a cascata
+        decide; se a categoria final for outra (ou a cascata já trouxer uma resposta reaproveitada), a geração
+        especulativa é cancelada e a resposta sai pelo caminho normal."""
+        guess = self.ai_service._offline_classification(item.processed_content)["category"]
+        started = time.perf_counter()
+        finished = {}
+
+        async def generate() -> Tuple[str, bool]:
+            try:
+                with timed("generate"):
+                    return await self._generate_response(item, ClassificationCategory(guess))
+            finally:
+                finished["at"] = time.perf_counter()
+
+        speculative = asyncio.ensure_future(generate())
+        try:
+            decision = await self.cascade.classify(item)
+        except BaseException:
+            speculative.cancel()
+            raise
+        classified_at = time.perf_counter()
+        if decision.category == guess and decision.response is None:
+            suggested_response, degraded = await speculative
+            speculative_outcomes.inc(outcome="hit")
+            speculative_seconds.inc(min(classified_at, finished["at"]) - started, kind="saved")
+            if not degraded:
+                self.cascade.remember_response(item, decision, suggested_response)
+            return decision, (suggested_response, degraded)
+        if not speculative.done():
+            # Sem outra requisição esperando a mesma geração, o cancelamento chega até a chamada ao upstream;
+            # aguardar o fim faz o tempo desperdiçado medir o que de fato foi gasto
+            speculative.cancel()
+        await asyncio.gather(speculative, return_exceptions=True)
+        speculative_outcomes.inc(outcome="miss")
+        speculative_seconds.inc(finished.get("at", classified_at) - started, kind="wasted")
+        with timed("generate"):
+            return decision, await self._response_for(item, decision)
+
+    def _defer_response(self, item: CascadeItem, decision: CascadeDecision) -> str:
+        """Guarda o necessário para gerar a resposta depois, em /responses/{id}, e devolve o handle."""
+        record = self.responses.create(PendingResponse(
+            id=uuid.uuid4().hex,
+            category=decision.category,
+            content=item.full_content,
+            created_at=time.time(),
+        ))
+        self._deferred += 1
+        if self._deferred % PRUNE_EVERY == 0:
+            self.responses.delete_created_before(time.time() - settings.response_retention_seconds)
+        return record.id
+
+    async def get_suggested_response(self, response_id: str) -> Optional[SuggestedResponse]:
+        """Gera (na primeira busca) e devolve a resposta adiada. Buscas simultâneas do mesmo conteúdo compartilham
+        a geração; respostas de contingência não são gravadas, para que a próxima busca tente o modelo de novo."""
+        record = self.responses.find_by_id(response_id)
+        if record is None:
+            return None
+        category = ClassificationCategory(record.category)
+        if record.suggested_response is not None:
+            return SuggestedResponse(
+                response_id=record.id,
                 category=category,
-                confidence=confidence,
-                suggested_response=suggested_response,
-                original_content=full_content,
-                processed_at=datetime.now(),
+                suggested_response=record.suggested_response,
+                generated_at=datetime.fromtimestamp(record.generated_at),
             )
-        processed_content = self.text_processor.preprocess(full_content)
-        classification_result = await self.ai_service.classify_text(processed_content)
-        category = ClassificationCategory.PRODUTIVO if classification_result["category"] == "Produtivo" else ClassificationCategory.IMPRODUTIVO
-        suggested_response = await self.ai_service.generate_response(
-            original_content=full_content,
-            category=category.value,
-        )
-        return EmailClassificationResponse(
+        item = CascadeItem("", record.content, self.text_processor)
+        with deadline_scope(settings.request_deadline_seconds), timed("generate"):
+            suggested_response, degraded = await self._generate_response(item, category)
+        generated_at = time.time()
+        if not degraded:
+            self.responses.set_generated(record.id, suggested_response, generated_at)
+        return SuggestedResponse(
+            response_id=record.id,
             category=category,
-            confidence=classification_result["confidence"],
             suggested_response=suggested_response,
-            original_content=full_content,
+            degraded=degraded,
+            generated_at=datetime.fromtimestamp(generated_at),
+        )
+
+    async def classify_email(self, email_input: EmailInput) -> EmailClassificationResponse:
+        item = self._cascade_item(email_input)
+        mode = email_input.response_mode
+        started = time.perf_counter()
+        with deadline_scope(settings.request_deadline_seconds):
+            if mode == ResponseMode.INLINE:
+                decision, (suggested_response, response_degraded) = await self._classify_and_generate(item)
+            else:
+                decision = await self.cascade.classify(item)
+                suggested_response, response_degraded = None, False
+        classification_seconds.observe(time.perf_counter() - started, decided_by=decision.tier, category=decision.category)
+        result = EmailClassificationResponse(
+            category=ClassificationCategory(decision.category),
+            confidence=decision.confidence,
+            suggested_response=suggested_response,
+            response_id=self._defer_response(item, decision) if mode == ResponseMode.DEFER else None,
+            original_content=item.full_content,
+            processed_at=datetime.now(),
+            decided_by=decision.tier,
+            degraded=decision.degraded or response_degraded,
+        )
+        self.history.record(result, email_input.subject)
+        return result
+
+    async def classify_email_stream(self, email_input: EmailInput) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """Emite a classificação assim que a cascata decide e, depois, a resposta sugerida em partes."""
+        item = self._cascade_item(email_input)
+        with deadline_scope(settings.request_deadline_seconds):
+            decision = await self.cascade.classify(item)
+        mode = email_input.response_mode
+        result = EmailClassificationResponse(
+            category=ClassificationCategory(decision.category),
+            confidence=decision.confidence,
+            suggested_response="" if mode == ResponseMode.INLINE else None,
+            response_id=self._defer_response(item, decision) if mode == ResponseMode.DEFER else None,
+            original_content=item.full_content,
             processed_at=datetime.now(),
+            decided_by=decision.tier,
+            degraded=decision.degraded,
         )
+        yield "classification", result.model_dump(mode="json")
+        if mode != ResponseMode.INLINE:
+            self.history.record(result, email_input.subject)
+            yield "done", result.model_dump(mode="json")
+            return
+        parts = []
+        status: Dict[str, Any] = {}
+        async for text in self.ai_service.stream_response(item.full_content, decision.category, status):
+            parts.append(text)
+            yield "token", {"text": text}
+        result.suggested_response = "".join(parts)
+        result.degraded = result.degraded or status.get("degraded", False)
+        self.history.record(result, email_input.subject)
+        yield "done", result.model_dump(mode="json")
+
+    async def classify_batch(self, emails: List[EmailInput]) -> List[BatchItemResult]:
+        items = [self._cascade_item(email_input) for email_input in emails]
+        with deadline_scope(settings.request_deadline_seconds):
+            decisions = await self.cascade.classify_many(items)
+        semaphore = asyncio.Semaphore(settings.batch_concurrency)
+
+        async def build_item(index: int) -> BatchItemResult:
+            item, decision = items[index], decisions[index]
+            category = ClassificationCategory(decision.category)
+            mode = emails[index].response_mode
+            try:
+                suggested_response, response_degraded = None, False
+                if mode == ResponseMode.INLINE:
+                    async with semaphore:
+                        with deadline_scope(settings.request_deadline_seconds), timed("generate"):
+                            suggested_response, response_degraded = await self._response_for(item, decision)
+                result = EmailClassificationResponse(
+                    category=category,
+                    confidence=decision.confidence,
+                    suggested_response=suggested_response,
+                    response_id=self._defer_response(item, decision) if mode == ResponseMode.DEFER else None,
+                    original_content=item.full_content,
+                    processed_at=datetime.now(),
+                    decided_by=decision.tier,
+                    degraded=decision.degraded or response_degraded,
+                )
+            except Exception as e:
+                return BatchItemResult(index=index, error=str(e))
+            self.history.record(result, emails[index].subject)
+            return BatchItemResult(index=index, result=result)
+
+        return list(await asyncio.gather(*(build_item(index) for index in range(len(emails)))))
 
     async def classify_email_from_file(
         self,
         file: UploadFile,
-        subject: Optional[str] = None
+        subject: Optional[str] = None,
+        response_mode: ResponseMode = ResponseMode.INLINE
     ) -> EmailClassificationResponse:
         content = await self.file_processor.extract_content(file)
-        email_input = EmailInput(content=content, subject=subject)
+        email_input = EmailInput(content=content, subject=subject, response_mode=response_mode)
         return await self.classify_email(email_input)
+
+    async def _classify_message(self, index: int, message) -> BatchItemResult:
+        try:
+            subject, body = message_text(message)
+            result = await self.classify_email(EmailInput(content=body, subject=subject or None))
+        except Exception as e:
+            return BatchItemResult(index=index, error=str(e))
+        return BatchItemResult(index=index, result=result)
+
+    async def classify_mailbox(self, file: UploadFile) -> AsyncIterator[BatchItemResult]:
+        """Classifica as mensagens de um .mbox/.eml/.zip à medida que são lidas, mantendo a ordem de entrada."""
+        window: deque = deque()
+        index = 0
+        try:
+            async for message in iter_messages(file, settings.mailbox_read_chunk_bytes, settings.mailbox_max_message_bytes):
+                window.append(asyncio.ensure_future(self._classify_message(index, message)))
+                index += 1
+                if len(window) >= settings.batch_concurrency:
+                    yield await window.popleft()
+            while window:
+                yield await window.popleft()
+        finally:
+            for task in window:
+                task.cancel()
+
+
+email_service = EmailService()
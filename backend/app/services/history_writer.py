@@ -0,0 +1,121 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import settings
+from app.models.schemas import EmailClassificationResponse
+from app.repositories.email_repository import EmailRepository
+from app.utils.metrics import registry
+
+history_rows = registry.counter(
+    "sortmailbox_history_rows_total",
+    "Classificações enviadas ao histórico, por resultado (written, dropped, failed)",
+    ("outcome",),
+)
+history_pending = registry.gauge("sortmailbox_history_pending", "Classificações aguardando gravação no histórico")
+history_flush = registry.histogram("sortmailbox_history_flush_seconds", "Duração de cada gravação em lote do histórico")
+
+_STOP = object()
+# Mesmo limite da coluna ``subject`` em EmailClassification
+SUBJECT_MAX_CHARS = 500
+
+
+class HistoryWriter:
+    """Grava o histórico em segundo plano (write-behind): ``record`` só enfileira, e uma tarefa
+    agrupa as classificações em INSERTs em lote, fora do caminho da requisição."""
+
+    def __init__(self, repository: EmailRepository):
+        self.repository = repository
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def is_started(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if not settings.history_enabled or self.is_started:
+            return
+        self._queue = asyncio.Queue(maxsize=settings.history_queue_max_size)
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Grava o que ainda está na fila e encerra a tarefa de gravação."""
+        if self._task is None:
+            return
+        if not self._task.done():
+            await self._queue.put(_STOP)
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await run_in_threadpool(self.repository.close)
+
+    def record(self, result: EmailClassificationResponse, subject: Optional[str] = None) -> None:
+        if not self.is_started:
+            return
+        row = {
+            "content": result.original_content,
+            "subject": subject[:SUBJECT_MAX_CHARS] if subject else subject,
+            "category": result.category.value,
+            "confidence": result.confidence,
+            "suggested_response": result.suggested_response or "",
+            "decided_by": result.decided_by,
+            # UTC, como EmailRepository.save e o default da entidade (processed_at da resposta é horário local)
+            "created_at": datetime.now(timezone.utc),
+        }
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            history_rows.inc(outcome="dropped")
+            return
+        history_pending.set(self._queue.qsize())
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            row = await self._queue.get()
+            if row is _STOP:
+                return
+            rows = [row]
+            deadline = time.monotonic() + settings.history_flush_interval
+            while len(rows) < settings.history_batch_size:
+                try:
+                    if self._queue.empty():
+                        row = await asyncio.wait_for(self._queue.get(), deadline - time.monotonic())
+                    else:
+                        row = self._queue.get_nowait()
+                except asyncio.TimeoutError:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                rows.append(row)
+            await self._flush(rows)
+
+    async def _flush(self, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        history_pending.set(self._queue.qsize())
+        started = time.perf_counter()
+        try:
+            await run_in_threadpool(self.repository.save_many, rows)
+        except Exception:
+            # Uma linha ruim não derruba o lote inteiro: regrava uma a uma e descarta só as que falharem
+            written = await run_in_threadpool(self._save_each, rows)
+            history_rows.inc(written, outcome="written")
+            history_rows.inc(len(rows) - written, outcome="failed")
+            return
+        history_flush.observe(time.perf_counter() - started)
+        history_rows.inc(len(rows), outcome="written")
+
+    def _save_each(self, rows: List[Dict[str, Any]]) -> int:
+        written = 0
+        for row in rows:
+            try:
+                written += self.repository.save_many([row])
+            except Exception:
+                pass
+        return written
+
+
+history_writer = HistoryWriter(EmailRepository(settings.history_database_url))
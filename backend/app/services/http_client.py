@@ -0,0 +1,124 @@
+import time
+import httpx
+from typing import Any, Dict, Optional
+from app.config.settings import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_CONNECTION_READY_EVENTS = (
+    "connection.connect_tcp.started",
+    "http11.send_request_headers.started",
+    "http2.send_request_headers.started",
+)
+
+
+class UpstreamClient:
+    """Cliente HTTP compartilhado (um por worker) para as chamadas ao Hugging Face."""
+
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+        self._requests = 0
+        self._pool_wait_total = 0.0
+        self._pool_wait_max = 0.0
+
+    @property
+    def is_started(self) -> bool:
+        return self._client is not None and not self._client.is_closed
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.upstream_max_connections,
+            max_keepalive_connections=settings.upstream_max_keepalive_connections,
+            keepalive_expiry=settings.upstream_keepalive_expiry,
+        )
+        timeout = httpx.Timeout(
+            settings.generation_timeout,
+            connect=settings.upstream_connect_timeout,
+            pool=settings.upstream_pool_timeout,
+        )
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout,
+            http2=settings.upstream_http2 and HTTP2_AVAILABLE,
+        )
+
+    async def start(self) -> None:
+        if not self.is_started:
+            self._client = self._build_client()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _request_timeout(self, read_timeout: float) -> httpx.Timeout:
+        return httpx.Timeout(
+            read_timeout,
+            connect=settings.upstream_connect_timeout,
+            pool=settings.upstream_pool_timeout,
+        )
+
+    def _tracer(self, started_at: float):
+        state = {"recorded": False}
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            if state["recorded"] or event_name not in _CONNECTION_READY_EVENTS:
+                return
+            state["recorded"] = True
+            waited = time.perf_counter() - started_at
+            self._pool_wait_total += waited
+            self._pool_wait_max = max(self._pool_wait_max, waited)
+
+        return trace
+
+    async def post(self, url: str, timeout: float, **kwargs) -> httpx.Response:
+        if not self.is_started:
+            await self.start()
+        self._requests += 1
+        extensions = {"trace": self._tracer(time.perf_counter())}
+        return await self._client.post(
+            url,
+            timeout=self._request_timeout(timeout),
+            extensions=extensions,
+            **kwargs
+        )
+
+    async def stream(self, url: str, timeout: float, **kwargs) -> httpx.Response:
+        """Como post, mas devolve a resposta sem ler o corpo; quem chama deve fechá-la com aclose()."""
+        if not self.is_started:
+            await self.start()
+        self._requests += 1
+        request = self._client.build_request(
+            "POST",
+            url,
+            timeout=self._request_timeout(timeout),
+            extensions={"trace": self._tracer(time.perf_counter())},
+            **kwargs
+        )
+        return await self._client.send(request, stream=True)
+
+    def stats(self) -> Dict[str, Any]:
+        connections = []
+        if self.is_started:
+            pool = getattr(self._client._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "http2": settings.upstream_http2 and HTTP2_AVAILABLE,
+            "max_connections": settings.upstream_max_connections,
+            "max_keepalive_connections": settings.upstream_max_keepalive_connections,
+            "open_connections": len(connections),
+            "idle_connections": idle,
+            "active_connections": len(connections) - idle,
+            "requests": self._requests,
+            "pool_wait_seconds_total": round(self._pool_wait_total, 6),
+            "pool_wait_seconds_max": round(self._pool_wait_max, 6),
+            "pool_wait_seconds_avg": round(self._pool_wait_total / self._requests, 6) if self._requests else 0.0,
+        }
+
+
+upstream_client = UpstreamClient()
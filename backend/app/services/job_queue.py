@@ -0,0 +1,282 @@
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+import httpx
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import settings
+from app.models.schemas import EmailInput, ResponseMode
+from app.repositories.job_repository import JobRecord, JobRepository
+from app.services.email_service import EmailService, build_batch_response, email_service
+from app.utils.metrics import registry
+
+PRUNE_EVERY = 64
+
+queue_depth = registry.gauge("sortmailbox_job_queue_depth", "Jobs aguardando um worker")
+jobs_running = registry.gauge("sortmailbox_jobs_running", "Jobs em processamento")
+job_wait = registry.histogram(
+    "sortmailbox_job_wait_seconds",
+    "Tempo entre a criação do job e o início do processamento",
+    ("kind",),
+)
+job_processing = registry.histogram(
+    "sortmailbox_job_processing_seconds",
+    "Duração do processamento de cada job",
+    ("kind",),
+)
+jobs_finished = registry.counter(
+    "sortmailbox_jobs_total",
+    "Jobs concluídos por tipo e status",
+    ("kind", "status"),
+)
+jobs_recovered = registry.counter(
+    "sortmailbox_jobs_recovered_total",
+    "Jobs assumidos depois que a posse de outro processo venceu",
+)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def is_allowed_callback(url: str) -> bool:
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and parsed.hostname in settings.job_callback_host_list
+
+
+class JobQueue:
+    """Fila limitada de jobs de classificação, drenada por um pool de workers asyncio no próprio processo.
+
+    Cada processo tem seu próprio ``owner`` e renova a posse dos jobs que criou ou executa; jobs cuja posse
+    venceu (processo reciclado, derrubado ou cancelado) são assumidos pelos demais."""
+
+    def __init__(self, email_service: EmailService, repository: JobRepository):
+        self.email_service = email_service
+        self.repository = repository
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running = 0
+        self._submitted = 0
+        self._stopping = False
+        self._busy: set = set()
+        self._pending: set = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+        # Callbacks vão para hosts do cliente: não disputam o pool nem as conexões do Hugging Face
+        self._callback_client: Optional[httpx.AsyncClient] = None
+        self.owner: Optional[str] = None
+
+    @property
+    def is_started(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> None:
+        if self.is_started:
+            return
+        # Gerado aqui, e não no import: com preload os workers nascem por fork do mesmo módulo
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._queue = asyncio.Queue(maxsize=settings.job_queue_max_size)
+        self._pending.clear()
+        self._callback_client = httpx.AsyncClient(timeout=settings.job_callback_timeout)
+        self._recover(time.time())
+        self._stopping = False
+        self._workers = [asyncio.ensure_future(self._worker()) for _ in range(max(settings.job_workers, 1))]
+        self._heartbeat = asyncio.ensure_future(self._renew_leases())
+
+    async def stop(self, drain_timeout: float = 0.0) -> None:
+        """Para de pegar jobs novos, espera até ``drain_timeout`` pelos que estão em execução e cancela o resto.
+        A posse dos jobs interrompidos ou ainda na fila é liberada para que outro processo os assuma."""
+        self._stopping = True
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        workers, self._workers = self._workers, []
+        busy = [worker for worker in workers if worker in self._busy]
+        for worker in workers:
+            if worker not in self._busy:
+                worker.cancel()
+        if busy and drain_timeout > 0:
+            await asyncio.wait(busy, timeout=drain_timeout)
+        for worker in busy:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if self.owner is not None:
+            self.repository.release_leases(self.owner)
+        if self._callback_client is not None:
+            await self._callback_client.aclose()
+            self._callback_client = None
+
+    async def submit(self, kind: str, payload: Dict[str, Any], callback_url: Optional[str] = None) -> JobRecord:
+        if not self.is_started:
+            await self.start()
+        if self._queue.full():
+            raise QueueFullError(f"Fila de jobs cheia ({settings.job_queue_max_size} aguardando)")
+        now = time.time()
+        record = self.repository.create(JobRecord(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            status="queued",
+            payload=payload,
+            created_at=now,
+            callback_url=callback_url,
+            owner=self.owner,
+            lease_expires_at=now + settings.job_lease_seconds,
+        ))
+        self._enqueue(record.id)
+        self._submitted += 1
+        if self._submitted % PRUNE_EVERY == 0:
+            self.repository.delete_finished_before(time.time() - settings.job_retention_seconds)
+        return record
+
+    async def submit_file(
+        self, file: UploadFile, subject: Optional[str], callback_url: Optional[str] = None, response_mode: str = "inline"
+    ) -> JobRecord:
+        """Copia o upload para o diretório de jobs (o worker lê de lá, inclusive após um reinício) e enfileira."""
+        os.makedirs(settings.job_files_path, exist_ok=True)
+        filename = file.filename or ""
+        path = os.path.join(settings.job_files_path, uuid.uuid4().hex + os.path.splitext(filename)[1])
+        await file.seek(0)
+
+        def copy() -> None:
+            with open(path, "wb") as destination:
+                shutil.copyfileobj(file.file, destination, settings.mailbox_read_chunk_bytes)
+
+        await run_in_threadpool(copy)
+        payload = {"path": path, "filename": filename, "subject": subject, "response_mode": response_mode}
+        try:
+            return await self.submit("file", payload, callback_url)
+        except QueueFullError:
+            self._discard_file(path)
+            raise
+
+    def get(self, job_id: str) -> Optional[JobRecord]:
+        return self.repository.find_by_id(job_id)
+
+    def _enqueue(self, job_id: str) -> bool:
+        if job_id in self._pending or self._queue.full():
+            return False
+        self._pending.add(job_id)
+        self._queue.put_nowait(job_id)
+        queue_depth.set(self._queue.qsize())
+        return True
+
+    async def _renew_leases(self) -> None:
+        """Renova a posse dos jobs deste processo e puxa para a fila local os que ficaram sem dono."""
+        interval = max(settings.job_lease_seconds / 3, 0.1)
+        while not self._stopping:
+            await asyncio.sleep(interval)
+            now = time.time()
+            try:
+                self.repository.renew_leases(self.owner, now + settings.job_lease_seconds)
+                jobs_recovered.inc(self._recover(now))
+            except Exception:
+                pass
+
+    def _recover(self, now: float) -> int:
+        """Enfileira jobs sem dono até encher a fila; os que não couberem continuam vencidos no banco e
+        entram num próximo heartbeat, aqui ou em outro processo."""
+        recovered = 0
+        for job_id in self.repository.find_expired(now):
+            if self._queue.full():
+                break
+            recovered += self._enqueue(job_id)
+        return recovered
+
+    async def _worker(self) -> None:
+        task = asyncio.current_task()
+        while not self._stopping:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            queue_depth.set(self._queue.qsize())
+            self._busy.add(task)
+            try:
+                await self._run(job_id)
+            except Exception:
+                pass
+            finally:
+                self._busy.discard(task)
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        record = self.repository.find_by_id(job_id)
+        if record is None or record.status not in ("queued", "running"):
+            return
+        started = time.time()
+        if not self.repository.claim(job_id, self.owner, started, started + settings.job_lease_seconds):
+            return
+        job_wait.observe(max(started - record.created_at, 0.0), kind=record.kind)
+        self._running += 1
+        jobs_running.set(self._running)
+        try:
+            result = await self._execute(record)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            record.status, record.result, record.error = "failed", None, str(e)
+        else:
+            record.status, record.result, record.error = "succeeded", result, None
+        finally:
+            self._running -= 1
+            jobs_running.set(self._running)
+        record.started_at = started
+        record.finished_at = time.time()
+        job_processing.observe(record.finished_at - started, kind=record.kind)
+        jobs_finished.inc(kind=record.kind, status=record.status)
+        self.repository.mark_finished(job_id, record.status, record.result, record.error, record.finished_at)
+        if record.kind == "file":
+            self._discard_file(record.payload["path"])
+        if record.callback_url:
+            await self._notify(record)
+
+    async def _execute(self, record: JobRecord) -> Any:
+        payload = record.payload
+        if record.kind == "email":
+            result = await self.email_service.classify_email(EmailInput(**payload["email"]))
+            return result.model_dump(mode="json")
+        if record.kind == "batch":
+            emails = [EmailInput(**email) for email in payload["emails"]]
+            results = await self.email_service.classify_batch(emails)
+            return build_batch_response(results).model_dump(mode="json")
+        if record.kind == "file":
+            with open(payload["path"], "rb") as handle:
+                upload = UploadFile(file=handle, filename=payload["filename"])
+                result = await self.email_service.classify_email_from_file(
+                    upload, payload.get("subject"), ResponseMode(payload.get("response_mode", "inline"))
+                )
+            return result.model_dump(mode="json")
+        raise ValueError(f"Tipo de job desconhecido: {record.kind}")
+
+    def _discard_file(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    async def _notify(self, record: JobRecord) -> None:
+        body = {
+            "id": record.id,
+            "kind": record.kind,
+            "status": record.status,
+            "result": record.result,
+            "error": record.error,
+        }
+        try:
+            response = await self._callback_client.post(record.callback_url, json=body)
+            callback_status = str(response.status_code)
+        except Exception as e:
+            callback_status = f"error: {type(e).__name__}"
+        self.repository.set_callback_status(record.id, callback_status)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._running,
+            "max_queued": settings.job_queue_max_size,
+        }
+
+
+job_queue = JobQueue(email_service, JobRepository(settings.job_store_path))
@@ -0,0 +1,195 @@
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.config.settings import settings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+LABELS = ("Improdutivo", "Produtivo")
+WEIGHTS_FILE = "weights.npy"
+METADATA_FILE = "model.json"
+
+_TOKEN = re.compile(r"\w+")
+_DIGIT = re.compile(r"\d")
+
+
+class HashedFeatureExtractor:
+    """Features de n-gramas de palavras e caracteres, mapeadas por hashing para um vetor de tamanho fixo."""
+
+    def __init__(self, n_features: int = 2 ** 18, char_ngram_range: Tuple[int, int] = (3, 5), max_chars: int = 4000):
+        self.n_features = n_features
+        self.char_ngram_range = tuple(char_ngram_range)
+        self.max_chars = max_chars
+        self._token_features = lru_cache(maxsize=100_000)(self._compute_token_features)
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            "n_features": self.n_features,
+            "char_ngram_range": list(self.char_ngram_range),
+            "max_chars": self.max_chars,
+        }
+
+    def _hash(self, feature: str) -> int:
+        return zlib.crc32(feature.encode("utf-8"))
+
+    def _compute_token_features(self, token: str) -> Tuple[int, Any]:
+        word_hash = self._hash(f"w:{token}")
+        features = [word_hash]
+        padded = f" {token} "
+        low, high = self.char_ngram_range
+        for size in range(low, high + 1):
+            for start in range(len(padded) - size + 1):
+                features.append(self._hash(f"c:{padded[start:start + size]}"))
+        return word_hash, np.asarray(features, dtype=np.int64)
+
+    def _row_hashes(self, text: str):
+        tokens = _TOKEN.findall(_DIGIT.sub("0", text[:self.max_chars].lower()))
+        if not tokens:
+            return np.zeros(0, dtype=np.int64)
+        word_hashes, parts = zip(*[self._token_features(token) for token in tokens])
+        words = np.asarray(word_hashes, dtype=np.int64)
+        parts = list(parts)
+        parts.append((words[:-1] * 1000003 + words[1:] * 7919 + 0x9E3779B1) & 0xFFFFFFFF)
+        return np.concatenate(parts)
+
+    def transform(self, texts: Sequence[str]):
+        """Retorna (índices, valores, linha de cada valor), formato esparso pronto para operações vetorizadas.
+
+        Cada ocorrência de feature vale +-1 (sinal vindo do hash) dividido pela raiz do total de features
+        da linha; ocorrências repetidas aparecem repetidas e são somadas por quem consome os arrays."""
+        row_hashes = [self._row_hashes(text) for text in texts]
+        lengths = np.fromiter((len(hashes) for hashes in row_hashes), dtype=np.int64, count=len(row_hashes))
+        if not lengths.sum():
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, np.zeros(0, dtype=np.float32), empty
+        hashes = np.concatenate(row_hashes)
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+        signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+        values = signs / np.sqrt(lengths[rows])
+        return hashes % self.n_features, values.astype(np.float32), rows
+
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30.0, 30.0)))
+
+
+class LocalClassifier:
+    """Modelo linear local (regressão logística sobre features com hashing), pontuado com NumPy."""
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.extractor: Optional[HashedFeatureExtractor] = None
+        self.weights = None
+        self.bias = 0.0
+        self.metadata: Dict[str, Any] = {}
+        self._load_attempted = False
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.weights is not None
+
+    def load(self) -> bool:
+        self._load_attempted = True
+        if np is None or not settings.local_model_enabled:
+            return False
+        metadata_path = os.path.join(self.model_path, METADATA_FILE)
+        weights_path = os.path.join(self.model_path, WEIGHTS_FILE)
+        if not (os.path.exists(metadata_path) and os.path.exists(weights_path)):
+            return False
+        with open(metadata_path, encoding="utf-8") as handle:
+            metadata = json.load(handle)
+        self.extractor = HashedFeatureExtractor(**metadata["features"])
+        self.weights = np.load(weights_path, mmap_mode="r")
+        self.bias = float(metadata["bias"])
+        self.metadata = metadata
+        return True
+
+    @property
+    def is_available(self) -> bool:
+        if not self.is_loaded and not self._load_attempted:
+            self.load()
+        return self.is_loaded
+
+    def predict_proba(self, texts: Sequence[str]):
+        """Probabilidade de cada texto ser Produtivo, calculada em uma única operação vetorizada."""
+        indices, values, rows = self.extractor.transform(texts)
+        contributions = np.asarray(self.weights[indices], dtype=np.float32) * values
+        scores = np.bincount(rows, weights=contributions, minlength=len(texts)) + self.bias
+        return _sigmoid(scores)
+
+    def predict(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        if not texts:
+            return []
+        probabilities = self.predict_proba(texts)
+        results = []
+        for probability in probabilities.tolist():
+            productive = probability >= 0.5
+            results.append({
+                "category": LABELS[1] if productive else LABELS[0],
+                "confidence": round(probability if productive else 1.0 - probability, 4),
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.is_loaded,
+            "path": self.model_path,
+            "trained_at": self.metadata.get("trained_at"),
+            "validation_accuracy": self.metadata.get("validation_accuracy"),
+        }
+
+
+def train_logistic_regression(
+    extractor: HashedFeatureExtractor,
+    texts: Sequence[str],
+    labels: Sequence[int],
+    epochs: int = 300,
+    learning_rate: float = 0.5,
+    l2: float = 1e-6,
+):
+    """Regressão logística com gradiente em lote completo (AdaGrad) e classes balanceadas."""
+    indices, values, rows = extractor.transform(texts)
+    y = np.asarray(labels, dtype=np.float64)
+    n_samples = len(texts)
+    positives = max(float(y.sum()), 1.0)
+    negatives = max(float(n_samples - y.sum()), 1.0)
+    sample_weight = np.where(y == 1, n_samples / (2 * positives), n_samples / (2 * negatives))
+    weights = np.zeros(extractor.n_features, dtype=np.float64)
+    bias = 0.0
+    accumulated = np.full(extractor.n_features, 1e-8)
+    accumulated_bias = 1e-8
+    for _ in range(epochs):
+        scores = np.bincount(rows, weights=weights[indices] * values, minlength=n_samples) + bias
+        residual = (_sigmoid(scores) - y) * sample_weight
+        gradient = np.bincount(indices, weights=values * residual[rows], minlength=extractor.n_features) / n_samples
+        gradient += l2 * weights
+        bias_gradient = float(residual.mean())
+        accumulated += gradient ** 2
+        accumulated_bias += bias_gradient ** 2
+        weights -= learning_rate * gradient / np.sqrt(accumulated)
+        bias -= learning_rate * bias_gradient / np.sqrt(accumulated_bias)
+    return weights.astype(np.float32), bias
+
+
+def save_model(path: str, extractor: HashedFeatureExtractor, weights, bias: float, extra: Dict[str, Any]) -> None:
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, WEIGHTS_FILE), weights)
+    metadata = {
+        "features": extractor.config(),
+        "bias": bias,
+        "labels": list(LABELS),
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        **extra,
+    }
+    with open(os.path.join(path, METADATA_FILE), "w", encoding="utf-8") as handle:
+        json.dump(metadata, handle, ensure_ascii=False, indent=2)
+
+
+local_classifier = LocalClassifier(settings.local_model_path)
@@ -0,0 +1,320 @@
+import asyncio
+import random
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Optional
+import httpx
+from app.config.settings import settings
+from app.services.admission import AdmissionController, UpstreamOverloadedError
+from app.utils.metrics import registry
+from app.utils.shared_state import SharedStateStore, shared_state
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+circuit_state = registry.gauge(
+    "sortmailbox_upstream_circuit_state",
+    "Estado do circuit breaker por upstream (0 fechado, 1 meio-aberto, 2 aberto)",
+    ("upstream",),
+)
+upstream_attempts = registry.counter(
+    "sortmailbox_upstream_attempts_total",
+    "Tentativas de chamada ao upstream por resultado (success, client_error, retryable_status, error)",
+    ("upstream", "outcome"),
+)
+upstream_retries = registry.counter(
+    "sortmailbox_upstream_retries_total",
+    "Novas tentativas após falha, por upstream",
+    ("upstream",),
+)
+upstream_short_circuits = registry.counter(
+    "sortmailbox_upstream_short_circuits_total",
+    "Chamadas não enviadas ao upstream, por motivo (circuit_open, deadline, overloaded)",
+    ("upstream", "reason"),
+)
+
+upstream_latency = registry.histogram(
+    "sortmailbox_upstream_request_seconds",
+    "Duração de cada tentativa de chamada ao upstream, por status HTTP (ou error)",
+    ("upstream", "status"),
+)
+
+_deadline: ContextVar[Optional[float]] = ContextVar("sortmailbox_deadline", default=None)
+
+
+class UpstreamUnavailableError(Exception):
+    pass
+
+
+@contextmanager
+def deadline_scope(seconds: float):
+    """Define o prazo total da requisição atual; escopos aninhados só podem encurtá-lo."""
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires_at if current is None else min(current, expires_at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+class RetryPolicy:
+    """Backoff exponencial com jitter completo; a dica do servidor (estimated_time) tem prioridade."""
+
+    def __init__(self, max_attempts: int, base_delay: float, max_delay: float, multiplier: float = 2.0):
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+
+    @classmethod
+    def from_settings(cls) -> "RetryPolicy":
+        return cls(
+            settings.upstream_retry_attempts,
+            settings.upstream_retry_base_delay,
+            settings.upstream_retry_max_delay,
+        )
+
+    def delay(self, attempt: int, hint: Optional[float] = None) -> float:
+        if hint is not None and hint > 0:
+            return min(hint, self.max_delay) * random.uniform(1.0, 1.2)
+        return random.uniform(0, min(self.max_delay, self.base_delay * self.multiplier ** attempt))
+
+
+class CircuitBreaker:
+    """Abre após falhas consecutivas; enquanto aberto, as chamadas vão direto ao fallback.
+    Passado o tempo de recuperação, uma única chamada de teste decide se o circuito fecha.
+
+    Com um ``store``, aberturas e fechamentos são publicados para os demais workers do host, que os
+    adotam na próxima chamada (no máximo uma leitura a cada SHARED_STATE_SYNC_INTERVAL)."""
+
+    def __init__(self, name: str, failure_threshold: int, recovery_seconds: float, store: Optional[SharedStateStore] = None):
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.recovery_seconds = recovery_seconds
+        self.store = store
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._times_opened = 0
+        self._synced_at = float("-inf")
+        self._published = None
+        circuit_state.set(0, upstream=name)
+
+    @classmethod
+    def from_settings(cls, name: str) -> "CircuitBreaker":
+        return cls(name, settings.breaker_failure_threshold, settings.breaker_recovery_seconds, shared_state)
+
+    def _set_state(self, state: str) -> None:
+        self.state = state
+        circuit_state.set(_STATE_VALUES[state], upstream=self.name)
+
+    def _publish(self) -> None:
+        if self.store is None:
+            return
+        # opened_at vai em tempo de relógio: o monotonic de cada processo não é comparável entre hosts/plataformas
+        opened_at = time.time() - (time.monotonic() - self._opened_at)
+        self._published = {"state": OPEN if self.state == OPEN else CLOSED, "opened_at": opened_at}
+        try:
+            self.store.set(f"breaker:{self.name}", self._published)
+        except sqlite3.Error:
+            pass
+
+    def _sync(self) -> None:
+        now = time.monotonic()
+        if self.store is None or now - self._synced_at < settings.shared_state_sync_interval:
+            return
+        self._synced_at = now
+        try:
+            shared = self.store.get(f"breaker:{self.name}")
+        except sqlite3.Error:
+            return
+        if shared is None or shared == self._published:
+            return
+        self._published = shared
+        if shared["state"] == OPEN and self.state == CLOSED:
+            self._opened_at = now - max(time.time() - shared["opened_at"], 0.0)
+            self._times_opened += 1
+            self._set_state(OPEN)
+        elif shared["state"] == CLOSED and self.state == OPEN:
+            self._failures = 0
+            self._set_state(CLOSED)
+
+    def allow(self) -> bool:
+        self._sync()
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.recovery_seconds:
+                return False
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self._probing = False
+        self._failures = 0
+        if self.state != CLOSED:
+            self._set_state(CLOSED)
+            self._publish()
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self._failures += 1
+        if self.state == OPEN:
+            return
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._times_opened += 1
+            self._set_state(OPEN)
+            self._publish()
+
+    def release(self) -> None:
+        """Libera a vaga de teste de uma chamada interrompida sem resultado (ex.: cancelamento)."""
+        self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        self._sync()
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self._times_opened,
+            "failure_threshold": self.failure_threshold,
+            "recovery_seconds": self.recovery_seconds,
+            "shared": self.store is not None,
+        }
+
+
+def retry_hint(response: httpx.Response) -> Optional[float]:
+    """Tempo sugerido pelo servidor: ``estimated_time`` do corpo 503 do HF ou o cabeçalho Retry-After."""
+    try:
+        body = response.json()
+    except Exception:
+        body = None
+    if isinstance(body, dict) and isinstance(body.get("estimated_time"), (int, float)):
+        return float(body["estimated_time"])
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+class SlotReleasingStream(httpx.AsyncByteStream):
+    """Corpo de uma resposta em stream que só devolve a vaga de admissão quando é fechado."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+async def call_upstream(
+    breaker: CircuitBreaker,
+    policy: RetryPolicy,
+    timeout: float,
+    send: Callable[[float], Awaitable[httpx.Response]],
+    admission: Optional[AdmissionController] = None,
+    hold_slot: bool = False,
+) -> httpx.Response:
+    """Executa ``send(timeout)`` com novas tentativas, respeitando o circuit breaker, o controle de admissão
+    e o prazo da requisição.
+
+    Devolve a última resposta recebida (inclusive de erro) ou levanta UpstreamUnavailableError quando
+    o circuito está aberto ou o prazo acabou antes de qualquer resposta, e UpstreamOverloadedError quando
+    a primeira tentativa é descartada pela admissão. Com ``hold_slot`` (respostas em stream), a vaga de
+    admissão da resposta devolvida só é liberada quando quem chamou fecha a resposta."""
+    name = breaker.name
+    last_error: Optional[Exception] = None
+    response: Optional[httpx.Response] = None
+    for attempt in range(policy.max_attempts):
+        budget = remaining_budget()
+        if budget is not None and budget <= 0:
+            upstream_short_circuits.inc(upstream=name, reason="deadline")
+            break
+        if not breaker.allow():
+            upstream_short_circuits.inc(upstream=name, reason="circuit_open")
+            break
+        hint = None
+        release: Optional[Callable[[], None]] = None
+        try:
+            if admission is not None:
+                release = await admission.acquire(budget)
+            started = time.perf_counter()
+            response = await send(timeout if budget is None else min(timeout, budget))
+        except UpstreamOverloadedError:
+            breaker.release()
+            upstream_short_circuits.inc(upstream=name, reason="overloaded")
+            if response is None:
+                raise
+            break
+        except httpx.HTTPError as exc:
+            if release is not None:
+                release()
+            upstream_latency.observe(time.perf_counter() - started, upstream=name, status="error")
+            breaker.record_failure()
+            upstream_attempts.inc(upstream=name, outcome="error")
+            last_error = exc
+        except BaseException:
+            if release is not None:
+                release()
+            breaker.release()
+            raise
+        else:
+            upstream_latency.observe(time.perf_counter() - started, upstream=name, status=response.status_code)
+            if response.status_code not in RETRYABLE_STATUS:
+                breaker.record_success()
+                outcome = "success" if response.status_code < 400 else "client_error"
+                upstream_attempts.inc(upstream=name, outcome=outcome)
+                if hold_slot and release is not None and not response.is_closed:
+                    response.stream = SlotReleasingStream(response.stream, release)
+                elif release is not None:
+                    release()
+                return response
+            if release is not None:
+                release()
+            breaker.record_failure()
+            upstream_attempts.inc(upstream=name, outcome="retryable_status")
+            await response.aread()
+            hint = retry_hint(response)
+        if attempt + 1 >= policy.max_attempts:
+            break
+        delay = policy.delay(attempt, hint)
+        budget = remaining_budget()
+        if budget is not None and delay >= budget:
+            upstream_short_circuits.inc(upstream=name, reason="deadline")
+            break
+        upstream_retries.inc(upstream=name)
+        await asyncio.sleep(delay)
+    if response is not None:
+        return response
+    if last_error is not None:
+        raise last_error
+    raise UpstreamUnavailableError(f"Upstream {name} indisponível")
+
+
+classification_breaker = CircuitBreaker.from_settings("classification")
+generation_breaker = CircuitBreaker.from_settings("generation")
@@ -1,4 +1,5 @@
-from typing import List, Tuple, Any
+from typing import FrozenSet, List, Optional, Tuple, Any
+from app.utils.keyword_matcher import KeywordMatcher
 
 QUESTION_MARKERS = [
     "?", "como", "quando", "onde", "por que", "porque", "qual", "quais",
@@ -41,6 +42,63 @@ FALLBACK_QUESTION_MARKERS = [
     "como está", "como vai", "o que", "status", "atualização", "andamento"
 ]
 
+PRODUCTIVE_SUBJECT_KEYWORDS = [
+    "dúvida", "pergunta", "solicitação", "pedido", "informação",
+    "informações", "consulta", "questionamento"
+]
+COURTESY_REQUEST_MARKERS = [
+    "poderiam", "podem", "gostaria", "gostaríamos", "preciso", "precisamos",
+    "quero", "queria", "queria saber", "quero saber", "preciso saber",
+    "informar", "informe", "informem", "quando poderiam", "quando podem",
+    "como faço", "como fazer", "qual o", "quais os", "quanto tempo",
+    "onde posso", "por que", "porque preciso", "enviar o", "enviar os",
+    "encaminhar o", "encaminhar os", "fornecer", "disponibilizar"
+]
+COURTESY_NEW_QUESTION_MARKERS = [
+    "tenho dúvida", "tenho uma dúvida", "minha dúvida", "uma dúvida sobre",
+    "dúvida sobre", "dúvida a respeito", "tenho pergunta", "minha pergunta",
+    "uma pergunta sobre", "pergunta sobre"
+]
+COURTESY_PAST_REFERENCES = [
+    "as dúvidas", "aquelas dúvidas", "suas dúvidas", "minhas dúvidas",
+    "resolveram as dúvidas", "ajudaram com as dúvidas", "tiraram as dúvidas",
+    "ajudaram com aquelas dúvidas", "me ajudaram com", "ajudaram muito com",
+    "as perguntas", "aquelas perguntas", "suas perguntas", "responderam as perguntas"
+]
+COURTESY_FINANCIAL_TERMS = [
+    "informar sobre rentabilidade", "qual a rentabilidade", "rentabilidade de",
+    "informar sobre liquidez", "qual a liquidez", "liquidez do",
+    "quero fazer aporte", "gostaria de aporte", "informar sobre aporte",
+    "informar sobre fundo", "qual fundo", "informação sobre fundo",
+    "diversificar carteira", "como diversificar"
+]
+COURTESY_PHRASES = [
+    "feliz natal", "boas festas", "feliz ano novo", "apenas para desejar",
+    "passando para desejar", "passando para agradecer", "só para agradecer",
+    "só para desejar", "apenas para agradecer", "que seja um ano"
+]
+COURTESY_TERMS = [
+    "parabéns", "aniversário", "votos de", "feliz", "ótimo", "sucesso", "que", "seja",
+    "ano", "ano de", "desejar", "boas", "foram excelentes", "ajudaram", "agradecer"
+]
+COURTESY_ACTION_MARKERS = [
+    "solicito", "solicitamos", "preciso que", "precisamos que", "gostaria de", "gostaríamos de",
+    "quando poderiam", "podem enviar", "por favor envie", "por favor enviar", "urgente", "confirmar",
+    "preciso receber", "precisamos receber", "dúvida sobre", "pergunta sobre", "como faço",
+    "qual o prazo", "qual a data", "enviar o", "enviar os", "encaminhar o", "encaminhar os"
+]
+
+HEURISTIC_MATCHER = KeywordMatcher(
+    QUESTION_MARKERS + GREETING_PHRASES + PRODUCTIVE_KEYWORDS + UNPRODUCTIVE_KEYWORDS
+    + FALLBACK_QUESTION_MARKERS + COURTESY_REQUEST_MARKERS + COURTESY_NEW_QUESTION_MARKERS
+    + COURTESY_PAST_REFERENCES + COURTESY_FINANCIAL_TERMS + COURTESY_PHRASES + COURTESY_TERMS
+    + COURTESY_ACTION_MARKERS
+)
+
+
+def keyword_hits(text_lower: str, hits: Optional[FrozenSet[str]] = None) -> FrozenSet[str]:
+    return hits if hits is not None else HEURISTIC_MATCHER.scan(text_lower)
+
 
 def parse_api_result(result: Any) -> Tuple[List[str], List[float]]:
     labels: List[str] = []
@@ -56,16 +114,17 @@ def parse_api_result(result: Any) -> Tuple[List[str], List[float]]:
     return labels, scores
 
 
-def has_question(text_lower: str) -> bool:
-    if any(m in text_lower for m in QUESTION_MARKERS):
+def has_question(text_lower: str, hits: Optional[FrozenSet[str]] = None) -> bool:
+    hits = keyword_hits(text_lower, hits)
+    if not hits.isdisjoint(QUESTION_MARKERS):
         return True
-    if "gostaria" in text_lower and "desejar" not in text_lower and "agradecer" not in text_lower:
+    if "gostaria" in hits and "desejar" not in hits and "agradecer" not in hits:
         return True
     return False
 
 
-def is_clear_greeting(text_lower: str) -> bool:
-    return any(p in text_lower for p in GREETING_PHRASES)
+def is_clear_greeting(text_lower: str, hits: Optional[FrozenSet[str]] = None) -> bool:
+    return not keyword_hits(text_lower, hits).isdisjoint(GREETING_PHRASES)
 
 
 def is_unproductive_label(top_label: str) -> bool:
@@ -75,13 +134,46 @@ def is_unproductive_label(top_label: str) -> bool:
     )
 
 
-def fallback_has_question(text_lower: str) -> bool:
-    if any(m in text_lower for m in FALLBACK_QUESTION_MARKERS):
+def fallback_has_question(text_lower: str, hits: Optional[FrozenSet[str]] = None) -> bool:
+    hits = keyword_hits(text_lower, hits)
+    if not hits.isdisjoint(FALLBACK_QUESTION_MARKERS):
         return True
-    if "gostaria" in text_lower and "desejar" not in text_lower and "agradecer" not in text_lower:
+    if "gostaria" in hits and "desejar" not in hits and "agradecer" not in hits:
         return True
     return False
 
 
-def fallback_is_clear_greeting(text_lower: str) -> bool:
-    return any(p in text_lower for p in GREETING_PHRASES)
+def fallback_is_clear_greeting(text_lower: str, hits: Optional[FrozenSet[str]] = None) -> bool:
+    return not keyword_hits(text_lower, hits).isdisjoint(GREETING_PHRASES)
+
+
+def has_productive_subject(subject: str) -> bool:
+    subject_lower = subject.lower()
+    return any(keyword in subject_lower for keyword in PRODUCTIVE_SUBJECT_KEYWORDS)
+
+
+def is_courtesy_only(content: str) -> bool:
+    text = content.lower().strip()
+    hits = keyword_hits(text)
+    has_direct_question = "?" in hits
+    has_new_question = not hits.isdisjoint(COURTESY_NEW_QUESTION_MARKERS)
+    past_references = not hits.isdisjoint(COURTESY_PAST_REFERENCES)
+    financial_terms_in_context = not hits.isdisjoint(COURTESY_FINANCIAL_TERMS)
+    if has_direct_question or not hits.isdisjoint(COURTESY_REQUEST_MARKERS):
+        return False
+    if has_new_question and not past_references:
+        return False
+    if financial_terms_in_context:
+        return False
+    courtesy = (
+        not hits.isdisjoint(COURTESY_PHRASES)
+        or ("parabéns" in hits and "aniversário" in hits)
+        or ("votos de" in hits and ("feliz" in hits or "ótimo" in hits or "sucesso" in hits))
+        or ("que" in hits and "seja" in hits and "ano" in hits and "sucesso" in hits)
+        or ("ano de" in hits and "sucesso" in hits and not financial_terms_in_context)
+        or ("desejar" in hits and ("feliz" in hits or "boas" in hits or "sucesso" in hits))
+        or ("foram excelentes" in hits and "ajudaram" in hits and not has_new_question)
+    )
+    if not courtesy:
+        return False
+    return hits.isdisjoint(COURTESY_ACTION_MARKERS)
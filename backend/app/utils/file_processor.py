@@ -1,47 +1,131 @@
+import codecs
 from fastapi import UploadFile
-import io
-try:
-    from PyPDF2 import PdfReader
-except ImportError:
-    try:
-        from pypdf2 import PdfReader
-    except ImportError:
-        PdfReader = None
+from typing import AsyncIterator, List, Optional
+from app.config.settings import settings
+from app.utils.pdf_extractor import PdfReader, extract_pdf_text, pdf_extractor
+from app.utils.timing import timed
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+def check_upload_size(file: UploadFile) -> None:
+    """Recusa logo de início uploads cujo tamanho já é conhecido e passa do limite."""
+    if file.size is not None and file.size > settings.upload_max_bytes:
+        raise UploadTooLargeError(
+            f"Arquivo muito grande. Tamanho máximo: {settings.upload_max_bytes / 1_000_000:g}MB"
+        )
+
+
+class _StreamDecoder:
+    """Decodifica à medida que lê. Se um trecho posterior à amostra não for UTF-8, o texto já lido
+    é recodificado e o arquivo inteiro passa para o fallback, como se tivesse sido decodificado de uma vez."""
+
+    def __init__(self, encoding: str, fallback: Optional[str]):
+        self.encoding = encoding
+        self.fallback = fallback
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._parts: List[str] = []
+
+    def feed(self, data: bytes, final: bool = False) -> None:
+        try:
+            self._parts.append(self._decoder.decode(data, final=final))
+        except UnicodeDecodeError:
+            if self.fallback is None:
+                raise
+            consumed = "".join(self._parts).encode(self.encoding) + self._decoder.getstate()[0] + data
+            self._decoder = codecs.getincrementaldecoder(self.fallback)()
+            self._parts[:] = [self._decoder.decode(consumed, final=final)]
+
+    def finish(self) -> str:
+        self.feed(b"", final=True)
+        return "".join(self._parts)
+
 
 class FileProcessor:
     async def extract_content(self, file: UploadFile) -> str:
-        content = await file.read()
+        check_upload_size(file)
         filename = file.filename or ""
+        chunks = self._read_chunks(file)
+        head = await anext(chunks, b"")
         if filename.endswith('.txt'):
-            return self._process_txt(content)
-        elif filename.endswith('.pdf'):
-            return self._process_pdf(content)
+            with timed("text_decode"):
+                return await self._process_txt(head, chunks)
+        elif filename.endswith('.pdf') or b"%PDF" in head[:1024]:
+            with timed("upload_read"):
+                content = await self._collect(head, chunks)
+            with timed("pdf_extract"):
+                return await self._process_pdf(content)
         else:
             try:
-                return content.decode('utf-8')
+                with timed("text_decode"):
+                    return await self._decode_stream(head, chunks, "utf-8", fallback=None)
             except UnicodeDecodeError:
-                return self._process_pdf(content)
+                raise ValueError("Arquivo não é texto UTF-8 nem PDF")
 
-    def _process_txt(self, content: bytes) -> str:
-        encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-        for encoding in encodings:
+    def extract_bytes(self, filename: str, content: bytes) -> str:
+        """Versão síncrona de extract_content para arquivos já lidos, usada fora do servidor (reclassificação
+        em lote): o PDF é extraído no próprio processo, sem o pool do PdfExtractor."""
+        if filename.endswith('.txt'):
+            # Mesma amostra do upload, para que CLI e API detectem a mesma codificação
+            return self._decode_bytes(content, self._detect_encoding(content[:settings.upload_chunk_bytes]), "latin-1")
+        elif filename.endswith('.pdf') or b"%PDF" in content[:1024]:
+            if PdfReader is None:
+                raise ValueError("PyPDF2 não está instalado. Instale com: pip install PyPDF2")
             try:
-                return content.decode(encoding)
-            except UnicodeDecodeError:
-                continue
-        return content.decode('utf-8', errors='ignore')
+                text, _, _ = extract_pdf_text(
+                    content, settings.pdf_max_pages, settings.pdf_max_chars, settings.pdf_time_limit_seconds
+                )
+            except Exception as e:
+                raise ValueError(f"Erro ao processar PDF: {str(e)}")
+            return text
+        try:
+            return self._decode_bytes(content, "utf-8", fallback=None)
+        except UnicodeDecodeError:
+            raise ValueError("Arquivo não é texto UTF-8 nem PDF")
+
+    async def _read_chunks(self, file: UploadFile) -> AsyncIterator[bytes]:
+        total = 0
+        while True:
+            chunk = await file.read(settings.upload_chunk_bytes)
+            if not chunk:
+                return
+            total += len(chunk)
+            if total > settings.upload_max_bytes:
+                raise UploadTooLargeError(
+                    f"Arquivo muito grande. Tamanho máximo: {settings.upload_max_bytes / 1_000_000:g}MB"
+                )
+            yield chunk
 
-    def _process_pdf(self, content: bytes) -> str:
-        if PdfReader is None:
-            raise ValueError("PyPDF2 não está instalado. Instale com: pip install PyPDF2")
+    async def _collect(self, head: bytes, chunks: AsyncIterator[bytes]) -> bytes:
+        content = bytearray(head)
+        async for chunk in chunks:
+            content += chunk
+        return bytes(content)
+
+    async def _process_txt(self, head: bytes, chunks: AsyncIterator[bytes]) -> str:
+        return await self._decode_stream(head, chunks, self._detect_encoding(head), fallback="latin-1")
+
+    def _detect_encoding(self, sample: bytes) -> str:
+        # latin-1 decodifica qualquer sequência de bytes; só é preciso decidir se a amostra é UTF-8
         try:
-            pdf_file = io.BytesIO(content)
-            reader = PdfReader(pdf_file)
-            text_content = []
-            for page in reader.pages:
-                text = page.extract_text()
-                if text:
-                    text_content.append(text)
-            return "\n".join(text_content)
-        except Exception as e:
-            raise ValueError(f"Erro ao processar PDF: {str(e)}")
+            codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+            return "utf-8"
+        except UnicodeDecodeError:
+            return "latin-1"
+
+    async def _decode_stream(self, head: bytes, chunks: AsyncIterator[bytes], encoding: str, fallback: Optional[str]) -> str:
+        decoder = _StreamDecoder(encoding, fallback)
+        decoder.feed(head)
+        async for chunk in chunks:
+            decoder.feed(chunk)
+        return decoder.finish()
+
+    def _decode_bytes(self, content: bytes, encoding: str, fallback: Optional[str]) -> str:
+        decoder = _StreamDecoder(encoding, fallback)
+        decoder.feed(content)
+        return decoder.finish()
+
+    async def _process_pdf(self, content: bytes) -> str:
+        return await pdf_extractor.extract(content)
@@ -0,0 +1,43 @@
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Optional, Tuple
+
+
+class KeywordMatcher:
+    """Conjunto de frases compilado uma única vez: uma varredura do texto gera o conjunto de frases
+    presentes (mesma semântica de ``frase in texto``), e todas as regras consultam esse conjunto."""
+
+    VOCABULARY_MIN_CHARS = 1024
+
+    def __init__(self, phrases: Iterable[str], cache_size: int = 32):
+        self.phrases = frozenset(phrases)
+        plan = []
+        for phrase in sorted(self.phrases, key=lambda p: (len(p), p)):
+            contained = [other for other in self.phrases if other != phrase and other in phrase]
+            gate = max(contained, key=len) if contained else None
+            words = phrase.split()
+            edges = (words[0], words[-1]) if len(words) > 1 else None
+            plan.append((phrase, gate, edges))
+        self._plan: Tuple[Tuple[str, Optional[str], Optional[Tuple[str, str]]], ...] = tuple(plan)
+        self.scan = lru_cache(maxsize=cache_size)(self._scan)
+
+    def _scan(self, text: str) -> FrozenSet[str]:
+        # Uma frase só é procurada se a maior frase contida nela já foi encontrada. Em textos longos,
+        # frases sem espaço são procuradas no vocabulário (tokens distintos), bem menor que o texto;
+        # frases com espaço só vão ao texto completo se as palavras das pontas estiverem no vocabulário.
+        if len(text) < self.VOCABULARY_MIN_CHARS:
+            vocabulary = None
+        else:
+            vocabulary = "\n".join(set(text.split()))
+        hits = set()
+        for phrase, gate, edges in self._plan:
+            if gate is not None and gate not in hits:
+                continue
+            if vocabulary is None:
+                found = phrase in text
+            elif edges is None:
+                found = phrase in vocabulary
+            else:
+                found = edges[0] in vocabulary and edges[1] in vocabulary and phrase in text
+            if found:
+                hits.add(phrase)
+        return frozenset(hits)
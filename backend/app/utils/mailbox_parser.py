@@ -0,0 +1,150 @@
+import html
+import re
+import zipfile
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesFeedParser
+from typing import AsyncIterator, Iterator, Optional, Tuple
+from fastapi import UploadFile
+from starlette.concurrency import iterate_in_threadpool
+
+_HTML_TAG = re.compile(r"<[^>]+>")
+_HTML_BLOCK = re.compile(r"<(script|style)\b.*?</\1>", re.IGNORECASE | re.DOTALL)
+_ESCAPED_FROM = re.compile(rb"^>+From ")
+
+
+class _MessageBuilder:
+    """Alimenta um BytesFeedParser linha a linha, descartando o que passar do limite de bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.parser = BytesFeedParser(policy=policy.default)
+
+    def feed(self, data: bytes) -> None:
+        if self.size >= self.max_bytes:
+            return
+        data = data[:self.max_bytes - self.size]
+        self.size += len(data)
+        self.parser.feed(data)
+
+    def close(self) -> Optional[EmailMessage]:
+        if self.size == 0:
+            return None
+        return self.parser.close()
+
+
+def message_text(message: EmailMessage) -> Tuple[str, str]:
+    """Extrai (assunto, corpo) de uma mensagem MIME, preferindo text/plain a text/html."""
+    subject = str(message.get("subject", "") or "").strip()
+    part = message.get_body(preferencelist=("plain", "html"))
+    if part is None:
+        return subject, ""
+    try:
+        body = part.get_content()
+    except (LookupError, UnicodeError, AssertionError):
+        payload = part.get_payload(decode=True) or b""
+        body = payload.decode("utf-8", errors="replace")
+    if not isinstance(body, str):
+        body = body.decode("utf-8", errors="replace") if isinstance(body, bytes) else ""
+    if part.get_content_subtype() == "html":
+        body = html.unescape(_HTML_TAG.sub(" ", _HTML_BLOCK.sub(" ", body)))
+    return subject, body.strip()
+
+
+async def _iter_lines(file: UploadFile, chunk_size: int) -> AsyncIterator[bytes]:
+    pending = b""
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + b"\n"
+    if pending:
+        yield pending
+
+
+async def iter_mbox(file: UploadFile, chunk_size: int, max_message_bytes: int) -> AsyncIterator[EmailMessage]:
+    builder: Optional[_MessageBuilder] = None
+    previous_blank = True
+    async for line in _iter_lines(file, chunk_size):
+        if previous_blank and line.startswith(b"From "):
+            if builder is not None:
+                message = builder.close()
+                if message is not None:
+                    yield message
+            builder = _MessageBuilder(max_message_bytes)
+            previous_blank = False
+            continue
+        previous_blank = line in (b"\n", b"\r\n")
+        if builder is None:
+            builder = _MessageBuilder(max_message_bytes)
+        if _ESCAPED_FROM.match(line):
+            line = line[1:]
+        builder.feed(line)
+    if builder is not None:
+        message = builder.close()
+        if message is not None:
+            yield message
+
+
+async def iter_eml(file: UploadFile, chunk_size: int, max_message_bytes: int) -> AsyncIterator[EmailMessage]:
+    builder = _MessageBuilder(max_message_bytes)
+    while builder.size < max_message_bytes:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        builder.feed(chunk)
+    message = builder.close()
+    if message is not None:
+        yield message
+
+
+def _iter_zip_members(file, chunk_size: int, max_message_bytes: int) -> Iterator[EmailMessage]:
+    with zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(".eml"):
+                continue
+            builder = _MessageBuilder(max_message_bytes)
+            with archive.open(info) as member:
+                while builder.size < max_message_bytes:
+                    chunk = member.read(chunk_size)
+                    if not chunk:
+                        break
+                    builder.feed(chunk)
+            message = builder.close()
+            if message is not None:
+                yield message
+
+
+async def iter_zip(file: UploadFile, chunk_size: int, max_message_bytes: int) -> AsyncIterator[EmailMessage]:
+    await file.seek(0)
+    async for message in iterate_in_threadpool(_iter_zip_members(file.file, chunk_size, max_message_bytes)):
+        yield message
+
+
+async def detect_format(file: UploadFile) -> str:
+    filename = (file.filename or "").lower()
+    head = await file.read(5)
+    await file.seek(0)
+    if filename.endswith(".zip") or head.startswith(b"PK\x03\x04"):
+        return "zip"
+    if filename.endswith(".mbox") or head.startswith(b"From "):
+        return "mbox"
+    return "eml"
+
+
+async def iter_messages(file: UploadFile, chunk_size: int, max_message_bytes: int) -> AsyncIterator[EmailMessage]:
+    """Percorre as mensagens de um .mbox, .eml ou .zip de .eml sem carregar o arquivo inteiro em memória."""
+    file_format = await detect_format(file)
+    if file_format == "zip":
+        iterator = iter_zip(file, chunk_size, max_message_bytes)
+    elif file_format == "mbox":
+        iterator = iter_mbox(file, chunk_size, max_message_bytes)
+    else:
+        iterator = iter_eml(file, chunk_size, max_message_bytes)
+    async for message in iterator:
+        yield message
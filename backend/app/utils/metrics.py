@@ -0,0 +1,230 @@
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def exposition(self) -> List[str]:
+        description = self.description.replace("\\", "\\\\").replace("\n", "\\n")
+        return [f"# HELP {self.name} {description}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, description, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[Dict[str, Any]]:
+        return [{"labels": self._labels(key), "value": value} for key, value in sorted(self._values.items())]
+
+    def dump(self) -> List[list]:
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def load(self, entries: List[list], worker: Optional[str]) -> None:
+        with self._lock:
+            for key, value in entries:
+                key = tuple(key)
+                self._values[key] = self._values.get(key, 0.0) + value
+
+    def exposition(self) -> List[str]:
+        lines = super().exposition()
+        samples = self.samples() or ([{"labels": {}, "value": 0.0}] if not self.labelnames else [])
+        for sample in samples:
+            lines.append(f"{self.name}{_format_labels(sample['labels'])} {_format_value(sample['value'])}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def load(self, entries: List[list], worker: Optional[str]) -> None:
+        # O valor de um gauge só vale para o processo que o mediu: não se soma, e o de um worker encerrado se descarta
+        if worker is None:
+            return
+        with self._lock:
+            for key, value in entries:
+                self._values[tuple(key) + (worker,)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            series["counts"][bisect_left(self.buckets, value)] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def dump(self) -> List[list]:
+        with self._lock:
+            return [[list(key), list(series["counts"]), series["sum"], series["count"]] for key, series in self._series.items()]
+
+    def load(self, entries: List[list], worker: Optional[str]) -> None:
+        with self._lock:
+            for key, counts, total, count in entries:
+                if len(counts) != len(self.buckets) + 1:
+                    continue
+                series = self._series.setdefault(
+                    tuple(key), {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+                )
+                series["counts"] = [a + b for a, b in zip(series["counts"], counts)]
+                series["sum"] += total
+                series["count"] += count
+
+    def samples(self) -> List[Dict[str, Any]]:
+        samples = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(self.buckets + (float("inf"),), series["counts"]):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            samples.append({
+                "labels": self._labels(key),
+                "buckets": buckets,
+                "sum": series["sum"],
+                "count": series["count"],
+            })
+        return samples
+
+    def exposition(self) -> List[str]:
+        lines = super().exposition()
+        for sample in self.samples():
+            labels = sample["labels"]
+            for bound, count in sample["buckets"]:
+                bucket_labels = {**labels, "le": _format_value(bound)}
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(sample['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {sample['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = metric_class(name, *args, **kwargs)
+            self._metrics[name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, description, labelnames)
+
+    def gauge(self, name: str, description: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, description, labelnames)
+
+    def histogram(self, name: str, description: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram, name, description, labelnames, buckets)
+
+    def metrics(self) -> List[_Metric]:
+        return list(self._metrics.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        snapshot = {}
+        for metric in self.metrics():
+            if isinstance(metric, Histogram):
+                snapshot[metric.name] = [
+                    {"labels": sample["labels"], "count": sample["count"], "sum": round(sample["sum"], 6)}
+                    for sample in metric.samples()
+                ]
+            else:
+                snapshot[metric.name] = metric.samples()
+        return snapshot
+
+    def dump(self) -> Dict[str, List[list]]:
+        """Valores brutos de cada série, em JSON, para outro processo combinar com os seus."""
+        return {metric.name: metric.dump() for metric in self.metrics()}
+
+    def combined(self, workers: Dict[str, Dict[str, List[list]]], retired: Iterable[Dict[str, List[list]]] = ()) -> "MetricsRegistry":
+        """Registro com as séries de vários processos: contadores e histogramas somados (inclusive os de
+        ``retired``, workers já encerrados), gauges separados pelo rótulo ``worker``."""
+        combined = MetricsRegistry()
+        for metric in self.metrics():
+            if isinstance(metric, Histogram):
+                combined.histogram(metric.name, metric.description, metric.labelnames, metric.buckets)
+            elif isinstance(metric, Gauge):
+                combined.gauge(metric.name, metric.description, metric.labelnames + ("worker",))
+            else:
+                combined.counter(metric.name, metric.description, metric.labelnames)
+        sources = [(dump, worker) for worker, dump in workers.items()] + [(dump, None) for dump in retired]
+        for dump, worker in sources:
+            for name, entries in dump.items():
+                metric = combined._metrics.get(name)
+                if metric is not None:
+                    metric.load(entries, worker)
+        return combined
+
+    def render_prometheus(self) -> str:
+        """Todas as métricas no formato texto de exposição do Prometheus."""
+        lines: List[str] = []
+        for metric in self.metrics():
+            lines.extend(metric.exposition())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
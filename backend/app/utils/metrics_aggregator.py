@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import settings
+from app.utils.metrics import MetricsRegistry, registry
+from app.utils.shared_state import SharedStateStore, shared_state
+
+WORKER_PREFIX = "metrics:worker:"
+RETIRED_KEY = "metrics:retired"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsAggregator:
+    """Junta as métricas dos workers do host pelo estado compartilhado. Cada worker publica os valores brutos
+    do seu registro a cada ``METRICS_PUBLISH_INTERVAL`` segundos e a cada coleta, e quem responde soma os
+    contadores e histogramas de todos. Os de um worker encerrado (ou morto) vão de uma vez para
+    ``metrics:retired``, para que os totais não voltem atrás quando um worker é reciclado."""
+
+    def __init__(self, registry: MetricsRegistry, store: Optional[SharedStateStore]):
+        self.registry = registry
+        self.store = store
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _key(pid: int) -> str:
+        return f"{WORKER_PREFIX}{pid}"
+
+    def _merge(self, retired: Optional[Dict[str, Any]], dumps: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self.registry.combined({}, ([retired] if retired else []) + dumps).dump()
+
+    def publish(self) -> None:
+        self.store.set(self._key(os.getpid()), self.registry.dump())
+
+    def retire(self, pids: Sequence[int]) -> None:
+        if pids:
+            self.store.fold(RETIRED_KEY, [self._key(pid) for pid in pids], self._merge)
+
+    def collect(self) -> Tuple[MetricsRegistry, List[int]]:
+        """Registro combinado de todos os workers do host e os pids dos que estão vivos."""
+        if self.store is None:
+            return self.registry, [os.getpid()]
+        self.publish()
+        published = self.store.items("metrics:")
+        workers: Dict[str, Dict[str, Any]] = {}
+        retired = [published.pop(RETIRED_KEY)] if RETIRED_KEY in published else []
+        for key, dump in published.items():
+            if key.startswith(WORKER_PREFIX):
+                pid = int(key[len(WORKER_PREFIX):])
+                if _alive(pid):
+                    workers[str(pid)] = dump
+                else:
+                    retired.append(dump)
+        return self.registry.combined(workers, retired), sorted(int(pid) for pid in workers)
+
+    def _publish_and_retire_dead(self) -> None:
+        self.publish()
+        published = self.store.items(WORKER_PREFIX)
+        self.retire([pid for pid in (int(key[len(WORKER_PREFIX):]) for key in published) if not _alive(pid)])
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.metrics_publish_interval)
+            try:
+                await run_in_threadpool(self._publish_and_retire_dead)
+            except sqlite3.Error:
+                pass
+
+    async def start(self) -> None:
+        if self.store is None or self._task is not None:
+            return
+        # Um pid reaproveitado não pode sobrescrever o que o worker anterior com o mesmo pid publicou
+        await run_in_threadpool(self.retire, [os.getpid()])
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            await run_in_threadpool(self.publish)
+            await run_in_threadpool(self.retire, [os.getpid()])
+        except sqlite3.Error:
+            pass
+
+
+metrics_aggregator = MetricsAggregator(registry, shared_state)
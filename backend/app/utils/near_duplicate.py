@@ -0,0 +1,184 @@
+import re
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.config.settings import settings
+from app.utils.metrics import registry
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FINGERPRINT_BITS = 64
+_TOKEN = re.compile(r"\[EMAIL\]|\d+(?:[.,/:-]\d+)*|\w+|[.!?]")
+_SENTENCE_END = frozenset(".!?")
+
+lookups = registry.counter(
+    "sortmailbox_near_duplicate_lookups_total",
+    "Consultas ao índice de quase-duplicatas por resultado (hit, miss, too_short)",
+    ("outcome",),
+)
+reused_responses = registry.counter(
+    "sortmailbox_near_duplicate_responses_reused_total",
+    "Respostas sugeridas reaproveitadas de um email quase idêntico",
+)
+index_entries = registry.gauge(
+    "sortmailbox_near_duplicate_entries",
+    "Impressões digitais guardadas no índice de quase-duplicatas",
+)
+match_distance = registry.histogram(
+    "sortmailbox_near_duplicate_distance_bits",
+    "Distância de Hamming até o email conhecido mais próximo, nos acertos",
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16),
+)
+
+
+def _features(text: str) -> List[str]:
+    """Palavras e pares de palavras. Números (datas, protocolos, valores) viram "#" e palavras com inicial
+    maiúscula fora do início de frase (nomes próprios, inclusive na assinatura) viram "@", para que emails do
+    mesmo template coincidam."""
+    tokens: List[str] = []
+    sentence_start = True
+    for token in _TOKEN.findall(text):
+        if token in _SENTENCE_END:
+            sentence_start = True
+            continue
+        if token[0].isdigit():
+            token = "#"
+        elif token[0].isupper() and not sentence_start and token != "[EMAIL]":
+            token = "@"
+            if tokens and tokens[-1] == "@":
+                continue
+        else:
+            token = token.lower()
+        sentence_start = False
+        tokens.append(token)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def simhash(text: str, min_tokens: int = 0) -> Optional[int]:
+    """SimHash de 64 bits sobre palavras e pares de palavras. Textos com menos de ``min_tokens`` palavras
+    devolvem None: neles, uma única palavra diferente já muda demais a impressão digital."""
+    features = _features(text)
+    if not features or (len(features) + 1) // 2 < min_tokens:
+        return None
+    if np is None:
+        votes = [0] * 64
+        for feature in features:
+            value = int.from_bytes(blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            for bit in range(64):
+                votes[bit] += 1 if value >> bit & 1 else -1
+        return sum(1 << bit for bit, vote in enumerate(votes) if vote > 0)
+    hashes = np.fromiter(
+        (int.from_bytes(blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little") for feature in features),
+        dtype=np.uint64,
+        count=len(features),
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    return int(np.packbits(votes > 0, bitorder="little").view("<u8")[0])
+
+
+class NearDuplicateEntry:
+    __slots__ = ("category", "confidence", "response")
+
+    def __init__(self, category: str, confidence: float):
+        self.category = category
+        self.confidence = confidence
+        self.response: Optional[str] = None
+
+
+class NearDuplicateIndex:
+    """Índice LRU de impressões digitais SimHash com busca por faixas.
+
+    Os 64 bits são divididos em ``max_distance + 1`` faixas: duas impressões a até ``max_distance`` bits de
+    distância coincidem em pelo menos uma faixa inteira (princípio da casa dos pombos). Cada faixa é uma tabela
+    hash, então a busca só compara os candidatos que coincidem em alguma faixa, sem varrer o índice."""
+
+    def __init__(self, max_entries: int, max_distance: int):
+        self.max_entries = max(max_entries, 1)
+        self.max_distance = min(max(max_distance, 0), FINGERPRINT_BITS // 2 - 1)
+        count = self.max_distance + 1
+        widths = [FINGERPRINT_BITS // count + (1 if i < FINGERPRINT_BITS % count else 0) for i in range(count)]
+        self._bands: List[Tuple[int, int]] = []
+        shift = 0
+        for width in widths:
+            self._bands.append((shift, (1 << width) - 1))
+            shift += width
+        self._tables: List[Dict[int, Set[int]]] = [{} for _ in self._bands]
+        self._entries: "OrderedDict[int, NearDuplicateEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _keys(self, fingerprint: int):
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            yield table, (fingerprint >> shift) & mask
+
+    def lookup(self, fingerprint: int) -> Optional[Tuple[NearDuplicateEntry, int]]:
+        best: Optional[Tuple[int, int]] = None
+        for table, key in self._keys(fingerprint):
+            for candidate in table.get(key, ()):
+                distance = bin(candidate ^ fingerprint).count("1")
+                if distance <= self.max_distance and (best is None or distance < best[1]):
+                    best = (candidate, distance)
+        if best is None:
+            self.misses += 1
+            lookups.inc(outcome="miss")
+            return None
+        self.hits += 1
+        lookups.inc(outcome="hit")
+        match_distance.observe(best[1])
+        self._entries.move_to_end(best[0])
+        return self._entries[best[0]], best[1]
+
+    def add(self, fingerprint: int, category: str, confidence: float) -> NearDuplicateEntry:
+        entry = self._entries.get(fingerprint)
+        if entry is not None:
+            self._entries.move_to_end(fingerprint)
+            if entry.category != category:
+                entry.response = None
+            entry.category, entry.confidence = category, confidence
+            return entry
+        entry = NearDuplicateEntry(category, confidence)
+        self._entries[fingerprint] = entry
+        for table, key in self._keys(fingerprint):
+            table.setdefault(key, set()).add(fingerprint)
+        if len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        index_entries.set(len(self._entries))
+        return entry
+
+    def get(self, fingerprint: int) -> Optional[NearDuplicateEntry]:
+        return self._entries.get(fingerprint)
+
+    def _remove(self, fingerprint: int) -> None:
+        del self._entries[fingerprint]
+        for table, key in self._keys(fingerprint):
+            bucket = table.get(key)
+            if bucket is not None:
+                bucket.discard(fingerprint)
+                if not bucket:
+                    del table[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+        for table in self._tables:
+            table.clear()
+        index_entries.set(0)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "max_distance": self.max_distance,
+            "bands": len(self._bands),
+            "hits": self.hits,
+            "misses": self.misses,
+            "reuse_rate": round(self.hits / total, 4) if total else 0.0,
+            "responses_cached": sum(1 for entry in self._entries.values() if entry.response is not None),
+        }
+
+
+near_duplicate_index = NearDuplicateIndex(settings.near_duplicate_max_entries, settings.near_duplicate_max_distance)
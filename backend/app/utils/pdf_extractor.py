@@ -0,0 +1,179 @@
+import asyncio
+import io
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import settings
+from app.utils.metrics import registry
+
+try:
+    from PyPDF2 import PdfReader
+except ImportError:
+    try:
+        from pypdf2 import PdfReader
+    except ImportError:
+        PdfReader = None
+
+page_seconds = registry.histogram(
+    "sortmailbox_pdf_page_extraction_seconds",
+    "Tempo de extração de texto de cada página de PDF",
+)
+document_seconds = registry.histogram(
+    "sortmailbox_pdf_extraction_seconds",
+    "Tempo total de extração de cada PDF, incluindo a espera por um processo livre",
+)
+documents = registry.counter(
+    "sortmailbox_pdf_documents_total",
+    "PDFs processados por motivo de término (complete, page_limit, char_limit, time_limit, timeout)",
+    ("stopped_by",),
+)
+pool_recycles = registry.counter(
+    "sortmailbox_pdf_pool_recycles_total",
+    "Vezes em que o pool de extração foi recriado (processo travado ou pool quebrado)",
+)
+# Folga da guarda externa sobre PDF_TIME_LIMIT_SECONDS, que o próprio processo já aplica
+GUARD_GRACE_SECONDS = 5.0
+
+
+class TimeLimitExceeded(BaseException):
+    """Levantada pelo alarme no meio de uma página. Deriva de BaseException para não ser engolida pelos
+    ``except Exception`` do PyPDF2."""
+
+
+def _time_limit_alarm(signum, frame) -> None:
+    raise TimeLimitExceeded()
+
+
+def _can_use_alarm() -> bool:
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+def extract_pdf_text(content: bytes, max_pages: int, max_chars: int, time_limit: float) -> Tuple[str, List[float], str]:
+    """Extrai o texto página a página, parando no limite de páginas, de caracteres ou de tempo.
+
+    Roda dentro do pool de processos; devolve (texto, duração de cada página, motivo da parada). Na thread
+    principal de um processo (pool ou CLI), um SIGALRM interrompe também uma única página lenta; em thread, o
+    limite só é verificado entre páginas."""
+    started = time.perf_counter()
+    text_content = []
+    durations = []
+    collected = 0
+    stopped_by = "complete"
+    alarm = _can_use_alarm() and time_limit > 0
+    if alarm:
+        previous = signal.signal(signal.SIGALRM, _time_limit_alarm)
+        signal.setitimer(signal.ITIMER_REAL, time_limit)
+    try:
+        reader = PdfReader(io.BytesIO(content))
+        for number, page in enumerate(reader.pages):
+            if number >= max_pages:
+                stopped_by = "page_limit"
+                break
+            if collected >= max_chars:
+                stopped_by = "char_limit"
+                break
+            if time.perf_counter() - started >= time_limit:
+                stopped_by = "time_limit"
+                break
+            page_started = time.perf_counter()
+            text = page.extract_text()
+            durations.append(time.perf_counter() - page_started)
+            if text:
+                text_content.append(text)
+                collected += len(text) + 1
+    except TimeLimitExceeded:
+        stopped_by = "time_limit"
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+    return "\n".join(text_content)[:max_chars], durations, stopped_by
+
+
+class PdfExtractor:
+    """Extração de PDF fora do event loop, em um pool de processos (ou em thread, com PDF_WORKERS=0).
+
+    Só entram no pool tantos PDFs quantos forem os processos: a espera por um processo livre fica fora da
+    guarda de tempo, que assim mede só a extração. Se a guarda estourar, o pool é recriado e o processo
+    travado é morto, em vez de ocupar uma vaga para sempre."""
+
+    def __init__(self):
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def start(self) -> None:
+        if self._pool is None and settings.pdf_workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=settings.pdf_workers)
+            if self._slots is None:
+                self._slots = asyncio.Semaphore(settings.pdf_workers)
+
+    def _recycle(self, pool: ProcessPoolExecutor) -> None:
+        if self._pool is not pool:
+            return
+        for process in list((getattr(pool, "_processes", None) or {}).values()):
+            process.kill()
+        pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = None
+        pool_recycles.inc()
+        self.start()
+
+    async def _run_in_pool(self, args: Tuple) -> Tuple[str, List[float], str]:
+        loop = asyncio.get_running_loop()
+        await self._slots.acquire()
+        pool = self._pool
+        try:
+            submitted = pool.submit(extract_pdf_text, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # A vaga só volta quando o processo termina de fato, mesmo que quem pediu tenha desistido antes
+        submitted.add_done_callback(lambda _: loop.call_soon_threadsafe(self._slots.release))
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(submitted), settings.pdf_time_limit_seconds + GUARD_GRACE_SECONDS
+            )
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            self._recycle(pool)
+            raise
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._slots = None
+
+    async def extract(self, content: bytes) -> str:
+        if PdfReader is None:
+            raise ValueError("PyPDF2 não está instalado. Instale com: pip install PyPDF2")
+        self.start()
+        args = (content, settings.pdf_max_pages, settings.pdf_max_chars, settings.pdf_time_limit_seconds)
+        started = time.perf_counter()
+        try:
+            if self._pool is None:
+                # Em thread não há como interromper uma página lenta; a folga cobre uma delas
+                text, durations, stopped_by = await asyncio.wait_for(
+                    run_in_threadpool(extract_pdf_text, *args), settings.pdf_time_limit_seconds * 2 + GUARD_GRACE_SECONDS
+                )
+            else:
+                try:
+                    text, durations, stopped_by = await self._run_in_pool(args)
+                except BrokenProcessPool:
+                    # O pool foi recriado enquanto este PDF estava nele (por outro PDF travado): tenta mais uma vez
+                    text, durations, stopped_by = await self._run_in_pool(args)
+        except asyncio.TimeoutError:
+            documents.inc(stopped_by="timeout")
+            raise ValueError("Tempo limite excedido ao processar PDF")
+        except Exception as e:
+            raise ValueError(f"Erro ao processar PDF: {str(e)}")
+        document_seconds.observe(time.perf_counter() - started)
+        for duration in durations:
+            page_seconds.observe(duration)
+        documents.inc(stopped_by=stopped_by)
+        return text
+
+
+pdf_extractor = PdfExtractor()
@@ -0,0 +1,279 @@
+import asyncio
+import heapq
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from app.config.settings import settings
+from app.utils.metrics import registry
+
+BUFFER_SAMPLES = 100_000
+MAX_DEPTH = 128
+# Frames no topo da pilha que indicam uma thread parada esperando (loop sem trabalho, pool ocioso); com uvloop,
+# o loop ocioso aparece como asyncio.run esperando o código em C
+IDLE_FILES = (
+    "selectors.py",
+    "threading.py",
+    "queue.py",
+    os.path.join("concurrent", "futures", "thread.py"),
+    os.path.join("asyncio", "runners.py"),
+)
+
+profiles_written = registry.counter(
+    "sortmailbox_profiles_written_total",
+    "Perfis de amostragem gravados, por motivo (header, sampled, slowest)",
+    ("reason",),
+)
+
+Frame = Tuple[str, str, int]
+Sample = Tuple[float, int, Tuple[int, ...]]
+
+
+class StackSampler:
+    """Amostra periodicamente a pilha Python de todas as threads ocupadas do processo.
+
+    Uma única thread de amostragem alimenta um buffer circular com (instante, thread, pilha); o perfil de uma
+    requisição é o recorte do buffer entre o início e o fim dela. Threads esperando I/O não geram amostras,
+    então o perfil mostra onde o tempo de CPU em Python foi gasto.
+
+    O recorte é do processo inteiro: requisições concorrentes dividem o event loop e os pools de threads, e o
+    trabalho de uma requisição se espalha por tarefas compartilhadas (single-flight, geração especulativa), então
+    não há como separar as amostras por requisição. Sob carga, o perfil inclui o trabalho das outras."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._frames: List[Frame] = []
+        self._frame_ids: Dict[Frame, int] = {}
+        self._samples: Deque[Sample] = deque(maxlen=BUFFER_SAMPLES)
+        self._users = 0
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._users += 1
+            if self._thread is None:
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,), name="sortmailbox-profiler", daemon=True)
+                self._thread.start()
+
+    def release(self) -> None:
+        with self._lock:
+            self._users = max(self._users - 1, 0)
+            if self._users == 0 and self._thread is not None:
+                self._stop.set()
+                self._thread = None
+
+    def _frame_id(self, code) -> int:
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self._frame_ids.get(key)
+        if index is None:
+            index = len(self._frames)
+            self._frames.append(key)
+            self._frame_ids[key] = index
+        return index
+
+    def _run(self, stop: threading.Event) -> None:
+        own = threading.get_ident()
+        while not stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own or frame.f_code.co_filename.endswith(IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(self._frame_id(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()
+                self._samples.append((now, thread_id, tuple(stack)))
+
+    def window(self, started: float, finished: float) -> List[Sample]:
+        return [sample for sample in list(self._samples) if started <= sample[0] <= finished]
+
+    def speedscope(self, name: str, samples: List[Sample], started: float, finished: float) -> Dict[str, Any]:
+        """Monta um arquivo no formato do speedscope (https://www.speedscope.app), um perfil por thread."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        by_thread: Dict[int, List[Tuple[int, ...]]] = {}
+        for _, thread_id, stack in samples:
+            by_thread.setdefault(thread_id, []).append(list(stack))
+        weight = round(self.interval * 1000, 3)
+        duration = round((finished - started) * 1000, 3)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "sortmailbox",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": fn, "file": file, "line": line} for fn, file, line in self._frames]},
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": names.get(thread_id, f"thread {thread_id}"),
+                    "unit": "milliseconds",
+                    "startValue": 0,
+                    "endValue": max(duration, weight * len(stacks)),
+                    "samples": stacks,
+                    "weights": [weight] * len(stacks),
+                }
+                for thread_id, stacks in sorted(by_thread.items(), key=lambda entry: -len(entry[1]))
+            ],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {"running": self.is_running, "buffered_samples": len(self._samples), "frames": len(self._frames)}
+
+
+class RequestProfiler:
+    """Decide quais requisições perfilar e grava os perfis em ``directory``.
+
+    - cabeçalho ``header`` (com o valor de ``token``, quando configurado) ou sorteio com ``sample_rate``;
+    - com ``keep_slowest`` > 0, o amostrador fica sempre ligado e só os perfis das N requisições mais lentas
+      (acima de ``slow_min_seconds``) ficam no disco."""
+
+    def __init__(self, enabled: bool, sampler: StackSampler, directory: str, header: str, token: str,
+                 sample_rate: float, keep_slowest: int, slow_min_seconds: float, paths: List[str]):
+        self.enabled = enabled
+        self.sampler = sampler
+        self.directory = directory
+        self.header = header.lower().encode("latin-1")
+        self.token = token
+        self.sample_rate = sample_rate
+        self.keep_slowest = keep_slowest
+        self.slow_min_seconds = slow_min_seconds
+        self.paths = set(paths)
+        self._slowest: List[Tuple[float, str]] = []
+        self._written = 0
+
+    @classmethod
+    def from_settings(cls) -> "RequestProfiler":
+        return cls(
+            settings.profiling_enabled,
+            StackSampler(settings.profile_interval),
+            settings.profile_dir,
+            settings.profile_header,
+            settings.profile_token,
+            settings.profile_sample_rate,
+            settings.profile_slowest,
+            settings.profile_slow_min_seconds,
+            [path.strip().rstrip("/") for path in settings.profile_paths.split(",") if path.strip()],
+        )
+
+    def start(self) -> None:
+        if self.enabled and self.keep_slowest > 0:
+            self.sampler.acquire()
+
+    def stop(self) -> None:
+        if self.enabled and self.keep_slowest > 0:
+            self.sampler.release()
+
+    def wants(self, scope) -> Optional[str]:
+        """Motivo para perfilar a requisição (header, sampled ou slowest) ou None."""
+        if not self.enabled or scope["path"].rstrip("/") not in self.paths:
+            return None
+        for name, value in scope.get("headers", []):
+            if name == self.header:
+                if not self.token or value.decode("latin-1") == self.token:
+                    return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sampled"
+        if self.keep_slowest > 0:
+            return "slowest"
+        return None
+
+    def _qualifies_as_slow(self, duration: float) -> bool:
+        if duration < self.slow_min_seconds:
+            return False
+        return len(self._slowest) < self.keep_slowest or duration > self._slowest[0][0]
+
+    def _write(self, filename: str, profile: Dict[str, Any]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, filename), "w", encoding="utf-8") as handle:
+            json.dump(profile, handle, separators=(",", ":"))
+
+    def _remember_slow(self, duration: float, filename: str) -> None:
+        heapq.heappush(self._slowest, (duration, filename))
+        if len(self._slowest) > self.keep_slowest:
+            _, evicted = heapq.heappop(self._slowest)
+            try:
+                os.remove(os.path.join(self.directory, evicted))
+            except OSError:
+                pass
+
+    def filename(self, scope, reason: str) -> str:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        route = scope["path"].strip("/").replace("/", "_") or "root"
+        return f"{stamp}-{os.getpid()}-{route}-{reason}.speedscope.json"
+
+    async def finish(self, scope, reason: str, filename: str, started: float, finished: float) -> None:
+        duration = finished - started
+        if reason == "slowest":
+            if not self._qualifies_as_slow(duration):
+                return
+            self._remember_slow(duration, filename)
+        samples = self.sampler.window(started, finished)
+        name = f"{scope['method']} {scope['path']} ({duration * 1000:.0f} ms, {reason}; processo inteiro, pid {os.getpid()})"
+        profile = self.sampler.speedscope(name, samples, started, finished)
+        await asyncio.get_running_loop().run_in_executor(None, self._write, filename, profile)
+        self._written += 1
+        profiles_written.inc(reason=reason)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            **self.sampler.stats(),
+            "directory": self.directory,
+            "sample_rate": self.sample_rate,
+            "keep_slowest": self.keep_slowest,
+            "written": self._written,
+            "slowest": [
+                {"seconds": round(duration, 4), "file": filename}
+                for duration, filename in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+
+class ProfilingMiddleware:
+    """Perfila as requisições escolhidas por RequestProfiler; o nome do arquivo volta em X-Profile-File
+    quando o perfil foi pedido pelo cabeçalho, com X-Profile-Scope: process lembrando que o perfil cobre todo o
+    processo durante a requisição, não só ela."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        reason = request_profiler.wants(scope) if scope["type"] == "http" else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+        filename = request_profiler.filename(scope, reason)
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start" and reason == "header":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-file", filename.encode("latin-1")))
+                headers.append((b"x-profile-scope", b"process"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        if reason != "slowest":
+            request_profiler.sampler.acquire()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            finished = time.perf_counter()
+            if reason != "slowest":
+                request_profiler.sampler.release()
+            await request_profiler.finish(scope, reason, filename, started, finished)
+
+
+request_profiler = RequestProfiler.from_settings()
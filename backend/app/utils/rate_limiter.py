@@ -0,0 +1,79 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List
+from fastapi import HTTPException, Request
+from app.config.settings import settings
+from app.utils.metrics import registry
+
+rate_limited = registry.counter(
+    "sortmailbox_rate_limited_total",
+    "Requisições recusadas com 429 pelo limite por cliente",
+)
+
+
+class TokenBucketLimiter:
+    """Um balde de fichas por cliente: ``rate`` fichas por segundo, acumulando até ``burst``.
+
+    Guarda no máximo ``max_clients`` baldes; o menos usado recentemente é descartado (e volta cheio)."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_clients = max(max_clients, 1)
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def acquire(self, client: str, cost: float = 1.0) -> float:
+        """Consome ``cost`` fichas; devolve 0 se permitido ou os segundos até haver fichas suficientes."""
+        now = time.monotonic()
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = [float(self.burst), now]
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        return (cost - bucket[0]) / self.rate
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "clients": len(self._buckets),
+        }
+
+
+def _client_key(request: Request) -> str:
+    if settings.rate_limit_key_header:
+        value = request.headers.get(settings.rate_limit_key_header)
+        if value:
+            return f"key:{value}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+async def enforce_rate_limit(request: Request) -> None:
+    """Dependência das rotas de classificação: 429 com Retry-After quando o cliente esgota o balde."""
+    if not rate_limiter.enabled:
+        return
+    retry_after = rate_limiter.acquire(_client_key(request))
+    if retry_after > 0:
+        rate_limited.inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Limite de requisições excedido. Tente novamente em instantes",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+rate_limiter = TokenBucketLimiter(settings.rate_limit_per_minute / 60.0, settings.rate_limit_burst, settings.rate_limit_max_clients)
@@ -0,0 +1,60 @@
+from typing import Sequence
+
+RESPONSE_PREFIXES = ("Resposta:", "Email:", "Mensagem:")
+
+
+def clean_response(text: str, prefixes: Sequence[str] = RESPONSE_PREFIXES) -> str:
+    text = text.strip()
+    for prefix in prefixes:
+        if text.startswith(prefix):
+            text = text[len(prefix):].strip()
+    return text
+
+
+class StreamingResponseCleaner:
+    """Versão incremental de clean_response para texto gerado em partes.
+
+    O início do texto fica retido até ser possível decidir se cada prefixo está presente, e o espaço em
+    branco final de cada parte só é emitido quando chega texto depois dele. A concatenação do que
+    ``feed`` e ``finish`` devolvem é igual a ``clean_response`` do texto completo."""
+
+    def __init__(self, prefixes: Sequence[str] = RESPONSE_PREFIXES):
+        self.prefixes = tuple(prefixes)
+        self._stage = 0
+        self._head = ""
+        self._trailing = ""
+        self._started = False
+
+    def feed(self, chunk: str) -> str:
+        if self._stage < len(self.prefixes):
+            self._head += chunk
+            while self._stage < len(self.prefixes):
+                self._head = self._head.lstrip()
+                if not self._head:
+                    return ""
+                prefix = self.prefixes[self._stage]
+                if self._head.startswith(prefix):
+                    self._head = self._head[len(prefix):]
+                elif prefix.startswith(self._head):
+                    return ""
+                self._stage += 1
+            chunk, self._head = self._head, ""
+        return self._emit(chunk)
+
+    def finish(self) -> str:
+        if self._stage >= len(self.prefixes):
+            return ""
+        head = clean_response(self._head, self.prefixes[self._stage:])
+        self._stage = len(self.prefixes)
+        self._head = ""
+        return self._emit(head)
+
+    def _emit(self, chunk: str) -> str:
+        text = self._trailing + chunk
+        if not self._started:
+            text = text.lstrip()
+        body = text.rstrip()
+        self._trailing = text[len(body):]
+        if body:
+            self._started = True
+        return body
@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+from app.config.settings import settings
+
+
+class MemoryCacheBackend:
+    """LRU em memória, com TTL, local ao processo."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None, True
+            self._entries.move_to_end(key)
+            return value, False
+
+    def set(self, key: str, value: Any) -> int:
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """LRU em disco (SQLite/WAL): sobrevive a reinícios e é compartilhado entre workers do mesmo host.
+
+    Um acerto não grava nada na hora: ``accessed_at`` só é renovado se tiver mais de TOUCH_INTERVAL segundos, e
+    essas renovações são gravadas juntas, em uma transação, a cada TOUCH_BATCH chaves ou antes de podar."""
+
+    blocking = True
+    PRUNE_EVERY = 32
+    TOUCH_INTERVAL = 60.0
+    TOUCH_BATCH = 64
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._touched: Dict[str, float] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_result_cache_accessed_at ON result_cache (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM result_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, False
+            if row[1] < now:
+                conn.execute("DELETE FROM result_cache WHERE key = ?", (key,))
+                self._touched.pop(key, None)
+                return None, True
+            if row[2] < now - self.TOUCH_INTERVAL:
+                self._touched[key] = now
+                if len(self._touched) >= self.TOUCH_BATCH:
+                    self._flush_touches(conn)
+            return json.loads(row[0]), False
+
+    def set(self, key: str, value: Any) -> int:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + self.ttl_seconds, now)
+            )
+            self._touched.pop(key, None)
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY:
+                return 0
+            return self._prune(conn, now)
+
+    def _flush_touches(self, conn: sqlite3.Connection) -> None:
+        touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "UPDATE result_cache SET accessed_at = ? WHERE key = ?", [(at, key) for key, at in touched.items()]
+            )
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> int:
+        self._flush_touches(conn)
+        conn.execute("DELETE FROM result_cache WHERE expires_at < ?", (now,))
+        excess = conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0] - self.max_entries
+        if excess <= 0:
+            return 0
+        conn.execute(
+            "DELETE FROM result_cache WHERE key IN "
+            "(SELECT key FROM result_cache ORDER BY accessed_at ASC LIMIT ?)",
+            (excess,)
+        )
+        return excess
+
+    def size(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM result_cache")
+
+
+class NullCacheBackend:
+    blocking = False
+
+    def get(self, key: str) -> Tuple[Optional[Any], bool]:
+        return None, False
+
+    def set(self, key: str, value: Any) -> int:
+        return 0
+
+    def size(self) -> int:
+        return 0
+
+    def clear(self) -> None:
+        pass
+
+
+class ResultCache:
+    """Cache endereçado por conteúdo para resultados de classificação e respostas sugeridas."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def make_key(kind: str, model: str, normalized_text: str, category: str = "") -> str:
+        digest = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+        return f"{kind}:{model}:{category}:{digest}"
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            value, expired = self.backend.get(key)
+        except sqlite3.Error:
+            value, expired = None, False
+        if expired:
+            self.expirations += 1
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            self.evictions += self.backend.set(key, value)
+        except sqlite3.Error:
+            pass
+
+    # Com backend em disco, as versões assíncronas rodam no threadpool: uma escrita de outro worker segurando o
+    # lock do SQLite atrasa só esta consulta, não o event loop inteiro
+    async def aget(self, key: str) -> Optional[Any]:
+        if not self.backend.blocking:
+            return self.get(key)
+        return await run_in_threadpool(self.get, key)
+
+    async def aget_many(self, keys: List[str]) -> List[Optional[Any]]:
+        if not self.backend.blocking:
+            return [self.get(key) for key in keys]
+        return await run_in_threadpool(lambda: [self.get(key) for key in keys])
+
+    async def aset(self, key: str, value: Any) -> None:
+        if not self.backend.blocking:
+            return self.set(key, value)
+        await run_in_threadpool(self.set, key, value)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        try:
+            size = self.backend.size()
+        except sqlite3.Error:
+            size = None
+        return {
+            "backend": type(self.backend).__name__,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def build_result_cache() -> ResultCache:
+    backend_name = settings.cache_backend.lower()
+    if backend_name == "auto":
+        # Com vários workers, o cache em SQLite é compartilhado entre eles; com um só, memória basta
+        backend_name = "sqlite" if settings.worker_count > 1 else "memory"
+    if backend_name == "sqlite":
+        backend = SQLiteCacheBackend(settings.cache_sqlite_path, settings.cache_max_entries, settings.cache_ttl_seconds)
+    elif backend_name == "memory":
+        backend = MemoryCacheBackend(settings.cache_max_entries, settings.cache_ttl_seconds)
+    else:
+        backend = NullCacheBackend()
+    return ResultCache(backend)
+
+
+result_cache = build_result_cache()
@@ -0,0 +1,89 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from app.config.settings import settings
+
+
+class SharedStateStore:
+    """Chave-valor em SQLite (WAL) para estado quente compartilhado entre os workers do mesmo host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_state (key TEXT PRIMARY KEY, value TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection().execute("SELECT value FROM shared_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO shared_state (key, value, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time())
+            )
+
+    def items(self, prefix: str) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT key, value FROM shared_state WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def fold(self, target: str, sources: Sequence[str], merge: Callable[[Optional[Any], List[Any]], Any]) -> None:
+        """Grava ``merge(target, sources)`` em ``target`` e apaga ``sources`` na mesma transação: nenhum leitor
+        (nem outro worker fazendo o mesmo) vê os valores das fontes contados duas vezes ou nenhuma."""
+        keys = [target, *sources]
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                values = {
+                    key: json.loads(value) for key, value in conn.execute(
+                        f"SELECT key, value FROM shared_state WHERE key IN ({','.join('?' * len(keys))})", keys
+                    )
+                }
+                present = [values[key] for key in sources if key in values]
+                if present:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO shared_state (key, value, updated_at) VALUES (?, ?, ?)",
+                        (target, json.dumps(merge(values.get(target), present)), time.time())
+                    )
+                    conn.executemany("DELETE FROM shared_state WHERE key = ?", [(key,) for key in sources])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def build_shared_state() -> Optional[SharedStateStore]:
+    if not settings.shared_state_enabled:
+        return None
+    return SharedStateStore(settings.shared_state_path)
+
+
+shared_state = build_shared_state()
@@ -1,8 +1,48 @@
 import re
-from typing import List
+from typing import List, Optional
+from app.config.settings import settings
+
+# Compiladas uma vez; cada substituição só roda se o texto tem o caractere que ela procura (uma alternação
+# única das quatro fica mais lenta no re do CPython, que perde a busca pelo prefixo literal)
+_TAG = re.compile(r"<[^>]+>")
+_URL = re.compile(r"http[s]?://\S+")
+_EMAIL = re.compile(r"\S+@\S+")
+_SEPARATOR = re.compile(r"[-=_]{3,}")
+_SPACES = re.compile(r"[ \t]{2,}|\t")
+_WORD = re.compile(r"\S+")
+_SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+# Classificação de cada linha na varredura do email (já sem separadores: "-----Original Message-----"
+# chega como "Original Message")
+_LINE = re.compile(
+    r"(?P<quoted>>)"
+    r"|(?P<reply>.*\b(?:escreveu|wrote)\s*:$|(?:mensagem original|original message)$)"
+    r"|(?P<forward>(?:mensagem encaminhada|forwarded message|in[íi]cio da mensagem encaminhada:?|begin forwarded message:?)$)"
+    r"|(?P<header>(?:de|from|para|to|cc|cco|bcc|data|date|enviad[ao](?: em)?|sent|assunto|subject|responder a|reply-to)\s*:)"
+    r"|(?P<signature>--$)"
+    r"|(?P<mobile>(?:enviado|sent) (?:do|de|from|via|pelo|pela) (?:meu |minha |my )?(?:iphone|ipad|android|samsung"
+    r"|galaxy|celular|smartphone|dispositivo|mobile|outlook|gmail|yahoo)\b.{0,30}$)"
+    # Avisos legais no início da linha e com a redação típica: "destinada" só conta como "destinada
+    # exclusivamente/somente/apenas", para não cortar frases como "esta mensagem é destinada a confirmar..."
+    r"|(?P<footer>aviso legal|aviso de confidencialidade|disclaimer|confidentiality notice|antes de imprimir"
+    r"|(?:esta|essa) (?:mensagem|comunica[çc][ãa]o|e-?mail)\b.{0,80}\b(?:confidencia|privilegiad|sigilos|uso exclusivo"
+    r"|destinad[ao]s? (?:exclusiva|unicamente|somente|apenas))"
+    r"|this (?:e-?mail|message)\b.{0,80}\b(?:confidential|privileged"
+    r"|intended (?:solely|only|exclusively|for the (?:named |intended )?(?:addressee|recipient|use))))"
+    r"|(?P<closing>(?:atenciosamente|att|cordialmente|abs|abra[çc]os?|sauda[çc][õo]es|grat[oa]"
+    r"|best regards|regards|kind regards|sincerely)\b[ ,.!]*$)",
+    re.IGNORECASE,
+)
+_REPLY_LEAD = re.compile(r"(?:em|on)\b.*\d", re.IGNORECASE)
+# Depois de "Atenciosamente", até este número de linhas curtas e sem pergunta é tratado como assinatura
+# (nome, cargo, telefone)
+SIGNATURE_MAX_LINES = 6
+SIGNATURE_MAX_WORDS = 8
+
 
 class TextProcessor:
-    def __init__(self):
+    def __init__(self, token_budget: Optional[int] = None):
+        self.token_budget = settings.text_token_budget if token_budget is None else token_budget
         self.stop_words_pt = {
             'a', 'ao', 'aos', 'aquela', 'aquelas', 'aquele', 'aqueles', 'aquilo',
             'as', 'até', 'com', 'como', 'da', 'das', 'de', 'dela', 'delas', 'dele',
@@ -19,21 +59,120 @@ class TextProcessor:
 
     def preprocess(self, text: str) -> str:
         text = self._clean_text(text)
-        text = self._normalize_whitespace(text)
-        return text
+        cleaned = self._clean_lines(text, strip=True)
+        if not cleaned:
+            # Email só com histórico citado ou assinatura: melhor classificar o que há do que nada
+            cleaned = self._clean_lines(text, strip=False)
+        return self.truncate(cleaned, self.token_budget, tail_tokens=self.token_budget // 4)
 
     def _clean_text(self, text: str) -> str:
-        text = re.sub(r'<[^>]+>', '', text)
-        text = re.sub(r'http[s]?://\S+', '', text)
-        text = re.sub(r'\S+@\S+', '[EMAIL]', text)
-        text = re.sub(r'[-=_]{3,}', '', text)
-        return text
-
-    def _normalize_whitespace(self, text: str) -> str:
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        text = re.sub(r'[ \t]+', ' ', text)
-        text = '\n'.join(line.strip() for line in text.split('\n'))
-        return text.strip()
+        if "<" in text:
+            text = _TAG.sub("", text)
+        if "http" in text:
+            text = _URL.sub("", text)
+        if "@" in text:
+            text = _EMAIL.sub("[EMAIL]", text)
+        text = _SEPARATOR.sub("", text)
+        return _SPACES.sub(" ", text)
+
+    def _clean_lines(self, text: str, strip: bool) -> str:
+        """Uma varredura pelas linhas: descarta citações (``>``), o histórico depois de "Fulano escreveu:",
+        "Original Message" ou de um bloco "De:/Enviado:", cabeçalhos de mensagens encaminhadas, assinaturas e
+        avisos legais e normaliza os espaços."""
+        kept: List[str] = []
+        closing_at: Optional[int] = None
+        forwarded = False
+        pending_from: Optional[str] = None
+        for line in text.split("\n"):
+            line = line.strip()
+            if not line:
+                if kept and kept[-1]:
+                    kept.append("")
+                continue
+            kind = None
+            if strip:
+                match = _LINE.match(line)
+                kind = match.lastgroup if match else None
+            if forwarded:
+                forwarded = kind == "header"
+                if forwarded:
+                    continue
+            if pending_from is not None:
+                if kind == "header":
+                    # "De:" seguido de outro cabeçalho: início do histórico citado pelo Outlook
+                    break
+                kept.append(pending_from)
+                pending_from = None
+            if kind == "header" and line.lower().startswith(("de:", "from:")):
+                pending_from = line
+                continue
+            if kind in ("quoted", "mobile"):
+                continue
+            if kind == "forward":
+                forwarded = True
+                continue
+            if kind == "reply":
+                if kept and not kept[-1]:
+                    kept.pop()
+                if kept and _REPLY_LEAD.match(kept[-1]) and not _REPLY_LEAD.match(line):
+                    # "Em seg., 12 de mar. de 2024, Fulano" quebrado antes de "escreveu:"
+                    kept.pop()
+                break
+            if kind in ("signature", "footer"):
+                break
+            if kind == "closing":
+                closing_at = len(kept)
+            kept.append(line)
+        else:
+            if pending_from is not None:
+                kept.append(pending_from)
+        if closing_at is not None:
+            tail = [line for line in kept[closing_at + 1:] if line]
+            if len(tail) <= SIGNATURE_MAX_LINES and all(
+                "?" not in line and len(line.split()) <= SIGNATURE_MAX_WORDS for line in tail
+            ):
+                del kept[closing_at + 1:]
+        return "\n".join(kept).strip()
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens aproximados como palavras separadas por espaço, sem depender do tokenizador do modelo."""
+        return len(text.split())
+
+    def truncate(self, text: str, max_tokens: int, tail_tokens: int = 0) -> str:
+        """Limita o texto a ``max_tokens`` palavras: o começo e, com ``tail_tokens``, também as últimas palavras,
+        onde costuma ficar o pedido de documentos longos."""
+        if max_tokens <= 0 or self.count_tokens(text) <= max_tokens:
+            return text
+        tail_tokens = min(tail_tokens, max_tokens - 1)
+        for count, match in enumerate(_WORD.finditer(text), 1):
+            if count == max_tokens - tail_tokens:
+                head = text[:match.end()]
+                break
+        if not tail_tokens:
+            return head + " [...]"
+        rest = text.rsplit(None, tail_tokens)
+        return head + "\n[...]\n" + text[text.index(rest[1], len(rest[0])):]
+
+    def split_chunks(self, text: str, max_tokens: int) -> List[str]:
+        """Divide o texto em trechos de até ``max_tokens`` palavras, quebrando por parágrafo, depois por
+        frase e, em último caso, no meio da frase."""
+        if max_tokens <= 0 or self.count_tokens(text) <= max_tokens:
+            return [text]
+        pieces: List[List[str]] = []
+        for paragraph in text.split("\n\n"):
+            for sentence in _SENTENCE.split(paragraph):
+                words = sentence.split()
+                pieces.extend(words[i:i + max_tokens] for i in range(0, len(words), max_tokens))
+        chunks: List[str] = []
+        current: List[str] = []
+        for words in pieces:
+            if current and len(current) + len(words) > max_tokens:
+                chunks.append(" ".join(current))
+                current = []
+            current.extend(words)
+        if current:
+            chunks.append(" ".join(current))
+        return chunks
 
     def remove_stop_words(self, text: str) -> str:
         words = text.lower().split()
@@ -0,0 +1,103 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+from app.config.settings import settings
+from app.utils.metrics import registry
+
+stage_seconds = registry.histogram(
+    "sortmailbox_stage_seconds",
+    "Duração de cada etapa do processamento (leitura do upload, extração de PDF, pré-processamento, chamadas ao modelo...)",
+    ("stage",),
+)
+request_seconds = registry.histogram(
+    "sortmailbox_http_request_seconds",
+    "Duração das requisições HTTP por método, rota e status",
+    ("method", "route", "status"),
+)
+
+_timings: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("sortmailbox_timings", default=None)
+
+
+def add_timing(stage: str, seconds: float) -> None:
+    """Anexa a duração de uma etapa ao Server-Timing da requisição atual, sem registrar no histograma."""
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_seconds.observe(elapsed, stage=stage)
+        add_timing(stage, elapsed)
+
+
+def server_timing_header(timings: List[Tuple[str, float]], total: float) -> str:
+    # Etapas repetidas (lotes, várias chamadas ao upstream) são somadas; a descrição traz quantas vezes ocorreram
+    merged: Dict[str, List[float]] = {}
+    for stage, seconds in timings:
+        entry = merged.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    parts = [
+        f'{stage};dur={seconds * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+        for stage, (seconds, count) in merged.items()
+    ]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+def _route_template(scope) -> str:
+    # A rota casada traz o caminho sem o prefixo do include_router; o prefixo vem do início do caminho real
+    route_path = getattr(scope.get("route"), "path", None)
+    if route_path is None:
+        return "unmatched"
+    segments = scope["path"].rstrip("/").split("/")
+    extra = len(segments) - len(route_path.rstrip("/").split("/"))
+    return ("/".join(segments[:extra + 1]) if extra > 0 else "") + route_path
+
+
+class ServerTimingMiddleware:
+    """Mede cada requisição HTTP e devolve as etapas medidas até o início da resposta no cabeçalho Server-Timing.
+
+    Middleware ASGI puro, para não acumular o corpo de respostas em streaming."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings: List[Tuple[str, float]] = []
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.server_timing_enabled:
+                    headers = list(message.get("headers", []))
+                    value = server_timing_header(timings, time.perf_counter() - started)
+                    headers.append((b"server-timing", value.encode("latin-1")))
+                    headers.append((b"timing-allow-origin", ", ".join(settings.cors_origins_list).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            request_seconds.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=_route_template(scope),
+                status=status,
+            )
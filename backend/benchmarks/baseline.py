@@ -0,0 +1,48 @@
+"""Baselines dos micro-benchmarks: ``--save`` grava o resultado e ``--compare`` mostra a variação contra um gravado.
+
+Cada benchmark grava em benchmarks/baselines/<benchmark>-NOME.json, separado das baselines do load_test.
+"""
+import argparse
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+
+
+def _path(benchmark: str, name: str) -> str:
+    return os.path.join(BASELINE_DIR, f"{benchmark}-{name}.json")
+
+
+def add_arguments(parser: argparse.ArgumentParser, benchmark: str) -> None:
+    parser.add_argument("--save", metavar="NOME", help=f"grava o resultado em benchmarks/baselines/{benchmark}-NOME.json")
+    parser.add_argument("--compare", metavar="NOME", help=f"compara com benchmarks/baselines/{benchmark}-NOME.json")
+
+
+def load(benchmark: str, name: Optional[str]) -> Dict[str, Dict[str, Any]]:
+    """Resultados da baseline ``name``, indexados por ``key``; vazio sem ``--compare``."""
+    if not name:
+        return {}
+    with open(_path(benchmark, name), encoding="utf-8") as handle:
+        return {result["key"]: result for result in json.load(handle)["results"]}
+
+
+def save(benchmark: str, name: str, results: List[Dict[str, Any]], **parameters) -> str:
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = _path(benchmark, name)
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump({
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "parameters": parameters,
+            "results": results,
+        }, handle, indent=2, ensure_ascii=False)
+    return path
+
+
+def delta(baseline: Dict[str, Dict[str, Any]], result: Dict[str, Any], field: str) -> str:
+    """Variação de ``field`` em relação à baseline (negativa = mais rápido), ou vazio se não houver."""
+    previous = baseline.get(result["key"])
+    if not previous or not previous.get(field):
+        return ""
+    return f"{(result[field] - previous[field]) / previous[field]:+.1%}"
@@ -0,0 +1,53 @@
+"""Micro-benchmark das heurísticas de palavras-chave sobre emails de tamanhos variados.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_heuristics
+
+O cache de varreduras do HEURISTIC_MATCHER é limpo antes de cada email, para medir a varredura a frio.
+O caso "pipeline" aplica todas as regras ao mesmo texto, como acontece no fallback do serviço.
+"""
+import time
+from collections import defaultdict
+from app.services.ai_service import AIService
+from app.utils.classification_helpers import HEURISTIC_MATCHER, has_question, fallback_has_question, is_courtesy_only
+from benchmarks.corpus import build_corpus
+
+
+def _time_per_call(func, texts, repeat: int) -> float:
+    clear_cache = HEURISTIC_MATCHER.scan.cache_clear
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            clear_cache()
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(texts))
+
+
+def main(repeat: int = 20) -> None:
+    ai_service = AIService()
+    by_size = defaultdict(list)
+    for size, text in build_corpus():
+        by_size[size].append(text)
+
+    def pipeline(text: str) -> None:
+        text_lower = text.lower()
+        is_courtesy_only(text)
+        has_question(text_lower)
+        ai_service._fallback_classification(text)
+
+    cases = [
+        ("is_courtesy_only", is_courtesy_only),
+        ("_fallback_classification", ai_service._fallback_classification),
+        ("has_question", lambda text: has_question(text.lower())),
+        ("fallback_has_question", lambda text: fallback_has_question(text.lower())),
+        ("pipeline", pipeline),
+    ]
+    print(f"{'função':<28}{'chars':>8}{'µs/chamada':>14}")
+    for name, func in cases:
+        for size, texts in sorted(by_size.items()):
+            runs = max(1, repeat * 2000 // size)
+            print(f"{name:<28}{size:>8}{_time_per_call(func, texts, runs) * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
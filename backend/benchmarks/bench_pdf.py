@@ -0,0 +1,57 @@
+"""Micro-benchmark da extração de texto de PDF (extract_pdf_text) por número de páginas.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_pdf
+    python -m benchmarks.bench_pdf --pages 1 --pages 500 --repeat 5
+
+    # grava o resultado como baseline e compara execuções posteriores com ele
+    python -m benchmarks.bench_pdf --save main
+    python -m benchmarks.bench_pdf --compare main
+
+Os PDFs são gerados a partir do corpus de emails (benchmarks/corpus.py), sem arquivos externos. A extração roda
+no próprio processo, sem o pool do PdfExtractor, para medir só o custo do PyPDF2 e dos limites.
+"""
+import argparse
+import random
+import time
+from app.config.settings import settings
+from app.utils.pdf_extractor import extract_pdf_text
+from benchmarks import baseline
+from benchmarks.corpus import build_email, build_pdf
+
+BENCHMARK = "pdf"
+PAGE_COUNTS = (1, 10, 50, 200)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, action="append", help=f"pode ser repetido; padrão: {PAGE_COUNTS}")
+    parser.add_argument("--repeat", type=int, default=3, help="execuções por PDF; vale a mais rápida")
+    baseline.add_arguments(parser, BENCHMARK)
+    args = parser.parse_args(argv)
+
+    previous = baseline.load(BENCHMARK, args.compare)
+    rng = random.Random(42)
+    results = []
+    print(f"{'páginas':>8}{'KB':>8}{'ms/PDF':>10}{'ms/página':>12}{'chars':>9}{'vs baseline':>14}  parada")
+    for pages in args.pages or PAGE_COUNTS:
+        content = build_pdf([build_email(rng, 3000, productive=i % 2 == 0) for i in range(pages)])
+        extract_args = (content, settings.pdf_max_pages, settings.pdf_max_chars, settings.pdf_time_limit_seconds)
+        best = float("inf")
+        for _ in range(max(args.repeat, 1)):
+            start = time.perf_counter()
+            text, durations, stopped_by = extract_pdf_text(*extract_args)
+            best = min(best, time.perf_counter() - start)
+        per_page = best / max(len(durations), 1)
+        result = {"key": f"pdf:{pages}", "pages": pages, "ms_per_pdf": best * 1e3, "ms_per_page": per_page * 1e3}
+        results.append(result)
+        print(
+            f"{pages:>8}{len(content) // 1024:>8}{best * 1e3:>10.1f}{per_page * 1e3:>12.2f}{len(text):>9}"
+            f"{baseline.delta(previous, result, 'ms_per_pdf'):>14}  {stopped_by}"
+        )
+    if args.save:
+        print(f"baseline gravada em {baseline.save(BENCHMARK, args.save, results, repeat=args.repeat)}")
+
+
+if __name__ == "__main__":
+    main()
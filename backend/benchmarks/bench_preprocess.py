@@ -0,0 +1,57 @@
+"""Micro-benchmark de TextProcessor.preprocess sobre emails de tamanhos variados.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_preprocess
+    python -m benchmarks.bench_preprocess --repeat 50
+
+    # grava o resultado como baseline e compara execuções posteriores com ele
+    python -m benchmarks.bench_preprocess --save main
+    python -m benchmarks.bench_preprocess --compare main
+"""
+import argparse
+import time
+from collections import defaultdict
+from app.utils.text_processor import TextProcessor
+from benchmarks import baseline
+from benchmarks.corpus import build_corpus
+
+BENCHMARK = "preprocess"
+
+
+def _time_per_call(func, texts, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(texts))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="escala o número de chamadas medidas por tamanho")
+    baseline.add_arguments(parser, BENCHMARK)
+    args = parser.parse_args(argv)
+
+    previous = baseline.load(BENCHMARK, args.compare)
+    text_processor = TextProcessor()
+    by_size = defaultdict(list)
+    for size, text in build_corpus():
+        by_size[size].append(text)
+    results = []
+    print(f"{'função':<28}{'chars':>8}{'µs/chamada':>14}{'MB/s':>10}{'vs baseline':>14}")
+    for size, texts in sorted(by_size.items()):
+        runs = max(1, args.repeat * 2000 // size)
+        seconds = _time_per_call(text_processor.preprocess, texts, runs)
+        chars = sum(len(text) for text in texts) / len(texts)
+        result = {"key": f"preprocess:{size}", "chars": size, "us_per_call": seconds * 1e6, "mb_per_s": chars / seconds / 1e6}
+        results.append(result)
+        print(
+            f"{'preprocess':<28}{size:>8}{result['us_per_call']:>14.1f}{result['mb_per_s']:>10.1f}"
+            f"{baseline.delta(previous, result, 'us_per_call'):>14}"
+        )
+    if args.save:
+        print(f"baseline gravada em {baseline.save(BENCHMARK, args.save, results, repeat=args.repeat)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Gerador determinístico de emails realistas em português para benchmarks."""
+import random
+from typing import List, Tuple
+
+PRODUCTIVE_OPENINGS = [
+    "Prezada equipe de suporte,\n\nEstou enfrentando um problema no sistema de gestão financeira desde ontem.",
+    "Olá, gostaria de saber o status da minha solicitação #{ticket}.",
+    "Bom dia,\n\nPoderiam me informar qual o prazo para liberação do resgate do fundo?",
+    "Prezados,\n\nSolicito o envio do informe de rendimentos referente ao exercício de {year}.",
+    "Boa tarde,\n\nTenho uma dúvida sobre a cobrança duplicada que apareceu no meu extrato.",
+    "Olá,\n\nPreciso que encaminhem o contrato assinado para o e-mail cadastrado.",
+]
+COURTESY_OPENINGS = [
+    "Olá queridos colegas!\n\nPassando para desejar a todos um Feliz Natal repleto de paz e alegria!",
+    "Prezados,\n\nSó para agradecer o excelente atendimento de ontem. Vocês foram excelentes!",
+    "Boa tarde,\n\nApenas para desejar boas festas e um próspero ano novo a toda a equipe.",
+    "Olá!\n\nParabéns pelo aniversário da empresa. Votos de muito sucesso!",
+]
+FILLER_PARAGRAPHS = [
+    "Segue em anexo o relatório de análise financeira referente ao trimestre, conforme combinado na reunião anterior.",
+    "Os valores foram conferidos e estão de acordo com a política interna da empresa e com o contrato vigente.",
+    "Extrato consolidado: saldo anterior R$ {amount}, créditos R$ {amount}, débitos R$ {amount}, saldo final R$ {amount}.",
+    "Data de movimentação {day}/{month}/{year} - lançamento {ticket} - transferência entre contas - valor R$ {amount}.",
+    "Esta mensagem pode conter informações confidenciais e é destinada exclusivamente ao destinatário indicado.",
+    "Favor desconsiderar versões anteriores deste documento, que foram enviadas com dados incompletos.",
+    "A rentabilidade acumulada da carteira no período ficou em linha com o índice de referência.",
+]
+CLOSINGS = [
+    "\n\nAtenciosamente,\nMaria Silva\nDepartamento Financeiro\nTel: (11) 99999-8888",
+    "\n\nUm grande abraço,\nJoão Santos",
+    "\n\nObrigado,\nCarlos Pereira",
+]
+
+
+def _fill(template: str, rng: random.Random) -> str:
+    return template.format(
+        ticket=rng.randint(10000, 99999),
+        year=rng.choice([2023, 2024, 2025]),
+        day=rng.randint(1, 28),
+        month=rng.randint(1, 12),
+        amount=f"{rng.randint(100, 99999)},{rng.randint(0, 99):02d}",
+    )
+
+
+def build_email(rng: random.Random, target_chars: int, productive: bool) -> str:
+    opening = rng.choice(PRODUCTIVE_OPENINGS if productive else COURTESY_OPENINGS)
+    parts = [_fill(opening, rng)]
+    size = len(parts[0])
+    while size < target_chars:
+        paragraph = _fill(rng.choice(FILLER_PARAGRAPHS), rng)
+        parts.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(parts) + rng.choice(CLOSINGS)
+
+
+def build_corpus(sizes: Tuple[int, ...] = (300, 2000, 20000, 100000), per_size: int = 20, seed: int = 42) -> List[Tuple[int, str]]:
+    """Retorna pares (tamanho-alvo, texto), metade produtivos e metade de cortesia para cada tamanho."""
+    rng = random.Random(seed)
+    corpus = []
+    for size in sizes:
+        for i in range(per_size):
+            corpus.append((size, build_email(rng, size, productive=i % 2 == 0)))
+    return corpus
+
+
+def _pdf_string(line: str) -> str:
+    escaped = []
+    for byte in line.encode("cp1252", errors="replace"):
+        char = chr(byte)
+        if char in "()\\":
+            escaped.append("\\" + char)
+        elif 32 <= byte < 127:
+            escaped.append(char)
+        else:
+            escaped.append(f"\\{byte:03o}")
+    return "(" + "".join(escaped) + ")"
+
+
+def _wrap(text: str, width: int = 90) -> List[str]:
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            if line and len(line) + len(word) + 1 > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+    return lines
+
+
+def build_pdf(pages: List[str]) -> bytes:
+    """Monta um PDF de texto simples (Helvetica, WinAnsi), uma página por item de ``pages``."""
+    font_id = 3
+    objects = {
+        1: "<< /Type /Catalog /Pages 2 0 R >>",
+        font_id: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    page_ids = []
+    next_id = font_id + 1
+    for text in pages:
+        lines = _wrap(text)[:60]
+        stream = "BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"{_pdf_string(line)} Tj T*" for line in lines) + " ET"
+        page_id, content_id = next_id, next_id + 1
+        next_id += 2
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        objects[content_id] = f"<< /Length {len(stream.encode('latin-1'))} >>\nstream\n{stream}\nendstream"
+        page_ids.append(page_id)
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(output)
+        output += f"{object_id} 0 obj\n{objects[object_id]}\nendobj\n".encode("latin-1")
+    xref_at = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    for object_id in sorted(objects):
+        output += f"{offsets[object_id]:010d} 00000 n \n".encode("latin-1")
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode("latin-1")
+    return bytes(output)
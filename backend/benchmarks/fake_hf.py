@@ -0,0 +1,115 @@
+"""Servidor local que imita o router de inferência do Hugging Face, para testes de carga sem custo nem cota.
+
+Uso (a partir de backend/):
+    python -m benchmarks.fake_hf --port 8090 --latency 0.3 --jitter 0.1 --cold-start 5 --error-rate 0.02
+
+Aponte o backend para ele com HUGGINGFACE_API_URL=http://127.0.0.1:8090/models e qualquer HUGGINGFACE_API_KEY.
+
+- Zero-shot (payload com ``candidate_labels``, texto único ou lista) devolve labels/scores no formato do router.
+- Geração devolve ``[{"generated_text": ...}]`` ou, com ``"stream": true``, eventos ``data:`` token a token.
+- Durante os primeiros ``--cold-start`` segundos responde 503 com ``estimated_time``, como um modelo carregando.
+- ``--error-rate`` é a fração de respostas 500/503 aleatórias depois do cold start.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+ACTION_LABEL = "requer ação ou resposta: pergunta, solicitação, pedido de informação ou documento"
+COURTESY_LABEL = "apenas cortesia: cumprimentos, agradecimento sem solicitação"
+COURTESY_WORDS = ("obrigad", "agradeç", "parabéns", "feliz", "boas festas", "votos")
+GENERATED_TEXT = (
+    "Prezado(a), agradecemos o seu contato. Recebemos sua mensagem e ela já foi encaminhada "
+    "para a equipe responsável, que retornará em breve com mais informações. Atenciosamente, Equipe de Atendimento"
+)
+
+
+class FakeInference:
+    def __init__(self, latency: float, jitter: float, token_latency: float, cold_start: float, error_rate: float, seed: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_latency = token_latency
+        self.cold_start = cold_start
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.started_at = time.monotonic()
+        self.counts = {"requests": 0, "cold_start": 0, "errors": 0}
+
+    async def _delay(self) -> None:
+        await asyncio.sleep(max(0.0, self.rng.gauss(self.latency, self.jitter)))
+
+    def _failure(self):
+        remaining = self.cold_start - (time.monotonic() - self.started_at)
+        if remaining > 0:
+            self.counts["cold_start"] += 1
+            return JSONResponse({"error": "Model is currently loading", "estimated_time": round(remaining, 1)}, status_code=503)
+        if self.rng.random() < self.error_rate:
+            self.counts["errors"] += 1
+            status = self.rng.choice((500, 503))
+            return JSONResponse({"error": "Internal error" if status == 500 else "Service unavailable"}, status_code=status)
+        return None
+
+    def _zero_shot(self, text: str) -> dict:
+        courtesy = any(word in text.lower() for word in COURTESY_WORDS) and "?" not in text
+        score = round(self.rng.uniform(0.7, 0.98), 4)
+        labels = [COURTESY_LABEL, ACTION_LABEL] if courtesy else [ACTION_LABEL, COURTESY_LABEL]
+        return {"sequence": text[:100], "labels": labels, "scores": [score, round(1 - score, 4)]}
+
+    async def _stream_tokens(self):
+        for index, word in enumerate(GENERATED_TEXT.split(" ")):
+            await asyncio.sleep(self.token_latency)
+            event = {"index": index, "token": {"id": index, "text": (" " if index else "") + word, "special": False}}
+            yield f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+        yield f"data: {json.dumps({'token': {'text': '</s>', 'special': True}, 'generated_text': GENERATED_TEXT})}\n\n"
+
+    async def handle(self, request: Request):
+        self.counts["requests"] += 1
+        payload = await request.json()
+        await self._delay()
+        failure = self._failure()
+        if failure is not None:
+            return failure
+        if "candidate_labels" in payload.get("parameters", {}):
+            inputs = payload["inputs"]
+            if isinstance(inputs, list):
+                return JSONResponse([self._zero_shot(text) for text in inputs])
+            return JSONResponse(self._zero_shot(inputs))
+        if payload.get("stream"):
+            return StreamingResponse(self._stream_tokens(), media_type="text/event-stream")
+        return JSONResponse([{"generated_text": GENERATED_TEXT}])
+
+    async def stats(self, request: Request):
+        return JSONResponse(self.counts)
+
+
+def build_app(fake: FakeInference) -> Starlette:
+    return Starlette(routes=[
+        Route("/stats", fake.stats),
+        Route("/models/{model:path}", fake.handle, methods=["POST"]),
+    ])
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.3, help="latência média (s) de cada resposta")
+    parser.add_argument("--jitter", type=float, default=0.1, help="desvio padrão (s) da latência")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="intervalo (s) entre tokens no modo stream")
+    parser.add_argument("--cold-start", type=float, default=0.0, help="segundos iniciais respondendo 503 com estimated_time")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fração de respostas 500/503 aleatórias")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    fake = FakeInference(args.latency, args.jitter, args.token_latency, args.cold_start, args.error_rate, args.seed)
+    uvicorn.run(build_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
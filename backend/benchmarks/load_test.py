@@ -0,0 +1,260 @@
+"""Teste de carga ponta a ponta dos endpoints de classificação.
+
+Uso (a partir de backend/):
+    # sobe o servidor falso do Hugging Face e a API em portas locais, roda e derruba os dois
+    python -m benchmarks.load_test --spawn --scenario classify --scenario upload --requests 500 --concurrency 32
+
+    # contra uma API já em execução (apontada para benchmarks.fake_hf ou para o Hugging Face)
+    python -m benchmarks.load_test --target http://localhost:8000 --scenario batch
+
+    # grava o resultado como baseline e compara execuções posteriores com ele
+    python -m benchmarks.load_test --spawn --save main
+    python -m benchmarks.load_test --spawn --compare main
+
+Cenários: classify (JSON em /classify), upload (.txt em /classify/upload), upload_pdf (.pdf em /classify/upload)
+e batch (/classify/batch). Cada requisição recebe um texto único para não medir o cache de resultados. Como o
+corpus vem de poucos modelos de email, os textos são quase idênticos entre si: com --spawn a API sobe sem o tier
+near_duplicate (CASCADE_TIERS) para não medir o reaproveitamento; com --target, desligue-o no servidor alvo.
+Relata vazão, latência p50/p95/p99 e contagem por status HTTP. Baselines ficam em benchmarks/baselines/.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Tuple
+import httpx
+from benchmarks.corpus import build_corpus, build_email, build_pdf
+
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), "baselines")
+SCENARIOS = ("classify", "upload", "upload_pdf", "batch")
+REPORTED = ("throughput", "p50", "p95", "p99", "error_rate")
+SPAWN_CASCADE_TIERS = "subject,heuristics,local_model,remote"
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+class RequestFactory:
+    """Gera as requisições de cada cenário a partir do corpus, com um marcador único por requisição."""
+
+    def __init__(self, batch_size: int, seed: int = 7):
+        self.texts = [text for size, text in build_corpus(sizes=(300, 2000, 8000), per_size=20)]
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+        self.counter = 0
+
+    def _text(self) -> str:
+        self.counter += 1
+        return f"{self.rng.choice(self.texts)}\n\nRef. interna {self.counter}"
+
+    def build(self, scenario: str) -> Tuple[str, Dict[str, Any]]:
+        if scenario == "classify":
+            return "/api/v1/classify", {"json": {"content": self._text(), "subject": "Atendimento"}}
+        if scenario == "upload":
+            files = {"file": ("email.txt", self._text().encode("utf-8"), "text/plain")}
+            return "/api/v1/classify/upload", {"files": files}
+        if scenario == "upload_pdf":
+            pages = [build_email(self.rng, 3000, productive=self.rng.random() < 0.5) for _ in range(3)]
+            self.counter += 1
+            pages[0] += f"\nRef. interna {self.counter}"
+            files = {"file": ("email.pdf", build_pdf(pages), "application/pdf")}
+            return "/api/v1/classify/upload", {"files": files}
+        if scenario == "batch":
+            emails = [{"content": self._text()} for _ in range(self.batch_size)]
+            return "/api/v1/classify/batch", {"json": emails}
+        raise ValueError(f"Cenário desconhecido: {scenario}")
+
+
+async def run_scenario(client: httpx.AsyncClient, factory: RequestFactory, scenario: str, requests: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    pending = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in pending:
+            path, kwargs = factory.build(scenario)
+            started = time.perf_counter()
+            try:
+                response = await client.post(path, **kwargs)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    errors = requests - statuses.get("200", 0)
+    return {
+        "scenario": scenario,
+        "requests": requests,
+        "concurrency": concurrency,
+        "duration": round(elapsed, 3),
+        "throughput": round(requests / elapsed, 2),
+        "p50": round(_percentile(latencies, 0.50) * 1000, 1),
+        "p95": round(_percentile(latencies, 0.95) * 1000, 1),
+        "p99": round(_percentile(latencies, 0.99) * 1000, 1),
+        "max": round(latencies[-1] * 1000, 1) if latencies else 0.0,
+        "error_rate": round(errors / requests, 4) if requests else 0.0,
+        "statuses": statuses,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Processo encerrou antes de ficar pronto: {' '.join(process.args)}")
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} não respondeu em {timeout:.0f}s")
+
+
+def spawn_stack(args, workdir: str) -> Tuple[str, List[subprocess.Popen]]:
+    """Sobe benchmarks.fake_hf e a API (uvicorn) em portas livres; devolve a URL da API e os processos."""
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    hf_port, api_port = _free_port(), _free_port()
+    fake = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.fake_hf", "--port", str(hf_port),
+        "--latency", str(args.hf_latency), "--jitter", str(args.hf_jitter),
+        "--cold-start", str(args.hf_cold_start), "--error-rate", str(args.hf_error_rate),
+    ], cwd=backend_dir)
+    env = {
+        **os.environ,
+        "HUGGINGFACE_API_KEY": "benchmark",
+        "HUGGINGFACE_API_URL": f"http://127.0.0.1:{hf_port}/models",
+        "HISTORY_SQLITE_PATH": os.path.join(workdir, "history.sqlite3"),
+        "JOB_STORE_PATH": os.path.join(workdir, "jobs.sqlite3"),
+        "JOB_FILES_PATH": os.path.join(workdir, "files"),
+        "CACHE_BACKEND": "memory",
+        "CASCADE_TIERS": os.environ.get("CASCADE_TIERS", SPAWN_CASCADE_TIERS),
+    }
+    api = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app", "--port", str(api_port), "--log-level", "warning",
+    ], cwd=backend_dir, env=env)
+    processes = [fake, api]
+    try:
+        _wait_ready(f"http://127.0.0.1:{hf_port}/stats", fake)
+        _wait_ready(f"http://127.0.0.1:{api_port}/health", api)
+    except Exception:
+        stop_stack(processes)
+        raise
+    return f"http://127.0.0.1:{api_port}", processes
+
+
+def stop_stack(processes: List[subprocess.Popen]) -> None:
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run(target: str, args) -> List[Dict[str, Any]]:
+    factory = RequestFactory(args.batch_size)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=target, timeout=args.timeout, limits=limits) as client:
+        results = []
+        for scenario in args.scenario or ["classify"]:
+            if args.warmup:
+                await run_scenario(client, factory, scenario, args.warmup, min(args.concurrency, args.warmup))
+            results.append(await run_scenario(client, factory, scenario, args.requests, args.concurrency))
+        return results
+
+
+def print_results(results: List[Dict[str, Any]], baseline: Dict[str, Dict[str, Any]] = None) -> None:
+    print(f"{'cenário':<12}{'req':>6}{'conc':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'erros':>8}  status")
+    for result in results:
+        print(
+            f"{result['scenario']:<12}{result['requests']:>6}{result['concurrency']:>6}{result['throughput']:>9.1f}"
+            f"{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}{result['error_rate']:>8.1%}"
+            f"  {json.dumps(result['statuses'])}"
+        )
+        previous = (baseline or {}).get(result["scenario"])
+        if previous:
+            deltas = []
+            for key in REPORTED:
+                before, after = previous.get(key, 0), result[key]
+                change = f"{(after - before) / before:+.1%}" if before else f"{after - before:+g}"
+                deltas.append(f"{key} {change}")
+            print(f"{'':<12}vs baseline: " + ", ".join(deltas))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="http://localhost:8000", help="URL da API (ignorada com --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="sobe fake_hf e a API localmente para o teste")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="pode ser repetido; padrão: classify")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10, help="requisições descartadas antes de medir cada cenário")
+    parser.add_argument("--batch-size", type=int, default=20, help="emails por requisição no cenário batch")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--hf-latency", type=float, default=0.3)
+    parser.add_argument("--hf-jitter", type=float, default=0.1)
+    parser.add_argument("--hf-cold-start", type=float, default=0.0)
+    parser.add_argument("--hf-error-rate", type=float, default=0.0)
+    parser.add_argument("--save", metavar="NOME", help="grava o resultado em benchmarks/baselines/NOME.json")
+    parser.add_argument("--compare", metavar="NOME", help="compara com benchmarks/baselines/NOME.json")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), encoding="utf-8") as handle:
+            baseline = {result["scenario"]: result for result in json.load(handle)["results"]}
+
+    processes: List[subprocess.Popen] = []
+    with tempfile.TemporaryDirectory() as workdir:
+        target = args.target
+        if args.spawn:
+            target, processes = spawn_stack(args, workdir)
+        try:
+            results = asyncio.run(run(target, args))
+        finally:
+            stop_stack(processes)
+
+    print_results(results, baseline)
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save}.json")
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump({
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "target": "spawn" if args.spawn else args.target,
+                "fake_hf": {
+                    "latency": args.hf_latency,
+                    "jitter": args.hf_jitter,
+                    "cold_start": args.hf_cold_start,
+                    "error_rate": args.hf_error_rate,
+                } if args.spawn else None,
+                "results": results,
+            }, handle, indent=2, ensure_ascii=False)
+        print(f"baseline gravada em {path}")
+
+
+if __name__ == "__main__":
+    main()
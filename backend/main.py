@@ -1,7 +1,12 @@
 import uvicorn
 from app import create_app
+from app.config.settings import settings
 
 app = create_app()
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    if settings.environment == "production":
+        from server import main
+        main()
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
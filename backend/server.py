@@ -0,0 +1,113 @@
+"""Ponto de entrada de produção: vários workers uvicorn atrás de um processo mestre.
+
+Uso (a partir de backend/):
+    python server.py                      # SERVER_WORKERS workers (0 = um por núcleo)
+    python server.py --workers 4 --port 8000
+
+Com gunicorn instalado (Linux/macOS), a aplicação é importada uma vez no mestre (preload) e os workers são
+criados por fork; sem ele, o próprio uvicorn supervisiona os workers. Em ambos os casos cada worker usa uvloop
+e httptools quando disponíveis, e SIGTERM drena as conexões abertas antes de encerrar.
+"""
+import argparse
+import importlib.util
+import os
+from typing import Any, Dict
+
+# Nada de app.* no topo: a contagem de workers precisa estar no ambiente antes de os singletons serem criados
+
+
+def event_loop_options() -> Dict[str, str]:
+    return {
+        "loop": "uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        "http": "httptools" if importlib.util.find_spec("httptools") else "h11",
+    }
+
+
+def _worker_class() -> str:
+    if importlib.util.find_spec("uvicorn_worker"):
+        return "uvicorn_worker.UvicornWorker"
+    return "uvicorn.workers.UvicornWorker"
+
+
+def _gunicorn_available() -> bool:
+    return os.name != "nt" and importlib.util.find_spec("gunicorn") is not None
+
+
+def _prepare(workers: int) -> None:
+    """Fixa a configuração compartilhada antes de a aplicação ser importada (no mestre ou nos workers)."""
+    os.environ["SERVER_WORKERS"] = str(workers)
+
+
+def run_gunicorn(host: str, port: int, workers: int) -> None:
+    from gunicorn.app.base import BaseApplication
+    from app.config.settings import settings
+
+    loop_options = event_loop_options()
+    options: Dict[str, Any] = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "worker_class": _worker_class(),
+        "preload_app": True,
+        # O worker recebe o tempo de drenar as conexões HTTP e, na sequência, os jobs em execução
+        "graceful_timeout": int(settings.server_graceful_timeout + settings.job_drain_seconds) + 5,
+        "keepalive": int(settings.server_keepalive),
+        "max_requests": settings.server_max_requests,
+        "max_requests_jitter": settings.server_max_requests // 10,
+        "forwarded_allow_ips": "*",
+    }
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from main import app
+            return app
+
+    worker_module = importlib.import_module(_worker_class().rsplit(".", 1)[0])
+    worker_module.UvicornWorker.CONFIG_KWARGS.update(loop_options)
+    Application().run()
+
+
+def run_uvicorn(host: str, port: int, workers: int) -> None:
+    import uvicorn
+    from app.config.settings import settings
+
+    uvicorn.run(
+        "main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=int(settings.server_graceful_timeout),
+        timeout_keep_alive=int(settings.server_keepalive),
+        limit_max_requests=settings.server_max_requests or None,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        **event_loop_options(),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", help="padrão: SERVER_HOST")
+    parser.add_argument("--port", type=int, help="padrão: SERVER_PORT")
+    parser.add_argument("--workers", type=int, help="padrão: SERVER_WORKERS; 0 = um por núcleo")
+    parser.add_argument("--no-gunicorn", action="store_true", help="usa o supervisor do uvicorn mesmo com gunicorn instalado")
+    args = parser.parse_args()
+    if args.workers is not None:
+        os.environ["SERVER_WORKERS"] = str(args.workers)
+    from app.config.settings import settings
+
+    workers = settings.worker_count
+    _prepare(workers)
+    host = args.host or settings.server_host
+    port = args.port or settings.server_port
+    if _gunicorn_available() and not args.no_gunicorn:
+        run_gunicorn(host, port, workers)
+    else:
+        run_uvicorn(host, port, workers)
+
+
+if __name__ == "__main__":
+    main()
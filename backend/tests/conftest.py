@@ -0,0 +1,17 @@
+import os
+import tempfile
+
+# Antes de qualquer import de app.*: os singletons leem settings no import e não podem tocar nos diretórios reais
+_runtime = tempfile.mkdtemp(prefix="sortmailbox-tests-")
+for name, value in {
+    "HUGGINGFACE_API_KEY": "",
+    "CACHE_BACKEND": "memory",
+    "LOCAL_MODEL_ENABLED": "false",
+    "SHARED_STATE": "off",
+    "HISTORY_SQLITE_PATH": os.path.join(_runtime, "history.sqlite3"),
+    "JOB_STORE_PATH": os.path.join(_runtime, "jobs.sqlite3"),
+    "JOB_FILES_PATH": os.path.join(_runtime, "files"),
+    "RESPONSE_STORE_PATH": os.path.join(_runtime, "responses.sqlite3"),
+    "PROFILE_DIR": os.path.join(_runtime, "profiles"),
+}.items():
+    os.environ[name] = value
@@ -0,0 +1,108 @@
+import asyncio
+import time
+import httpx
+import pytest
+from app.services.admission import AdmissionController, UpstreamOverloadedError
+from app.services.resilience import CircuitBreaker, RetryPolicy, call_upstream
+from app.utils.rate_limiter import TokenBucketLimiter
+
+
+def _streaming_client() -> httpx.AsyncClient:
+    async def body():
+        yield b"data: um\n\n"
+        yield b"data: dois\n\n"
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body())))
+
+
+def test_streamed_response_holds_the_slot_until_closed():
+    admission = AdmissionController("test", max_concurrency=1, max_queue=0, latency_target=0)
+    breaker = CircuitBreaker("test", failure_threshold=5, recovery_seconds=30)
+    policy = RetryPolicy(1, 0, 0)
+
+    async def scenario():
+        async with _streaming_client() as client:
+            def send(timeout):
+                return client.send(client.build_request("POST", "http://upstream/model"), stream=True)
+
+            response = await call_upstream(breaker, policy, 5, send, admission, hold_slot=True)
+            assert admission._in_flight == 1
+            with pytest.raises(UpstreamOverloadedError):
+                await call_upstream(breaker, policy, 5, send, admission, hold_slot=True)
+            assert b"".join([chunk async for chunk in response.aiter_bytes()]) == b"data: um\n\ndata: dois\n\n"
+            # Ler o corpo até o fim fecha a resposta e devolve a vaga
+            assert admission._in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_buffered_response_releases_the_slot_on_return():
+    admission = AdmissionController("test", max_concurrency=1, max_queue=0, latency_target=0)
+    breaker = CircuitBreaker("test", failure_threshold=5, recovery_seconds=30)
+
+    async def scenario():
+        async with _streaming_client() as client:
+            response = await call_upstream(
+                breaker, RetryPolicy(1, 0, 0), 5, lambda timeout: client.post("http://upstream/model"), admission
+            )
+            assert response.status_code == 200
+            assert admission._in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_is_shed_and_freed_slot_goes_to_the_oldest_waiter():
+    admission = AdmissionController("test", max_concurrency=1, max_queue=2, latency_target=0)
+    order = []
+
+    async def waiter(name):
+        async with admission.slot():
+            order.append(name)
+
+    async def scenario():
+        release = await admission.acquire()
+        waiters = [asyncio.ensure_future(waiter(name)) for name in ("primeiro", "segundo")]
+        await asyncio.sleep(0)
+        with pytest.raises(UpstreamOverloadedError, match="queue_full"):
+            await admission.acquire()
+        release()
+        await asyncio.gather(*waiters)
+
+    asyncio.run(scenario())
+    assert order == ["primeiro", "segundo"]
+    assert admission.stats()["in_flight"] == 0 and admission.stats()["shed"] == 1
+
+
+def test_slow_upstream_is_shed_by_estimated_and_real_wait():
+    admission = AdmissionController("test", max_concurrency=1, max_queue=10, latency_target=0.05)
+
+    async def scenario():
+        release = await admission.acquire()
+        # Sem histórico de latência a estimativa é zero: a chamada espera e desiste no alvo
+        with pytest.raises(UpstreamOverloadedError, match="timeout"):
+            await admission.acquire()
+        admission._service_time = 1.0
+        with pytest.raises(UpstreamOverloadedError, match="latency"):
+            await admission.acquire()
+        release()
+
+    asyncio.run(scenario())
+    assert admission.stats()["waiting"] == 0 and admission.stats()["in_flight"] == 0
+
+
+def test_token_bucket_allows_bursts_then_refills(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    limiter = TokenBucketLimiter(rate=1.0, burst=3, max_clients=2)
+
+    assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a") == pytest.approx(1.0)
+    now[0] += 0.5
+    assert limiter.acquire("a") == pytest.approx(0.5)
+    now[0] += 0.5
+    assert limiter.acquire("a") == 0.0
+    # Cada cliente tem o seu balde; o menos usado sai quando passa de max_clients e volta cheio
+    assert limiter.acquire("b") == 0.0
+    assert limiter.acquire("c") == 0.0
+    assert limiter.stats()["clients"] == 2
+    assert [limiter.acquire("a") for _ in range(3)] == [0.0, 0.0, 0.0]
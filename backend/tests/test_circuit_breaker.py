@@ -0,0 +1,61 @@
+import time
+import pytest
+from app.config.settings import settings
+from app.services.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from app.utils.shared_state import SharedStateStore
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_opens_after_consecutive_failures_and_probes_once_after_recovery(clock):
+    breaker = CircuitBreaker("test", failure_threshold=3, recovery_seconds=30)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    # Um sucesso no meio zera a contagem: ainda faltam falhas seguidas
+    assert breaker.state == CLOSED and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+
+    clock[0] += 30
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    # Só uma chamada de teste por vez
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_failed_probe_reopens_and_released_probe_frees_the_slot(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_seconds=10)
+    breaker.record_failure()
+    clock[0] += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow()
+    assert breaker.stats()["times_opened"] == 2
+
+
+def test_open_and_close_are_shared_between_workers(clock, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "shared_state_sync_interval", 0)
+    store = SharedStateStore(str(tmp_path / "shared.sqlite3"))
+    first = CircuitBreaker("shared", failure_threshold=1, recovery_seconds=30, store=store)
+    second = CircuitBreaker("shared", failure_threshold=1, recovery_seconds=30, store=store)
+
+    first.record_failure()
+    assert not second.allow() and second.state == OPEN
+
+    clock[0] += 30
+    assert first.allow()
+    first.record_success()
+    assert second.allow() and second.state == CLOSED
+    store.close()
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Any, Dict, List, Optional
+from app.services.ai_service import AIService
+from app.services.classification_cascade import FALLBACK_TIER, CascadeItem, CascadeTier, ClassificationCascade
+
+
+class StubTier(CascadeTier):
+    def __init__(self, name: str, threshold: float, outputs: Dict[str, Optional[Dict[str, Any]]]):
+        super().__init__(threshold)
+        self.name = name
+        self.outputs = outputs
+        self.seen: List[str] = []
+
+    async def evaluate(self, items: List[CascadeItem]) -> List[Optional[Dict[str, Any]]]:
+        self.seen.extend(item.full_content for item in items)
+        return [self.outputs.get(item.full_content) for item in items]
+
+
+class FailingTier(CascadeTier):
+    name = "failing"
+
+    async def evaluate(self, items):
+        raise RuntimeError("upstream fora do ar")
+
+
+def _classify(cascade: ClassificationCascade, contents: List[str]):
+    ai_service = cascade.ai_service
+    items = [CascadeItem("", content, ai_service.text_processor) for content in contents]
+    return asyncio.run(cascade.classify_many(items))
+
+
+def test_each_email_leaves_at_the_first_tier_that_reaches_its_threshold():
+    first = StubTier("first", 0.8, {
+        "exato": {"category": "Produtivo", "confidence": 0.8},
+        "baixo": {"category": "Produtivo", "confidence": 0.79},
+    })
+    last = StubTier("last", 0.99, {
+        "baixo": {"category": "Improdutivo", "confidence": 0.6},
+        "abstem": {"category": "Improdutivo", "confidence": 0.5},
+    })
+    cascade = ClassificationCascade([first, last], AIService())
+
+    decisions = _classify(cascade, ["exato", "baixo", "abstem"])
+
+    assert [(d.category, d.tier) for d in decisions] == [
+        ("Produtivo", "first"), ("Improdutivo", "last"), ("Improdutivo", "last")
+    ]
+    # Quem saiu no primeiro tier não chega ao seguinte; o último decide mesmo abaixo do seu limiar
+    assert last.seen == ["baixo", "abstem"]
+
+
+def test_without_a_deciding_last_tier_uncertain_emails_fall_back():
+    only = StubTier("only", 0.9, {"incerto": {"category": "Produtivo", "confidence": 0.7}})
+    cascade = ClassificationCascade([only], AIService(), last_tier_decides=False)
+
+    decision, = _classify(cascade, ["incerto"])
+
+    assert decision.tier == FALLBACK_TIER
+    assert decision.category in ("Produtivo", "Improdutivo")
+
+
+def test_failing_tier_is_skipped_and_degraded_output_is_marked_as_fallback():
+    last = StubTier("remote", 0.5, {"email": {"category": "Produtivo", "confidence": 0.6, "degraded": True}})
+    cascade = ClassificationCascade([FailingTier(0.5), last], AIService())
+
+    decision, = _classify(cascade, ["email"])
+
+    assert last.seen == ["email"]
+    assert (decision.tier, decision.degraded) == (FALLBACK_TIER, True)
@@ -0,0 +1,72 @@
+import asyncio
+import io
+import pytest
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from app import create_app
+from app.config.settings import settings
+from app.utils.file_processor import FileProcessor, UploadTooLargeError
+
+
+def _upload(filename: str, content: bytes) -> UploadFile:
+    return UploadFile(file=io.BytesIO(content), filename=filename)
+
+
+@pytest.mark.parametrize("content,encoding", [
+    ("Olá, qual o prazo do resgate?".encode("utf-8"), "utf-8"),
+    ("Olá, qual o prazo do resgate?".encode("latin-1"), "latin-1"),
+    # Amostra em UTF-8 e um trecho latin-1 depois dela: o arquivo inteiro passa para latin-1
+    (("ação " * 2000).encode("utf-8") + "São Paulo".encode("latin-1"), "latin-1"),
+    # Sequência UTF-8 cortada entre dois blocos de leitura
+    (b"a" * (4096 - 1) + "çã".encode("utf-8"), "utf-8"),
+])
+def test_cli_and_upload_decode_txt_identically(monkeypatch, content, encoding):
+    monkeypatch.setattr(settings, "upload_chunk_bytes", 4096)
+    processor = FileProcessor()
+
+    from_upload = asyncio.run(processor.extract_content(_upload("email.txt", content)))
+
+    assert processor.extract_bytes("email.txt", content) == from_upload
+    assert from_upload == content.decode(encoding)
+
+
+def test_undeclared_binary_is_rejected_by_both_paths():
+    processor = FileProcessor()
+    content = "Olá".encode("latin-1")
+
+    with pytest.raises(ValueError):
+        asyncio.run(processor.extract_content(_upload("email.bin", content)))
+    with pytest.raises(ValueError):
+        processor.extract_bytes("email.bin", content)
+
+
+def test_upload_is_read_in_chunks_and_stops_at_the_limit(monkeypatch):
+    monkeypatch.setattr(settings, "upload_chunk_bytes", 1024)
+    monkeypatch.setattr(settings, "upload_max_bytes", 4096)
+    processor = FileProcessor()
+    reads = []
+    upload = _upload("email.txt", b"a" * 10_000)
+    original_read = upload.read
+
+    async def read(size=-1):
+        reads.append(size)
+        return await original_read(size)
+
+    monkeypatch.setattr(upload, "read", read)
+
+    # Sem tamanho declarado, o limite vale durante a leitura
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(processor.extract_content(upload))
+    assert reads == [1024] * 5
+
+
+def test_oversized_upload_gets_413(monkeypatch):
+    monkeypatch.setattr(settings, "upload_max_bytes", 1000)
+    client = TestClient(create_app())
+
+    response = client.post(
+        "/api/v1/classify/upload", files={"file": ("email.txt", b"a" * 2000, "text/plain")}
+    )
+
+    assert response.status_code == 413
+    assert "Arquivo muito grande" in response.json()["detail"]
@@ -0,0 +1,84 @@
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from app.controllers.history_controller import _history_item
+from app.repositories.email_repository import EmailRepository
+
+BRT = timezone(timedelta(hours=-3))
+
+
+def _row(created_at: datetime, category: str = "Produtivo", confidence: float = 0.9) -> dict:
+    return {
+        "content": "Qual o prazo do resgate?",
+        "subject": "Resgate",
+        "category": category,
+        "confidence": confidence,
+        "suggested_response": "",
+        "decided_by": "remote",
+        "created_at": created_at,
+    }
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = EmailRepository(f"sqlite:///{tmp_path / 'history.sqlite3'}")
+    yield repository
+    repository.close()
+
+
+def test_history_is_stored_and_served_in_utc(repository):
+    repository.save_many([_row(datetime(2024, 1, 1, 23, 30, tzinfo=BRT))])
+
+    records, _ = repository.find_page(10)
+    item = _history_item(records[0])
+
+    assert records[0].created_at == datetime(2024, 1, 2, 2, 30)
+    assert item.created_at == datetime(2024, 1, 2, 2, 30, tzinfo=timezone.utc)
+    assert '"created_at":"2024-01-02T02:30:00Z"' in item.model_dump_json()
+    assert [a.day for a in repository.find_daily_aggregates()] == [date(2024, 1, 2)]
+
+
+def test_filter_bounds_are_compared_in_utc(repository):
+    repository.save_many([_row(datetime(2024, 1, 2, 2, 30, tzinfo=timezone.utc))])
+
+    assert len(repository.find_page(10, start=datetime(2024, 1, 1, 23, 0, tzinfo=BRT))[0]) == 1
+    assert len(repository.find_page(10, start=datetime(2024, 1, 2, 3, 0))[0]) == 0
+    assert len(repository.find_page(10, end=datetime(2024, 1, 1, 23, 0, tzinfo=BRT))[0]) == 0
+
+
+def test_keyset_pages_cover_every_row_once_including_timestamp_ties(repository):
+    base = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+    # Três pares com o mesmo created_at: o id desempata o cursor
+    repository.save_many([_row(base + timedelta(minutes=i // 2)) for i in range(6)])
+
+    seen, before = [], None
+    while True:
+        records, before = repository.find_page(4, before=before)
+        seen.extend(record.id for record in records)
+        if before is None:
+            break
+
+    assert seen == [6, 5, 4, 3, 2, 1]
+    records, _ = repository.find_page(10, category="Improdutivo")
+    assert records == []
+
+
+def test_daily_aggregates_follow_saves_and_deletes(repository):
+    day = datetime(2024, 3, 1, 12, 0, tzinfo=timezone.utc)
+    repository.save_many([
+        _row(day, "Produtivo", 0.9),
+        _row(day, "Produtivo", 0.7),
+        _row(day, "Improdutivo", 0.6),
+        _row(day + timedelta(days=1), "Produtivo", 0.8),
+    ])
+
+    aggregates = {(a.day, a.category): (a.count, round(a.confidence_sum, 6)) for a in repository.find_daily_aggregates()}
+    assert aggregates == {
+        (date(2024, 3, 1), "Improdutivo"): (1, 0.6),
+        (date(2024, 3, 1), "Produtivo"): (2, 1.6),
+        (date(2024, 3, 2), "Produtivo"): (1, 0.8),
+    }
+
+    assert repository.delete(3)
+    remaining = repository.find_daily_aggregates(start=date(2024, 3, 1), end=date(2024, 3, 1))
+    # O dia zerado some da consulta em vez de aparecer com contagem 0
+    assert [(a.category, a.count) for a in remaining] == [("Produtivo", 2)]
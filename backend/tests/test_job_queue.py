@@ -0,0 +1,85 @@
+import asyncio
+import time
+import pytest
+from app.config.settings import settings
+from app.controllers import email_controller
+from app.repositories.job_repository import JobRecord, JobRepository
+from app.services.job_queue import JobQueue, job_queue
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repository = JobRepository(str(tmp_path / "jobs.sqlite3"))
+    yield repository
+    repository.close()
+
+
+def _abandoned_job(repository: JobRepository, index: int) -> None:
+    repository.create(JobRecord(
+        id=f"job-{index}",
+        kind="email",
+        status="queued",
+        payload={"email": {"content": "Qual o prazo?"}},
+        created_at=index,
+        owner="outro-worker",
+        lease_expires_at=time.time() - 1,
+    ))
+
+
+def test_job_queue_shares_the_controller_email_service():
+    assert job_queue.email_service is email_controller.email_service
+
+
+def test_recovery_respects_the_queue_limit(monkeypatch, repository):
+    monkeypatch.setattr(settings, "job_queue_max_size", 3)
+    for index in range(5):
+        _abandoned_job(repository, index)
+    queue = JobQueue(job_queue.email_service, repository)
+
+    async def scenario():
+        queue._queue = asyncio.Queue(maxsize=settings.job_queue_max_size)
+        assert queue._recover(time.time()) == 3
+        assert queue._recover(time.time()) == 0
+        job_id = queue._queue.get_nowait()
+        queue._pending.discard(job_id)
+        assert repository.claim(job_id, "este-worker", time.time(), time.time() + 30)
+        # O que sobrou continua vencido no banco e entra quando abre vaga
+        assert queue._recover(time.time()) == 1
+        assert queue._pending == {"job-1", "job-2", "job-3"}
+
+    asyncio.run(scenario())
+
+
+def test_only_one_worker_claims_a_job_until_its_lease_expires(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    first, second = JobRepository(path), JobRepository(path)
+    _abandoned_job(first, 0)
+    now = time.time()
+
+    assert first.claim("job-0", "worker-a", now, now + 30)
+    assert not second.claim("job-0", "worker-b", now, now + 30)
+    # Renovada, a posse continua de quem a tem; vencida, outro processo assume
+    assert first.renew_leases("worker-a", now + 60) == 1
+    assert not second.claim("job-0", "worker-b", now + 45, now + 75)
+    assert second.find_expired(now + 61) == ["job-0"]
+    assert second.claim("job-0", "worker-b", now + 61, now + 91)
+    assert first.find_by_id("job-0").owner == "worker-b"
+
+    first.mark_finished("job-0", "succeeded", {"ok": True}, None, now + 62)
+    assert second.find_expired(now + 1000) == []
+    assert not first.claim("job-0", "worker-a", now + 1000, now + 1030)
+    first.close()
+    second.close()
+
+
+def test_released_leases_are_picked_up_immediately(repository):
+    now = time.time()
+    repository.create(JobRecord(
+        id="job-1", kind="email", status="queued", payload={}, created_at=now, owner="worker-a",
+        lease_expires_at=now + 30,
+    ))
+    assert repository.find_expired(now) == []
+
+    repository.release_leases("worker-a")
+
+    assert repository.find_expired(now) == ["job-1"]
@@ -0,0 +1,54 @@
+import asyncio
+import io
+import zipfile
+from typing import List, Tuple
+from fastapi import UploadFile
+from app.utils.mailbox_parser import iter_messages, message_text
+
+PLAIN = b"Subject: Boleto\r\nContent-Type: text/plain; charset=utf-8\r\n\r\nPoderiam me enviar o boleto?\r\n"
+HTML = (
+    b"Subject: =?utf-8?q?Reuni=C3=A3o?=\r\nContent-Type: text/html; charset=utf-8\r\n\r\n"
+    b"<style>p {color: red}</style><p>Confirma a reuni&atilde;o?</p>\r\n"
+)
+
+
+def _messages(filename: str, content: bytes, chunk_size: int = 16, max_message_bytes: int = 1 << 20) -> List[Tuple[str, str]]:
+    async def collect():
+        upload = UploadFile(file=io.BytesIO(content), filename=filename)
+        return [message_text(message) async for message in iter_messages(upload, chunk_size, max_message_bytes)]
+
+    return asyncio.run(collect())
+
+
+def test_mbox_splits_messages_and_unescapes_from_lines():
+    mbox = (
+        b"From a@example.com Mon Jan  1 00:00:00 2024\n" + PLAIN.replace(b"\r\n", b"\n")
+        + b">From the desk of the director\n\n"
+        + b"From b@example.com Mon Jan  1 00:00:01 2024\n" + HTML.replace(b"\r\n", b"\n")
+    )
+
+    messages = _messages("caixa.mbox", mbox)
+
+    assert [subject for subject, _ in messages] == ["Boleto", "Reunião"]
+    assert messages[0][1] == "Poderiam me enviar o boleto?\nFrom the desk of the director"
+    # HTML vira texto, sem o conteúdo de <style>
+    assert messages[1][1] == "Confirma a reunião?"
+
+
+def test_zip_reads_only_eml_members():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("a.eml", PLAIN)
+        archive.writestr("pasta/", b"")
+        archive.writestr("leia-me.txt", b"ignorado")
+        archive.writestr("pasta/b.EML", HTML)
+
+    assert [subject for subject, _ in _messages("emails.zip", buffer.getvalue())] == ["Boleto", "Reunião"]
+
+
+def test_eml_is_detected_without_extension_and_truncated_at_the_limit():
+    assert _messages("mensagem", PLAIN) == [("Boleto", "Poderiam me enviar o boleto?")]
+
+    long_body = PLAIN + b"x" * 10_000
+    (subject, body), = _messages("mensagem.eml", long_body, max_message_bytes=len(PLAIN) + 100)
+    assert subject == "Boleto" and len(body) < 200
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+from app.utils.metrics import MetricsRegistry
+from app.utils.metrics_aggregator import MetricsAggregator
+from app.utils.shared_state import SharedStateStore
+
+
+def _worker_registry(requests: int, in_flight: int) -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requisições", ("route",)).inc(requests, route="/classify")
+    registry.gauge("in_flight", "Em andamento").set(in_flight)
+    registry.histogram("latency_seconds", "Latência").observe(0.2)
+    return registry
+
+
+def _dead_pid() -> int:
+    process = subprocess.Popen([sys.executable, "-c", "pass"])
+    process.wait()
+    return process.pid
+
+
+def test_workers_are_summed_and_retired_workers_keep_counting(tmp_path):
+    store = SharedStateStore(str(tmp_path / "shared.sqlite3"))
+    local = _worker_registry(requests=3, in_flight=1)
+    aggregator = MetricsAggregator(local, store)
+    live, dead = os.getppid(), _dead_pid()
+    store.set(f"metrics:worker:{live}", _worker_registry(requests=5, in_flight=2).dump())
+    store.set(f"metrics:worker:{dead}", _worker_registry(requests=7, in_flight=4).dump())
+
+    combined, reporting = aggregator.collect()
+    text = combined.render_prometheus()
+
+    assert reporting == sorted([os.getpid(), live])
+    assert combined.counter("requests_total", "").value(route="/classify") == 15
+    assert "latency_seconds_count 3" in text
+    assert f'in_flight{{worker="{live}"}} 2' in text
+    assert f'worker="{dead}"' not in text
+
+    aggregator._publish_and_retire_dead()
+    assert f"metrics:worker:{dead}" not in store.items("metrics:")
+    combined, _ = aggregator.collect()
+    assert combined.counter("requests_total", "").value(route="/classify") == 15
+    store.close()
@@ -0,0 +1,59 @@
+import random
+from app.utils import near_duplicate
+from app.utils.near_duplicate import NearDuplicateIndex, simhash
+
+TEMPLATE = (
+    "Olá, equipe. Meu nome é {name} e gostaria de saber o status do protocolo {protocol}, aberto em {date}. "
+    "Poderiam verificar o prazo de resposta? Obrigado, {name}"
+)
+
+
+def _flip(fingerprint: int, bits) -> int:
+    for bit in bits:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def test_banded_lookup_matches_brute_force():
+    rng = random.Random(7)
+    index = NearDuplicateIndex(max_entries=1000, max_distance=3)
+    known = [rng.getrandbits(64) for _ in range(200)]
+    for fingerprint in known:
+        index.add(fingerprint, "Produtivo", 0.9)
+
+    for _ in range(300):
+        base = rng.choice(known)
+        probe = _flip(base, rng.sample(range(64), rng.randint(0, 5)))
+        nearest = min(bin(candidate ^ probe).count("1") for candidate in known)
+        match = index.lookup(probe)
+        # Toda impressão a até max_distance bits é achada, mesmo com os bits trocados espalhados pelas faixas
+        assert (match[1] if match else None) == (nearest if nearest <= 3 else None)
+
+
+def test_evicted_fingerprints_leave_every_band():
+    oldest, middle, newest = 0, (1 << 64) - 1, 0x5555_5555_5555_5555
+    index = NearDuplicateIndex(max_entries=2, max_distance=2)
+    for fingerprint in (oldest, middle, newest):
+        index.add(fingerprint, "Improdutivo", 0.8)
+
+    assert index.lookup(oldest) is None
+    assert index.lookup(newest)[1] == 0
+    assert sum(len(bucket) for table in index._tables for bucket in table.values()) == 2 * len(index._bands)
+
+
+def test_same_template_fingerprints_close_and_short_texts_are_skipped():
+    first = simhash(TEMPLATE.format(name="Maria Souza", protocol="2024-001", date="01/02/2024"), 8)
+    second = simhash(TEMPLATE.format(name="João", protocol="77812", date="15/03/2024"), 8)
+    other = simhash("Feliz Natal e um próspero ano novo a todos da equipe, com muita saúde e paz!", 8)
+
+    assert bin(first ^ second).count("1") <= 3
+    assert bin(first ^ other).count("1") > 3
+    assert simhash("Obrigado!", 8) is None
+
+
+def test_pure_python_simhash_matches_numpy(monkeypatch):
+    text = TEMPLATE.format(name="Ana", protocol="123", date="02/02/2024")
+    expected = simhash(text)
+    monkeypatch.setattr(near_duplicate, "np", None)
+
+    assert simhash(text) == expected
@@ -0,0 +1,68 @@
+import asyncio
+import json
+from app.cli import reclassify
+from app.services.classification_cascade import CascadeDecision
+
+RAW = "Prezados,\n\nSegue o relatório trimestral revisado.\n\nAtenciosamente,\nJoão\n-- \nEnviado do meu celular"
+
+
+def test_remote_resolver_gets_the_raw_content_preprocessed_once(tmp_path, monkeypatch):
+    (tmp_path / "email.txt").write_text(RAW, encoding="utf-8")
+    reclassify._init_worker()
+    monkeypatch.setattr(
+        reclassify._worker[1], "classify_many",
+        lambda items: asyncio.sleep(0, [CascadeDecision("Produtivo", 0.5, "fallback") for _ in items]),
+    )
+    rows = reclassify.classify_files(str(tmp_path), ["email.txt"])
+    assert rows[0]["_content"] == RAW
+
+    resolver = reclassify.RemoteResolver()
+    text_processor = resolver.cascade.ai_service.text_processor
+    seen = []
+
+    async def classify_many(items):
+        seen.extend(items)
+        return [CascadeDecision("Improdutivo", 0.8, "remote") for _ in items]
+
+    monkeypatch.setattr(resolver.cascade, "classify_many", classify_many)
+    monkeypatch.setattr(text_processor, "preprocess", lambda text: (_ for _ in ()).throw(AssertionError("preprocess de novo")))
+
+    assert asyncio.run(resolver.resolve(rows)) == 1
+    assert seen[0].full_content == RAW
+    assert seen[0].processed_content == rows[0]["_processed"] != RAW
+    assert rows[0]["decided_by"] == "remote"
+
+
+def _rows(path) -> list:
+    with open(path, encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+def test_interrupted_run_resumes_from_the_last_recorded_batch(tmp_path):
+    emails = tmp_path / "emails"
+    emails.mkdir()
+    for index in range(4):
+        (emails / f"{index}.txt").write_text(f"Email {index}: qual o status do pedido {index}?", encoding="utf-8")
+    output = tmp_path / "resultados.jsonl"
+    argv = ["--input", str(emails), "--output", str(output), "--workers", "1", "--chunk-size", "1"]
+
+    assert reclassify.main(argv) == 0
+    complete = _rows(output)
+    assert sorted(row["path"] for row in complete) == ["0.txt", "1.txt", "2.txt", "3.txt"]
+
+    # Interrupção depois do segundo lote: a saída já tinha parte do terceiro e o checkpoint, uma linha cortada
+    checkpoint = tmp_path / "resultados.jsonl.checkpoint"
+    entries = checkpoint.read_text(encoding="utf-8").splitlines()
+    checkpoint.write_text("\n".join(entries[:2]) + '\n{"offset": ', encoding="utf-8")
+    with open(output, "r+b") as handle:
+        handle.truncate(json.loads(entries[1])["offset"] + 10)
+
+    assert reclassify.main(argv) == 0
+
+    resumed = _rows(output)
+    assert [row["path"] for row in resumed[:2]] == [row["path"] for row in complete[:2]]
+    assert sorted(row["path"] for row in resumed) == ["0.txt", "1.txt", "2.txt", "3.txt"]
+    # O checkpoint retomado continua legível: nada a refazer numa terceira execução
+    loaded = reclassify.Checkpoint(str(checkpoint))
+    loaded.load()
+    assert len(loaded.done) == 4 and loaded.offset == output.stat().st_size
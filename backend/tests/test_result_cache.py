@@ -0,0 +1,80 @@
+import asyncio
+import sqlite3
+import time
+import pytest
+from app.utils.result_cache import MemoryCacheBackend, ResultCache, SQLiteCacheBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryCacheBackend(max_entries=3, ttl_seconds=3600)
+    backend = SQLiteCacheBackend(str(tmp_path / "results.sqlite3"), max_entries=3, ttl_seconds=3600)
+    backend.PRUNE_EVERY = 1
+    return backend
+
+
+def test_least_recently_used_entry_is_evicted(backend, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(SQLiteCacheBackend, "TOUCH_BATCH", 1)
+    cache = ResultCache(backend)
+    for key in ("a", "b", "c"):
+        now[0] += 120
+        cache.set(key, key.upper())
+    # Lido de novo, "a" deixa de ser o menos usado
+    now[0] += 120
+    assert cache.get("a") == "A"
+    now[0] += 120
+    cache.set("d", "D")
+
+    assert [cache.get(key) for key in ("a", "b", "c", "d")] == ["A", None, "C", "D"]
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 3
+
+
+def test_expired_entry_is_a_miss(backend, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    cache = ResultCache(backend)
+    cache.set("a", {"category": "Produtivo"})
+    now[0] += 3599
+    assert cache.get("a") == {"category": "Produtivo"}
+    now[0] += 2
+
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses, cache.expirations) == (1, 1, 1)
+
+
+def test_locked_sqlite_cache_does_not_block_the_loop(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    cache = ResultCache(SQLiteCacheBackend(path, max_entries=10, ttl_seconds=3600))
+    cache.set("classification:m::abc", {"category": "Produtivo"})
+    # Outro worker segurando o lock de escrita do arquivo
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.ensure_future(ticker())
+        started = time.monotonic()
+        await cache.aset("classification:m::def", {"category": "Improdutivo"})
+        hit = await cache.aget("classification:m::abc")
+        elapsed = time.monotonic() - started
+        task.cancel()
+        return hit, elapsed, ticks
+
+    hit, elapsed, ticks = asyncio.run(scenario())
+    other.execute("ROLLBACK")
+
+    # A escrita desistiu do lock sem derrubar nada, a leitura (WAL) não espera escritores
+    assert hit == {"category": "Produtivo"}
+    assert cache.get("classification:m::def") is None
+    # E o event loop continuou girando enquanto a escrita esperava
+    assert elapsed >= 0.9 and ticks >= elapsed / 0.01 / 2
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from app.utils.single_flight import SingleFlight
+
+
+def _slow_call(calls: list, release: asyncio.Event):
+    async def call():
+        calls.append("started")
+        try:
+            await release.wait()
+        except asyncio.CancelledError:
+            calls.append("cancelled")
+            raise
+        return "classificado"
+
+    return call
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+        waiters = [asyncio.ensure_future(flights.run("email", _slow_call(calls, release))) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(scenario()) == ["classificado"] * 5
+    assert calls == ["started"]
+    assert (flights.leaders, flights.coalesced) == (1, 4)
+    assert flights.stats()["in_flight"] == 0
+
+
+def test_errors_reach_every_waiter_and_the_key_is_retried():
+    flights = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream fora do ar")
+
+    async def scenario():
+        results = await asyncio.gather(*(flights.run("email", failing) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        return await flights.run("email", lambda: asyncio.sleep(0, "ok"))
+
+    assert asyncio.run(scenario()) == "ok"
+    assert flights.leaders == 2
+
+
+def test_cancelled_waiter_does_not_cancel_the_others():
+    flights = SingleFlight()
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+        first = asyncio.ensure_future(flights.run("email", _slow_call(calls, release)))
+        second = asyncio.ensure_future(flights.run("email", _slow_call(calls, release)))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "classificado"
+    assert calls == ["started"]
+
+
+def test_last_waiter_giving_up_cancels_the_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def scenario():
+        waiter = asyncio.ensure_future(flights.run("email", _slow_call(calls, asyncio.Event())))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert calls == ["started", "cancelled"]
+    assert flights.stats()["in_flight"] == 0
@@ -0,0 +1,54 @@
+import asyncio
+from app.config.settings import settings
+from app.models.schemas import EmailInput
+from app.services.classification_cascade import CascadeDecision
+from app.services.email_service import EmailService
+
+
+def _service(monkeypatch, decided: str, calls: list) -> EmailService:
+    service = EmailService()
+    monkeypatch.setattr(settings, "speculative_generation", True)
+    monkeypatch.setattr(service.ai_service, "api_key", "test")
+    monkeypatch.setattr(
+        service.ai_service, "_offline_classification", lambda text: {"category": "Produtivo", "confidence": 0.6}
+    )
+
+    async def classify(item):
+        await asyncio.sleep(0.05)
+        return CascadeDecision(decided, 0.9, "remote")
+
+    async def generate_response(original_content, category):
+        calls.append(category)
+        try:
+            await asyncio.sleep(0.5 if category == "Produtivo" else 0)
+        except asyncio.CancelledError:
+            calls.append("cancelled")
+            raise
+        return f"resposta {category}", False
+
+    monkeypatch.setattr(service.cascade, "classify", classify)
+    monkeypatch.setattr(service.ai_service, "generate_response", generate_response)
+    return service
+
+
+def test_hit_reuses_speculative_generation(monkeypatch):
+    calls = []
+    service = _service(monkeypatch, "Produtivo", calls)
+    item = service._cascade_item(EmailInput(content="Qual o prazo do resgate?"))
+
+    decision, (response, degraded) = asyncio.run(service._classify_speculatively(item))
+
+    assert decision.category == "Produtivo"
+    assert response == "resposta Produtivo"
+    assert calls == ["Produtivo"]
+
+
+def test_miss_cancels_the_upstream_generation(monkeypatch):
+    calls = []
+    service = _service(monkeypatch, "Improdutivo", calls)
+    item = service._cascade_item(EmailInput(content="Feliz Natal a todos!"))
+
+    decision, (response, degraded) = asyncio.run(service._classify_speculatively(item))
+
+    assert response == "resposta Improdutivo"
+    assert calls == ["Produtivo", "cancelled", "Improdutivo"]
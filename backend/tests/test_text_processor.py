@@ -0,0 +1,26 @@
+from app.utils.text_processor import TextProcessor
+
+
+def test_body_sentence_about_the_message_is_kept():
+    processor = TextProcessor()
+    text = (
+        "Olá equipe,\n\n"
+        "Esta mensagem é destinada a confirmar a reunião de quinta-feira às 14h.\n"
+        "Podem me enviar a pauta até amanhã?"
+    )
+
+    processed = processor.preprocess(text)
+
+    assert "destinada a confirmar a reunião" in processed
+    assert "Podem me enviar a pauta até amanhã?" in processed
+
+
+def test_legal_disclaimer_is_stripped():
+    processor = TextProcessor()
+    text = (
+        "Poderiam me enviar o boleto de março?\n\n"
+        "Esta mensagem é destinada exclusivamente ao destinatário indicado e pode conter informações sigilosas.\n"
+        "Se você a recebeu por engano, apague-a."
+    )
+
+    assert processor.preprocess(text) == "Poderiam me enviar o boleto de março?"
@@ -90,7 +90,7 @@ export function Dashboard({ onNavigate, sharedHistory = [], onHistoryUpdate }: D
       try {
         const result = await emailService.classifyFile(file, emailSubject || undefined)
         setClassificationResult(result)
-        setSmartReply(result.suggested_response)
+        setSmartReply(result.suggested_response ?? "")
         updateHistory({ ...result, subject: emailSubject || undefined })
         toast.success("Email classificado com sucesso!")
       } catch (error: any) {
@@ -111,7 +111,7 @@ export function Dashboard({ onNavigate, sharedHistory = [], onHistoryUpdate }: D
       try {
         const result = await emailService.classifyFile(file, emailSubject || undefined)
         setClassificationResult(result)
-        setSmartReply(result.suggested_response)
+        setSmartReply(result.suggested_response ?? "")
         updateHistory({ ...result, subject: emailSubject || undefined })
         toast.success("Email classificado com sucesso!")
       } catch (error: any) {
@@ -131,18 +131,28 @@ export function Dashboard({ onNavigate, sharedHistory = [], onHistoryUpdate }: D
     }
     setIsLoading(true)
     try {
-      const result = await emailService.classifyText({
-        content: emailContent,
-        subject: emailSubject || undefined
-      })
+      const result = await emailService.classifyTextStream(
+        {
+          content: emailContent,
+          subject: emailSubject || undefined
+        },
+        {
+          onClassification: (classification) => {
+            setClassificationResult(classification)
+            setSmartReply("")
+            setIsLoading(false)
+          },
+          onToken: (text) => setSmartReply(prev => prev + text),
+        }
+      )
       setClassificationResult(result)
-      setSmartReply(result.suggested_response)
+      setSmartReply(result.suggested_response ?? "")
       updateHistory({ ...result, subject: emailSubject || undefined })
       toast.success("Email classificado com sucesso!")
       setEmailContent("")
       setEmailSubject("")
     } catch (error: any) {
-      toast.error(error.response?.data?.detail || "Erro ao classificar email")
+      toast.error(error.response?.data?.detail || error.message || "Erro ao classificar email")
     } finally {
       setIsLoading(false)
     }
@@ -1,16 +1,110 @@
+import { useCallback, useEffect, useMemo, useState } from "react"
 import { MainLayout } from "@/components/main-layout"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Badge } from "@/components/ui/badge"
+import { Button } from "@/components/ui/button"
 import { formatDate } from "@/lib/utils"
-import { EmailClassificationResponse } from "@/types"
+import { historyService } from "@/services/api"
+import { ClassificationCategory, EmailClassificationResponse, HistoryItem } from "@/types"
 import { cn } from "@/lib/utils"
 
+const PAGE_SIZE = 50
+
 interface HistoryPageProps {
   history: Array<EmailClassificationResponse & { subject?: string }>
   onNavigate: (page: "dashboard" | "history" | "settings" | "login") => void
 }
 
-export function HistoryPage({ history, onNavigate }: HistoryPageProps) {
+interface HistoryRow {
+  key: string
+  processed_at: string
+  subject?: string | null
+  category: ClassificationCategory
+  confidence: number
+  original_content: string
+}
+
+const toRow = (item: HistoryItem): HistoryRow => ({
+  key: `db-${item.id}`,
+  processed_at: item.created_at,
+  subject: item.subject,
+  category: item.category,
+  confidence: item.confidence,
+  original_content: item.content,
+})
+
+export function HistoryPage({ history: sessionHistory, onNavigate }: HistoryPageProps) {
+  // Histórico paginado do servidor; sem backend de histórico, usa as classificações desta sessão
+  const [serverRows, setServerRows] = useState<HistoryRow[] | null>(null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [counts, setCounts] = useState<{ total: number; productive: number; unproductive: number } | null>(null)
+
+  useEffect(() => {
+    let active = true
+    historyService
+      .list({ limit: PAGE_SIZE })
+      .then((page) => {
+        if (!active) return
+        setServerRows(page.items.map(toRow))
+        setNextCursor(page.next_cursor ?? null)
+      })
+      .catch(() => undefined)
+    historyService
+      .aggregates()
+      .then((aggregates) => {
+        if (!active) return
+        setCounts({
+          total: aggregates.total,
+          productive: aggregates.by_category.Produtivo ?? 0,
+          unproductive: aggregates.by_category.Improdutivo ?? 0,
+        })
+      })
+      .catch(() => undefined)
+    return () => {
+      active = false
+    }
+  }, [])
+
+  const loadMore = useCallback(async () => {
+    if (!nextCursor) return
+    setLoadingMore(true)
+    try {
+      const page = await historyService.list({ limit: PAGE_SIZE, cursor: nextCursor })
+      setServerRows((rows) => [...(rows ?? []), ...page.items.map(toRow)])
+      setNextCursor(page.next_cursor ?? null)
+    } finally {
+      setLoadingMore(false)
+    }
+  }, [nextCursor])
+
+  const history = useMemo<HistoryRow[]>(
+    () =>
+      serverRows ??
+      sessionHistory.map((item, index) => ({
+        key: `session-${index}`,
+        processed_at: item.processed_at,
+        subject: item.subject,
+        category: item.category,
+        confidence: item.confidence,
+        original_content: item.original_content,
+      })),
+    [serverRows, sessionHistory]
+  )
+
+  const summary = useMemo(() => {
+    if (counts) return counts
+    let productive = 0
+    for (const item of sessionHistory) {
+      if (item.category === "Produtivo") productive += 1
+    }
+    return {
+      total: sessionHistory.length,
+      productive,
+      unproductive: sessionHistory.length - productive,
+    }
+  }, [counts, sessionHistory])
+
   return (
     <MainLayout activeItem="history" onNavigate={onNavigate}>
       <div className="flex items-center justify-between gap-2">
@@ -44,11 +138,11 @@ export function HistoryPage({ history, onNavigate }: HistoryPageProps) {
                     </tr>
                   </thead>
                   <tbody>
-                    {history.map((item, index) => {
+                    {history.map((item) => {
                       const confidence = Math.round(item.confidence * 100)
                       return (
                         <tr
-                          key={index}
+                          key={item.key}
                           className="border-b border-border/50 hover:bg-muted/50 transition-colors"
                         >
                           <td className="py-3 px-4 text-sm text-muted-foreground">
@@ -86,11 +180,11 @@ export function HistoryPage({ history, onNavigate }: HistoryPageProps) {
               </div>
               {/* Cards - mobile */}
               <div className="md:hidden space-y-3">
-                {history.map((item, index) => {
+                {history.map((item) => {
                   const confidence = Math.round(item.confidence * 100)
                   return (
                     <div
-                      key={index}
+                      key={item.key}
                       className={cn(
                         "rounded-lg border border-border p-4 space-y-2",
                         "hover:bg-muted/50 transition-colors"
@@ -121,23 +215,30 @@ export function HistoryPage({ history, onNavigate }: HistoryPageProps) {
                   )
                 })}
               </div>
+              {nextCursor && (
+                <div className="flex justify-center pt-4">
+                  <Button variant="outline" onClick={loadMore} disabled={loadingMore}>
+                    {loadingMore ? "Carregando..." : "Carregar mais"}
+                  </Button>
+                </div>
+              )}
             </>
           )}
         </CardContent>
       </Card>
-      {history.length > 0 && (
+      {summary.total > 0 && (
         <div className="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 gap-4 md:gap-6">
           <Card className="bg-card/60 backdrop-blur-md border-border/30 shadow-lg min-w-0 overflow-hidden">
             <CardContent className="p-4 md:p-6">
               <p className="text-sm font-medium text-muted-foreground mb-1">Total de Classificações</p>
-              <p className="text-2xl md:text-3xl font-bold text-foreground">{history.length}</p>
+              <p className="text-2xl md:text-3xl font-bold text-foreground">{summary.total}</p>
             </CardContent>
           </Card>
           <Card className="bg-card/60 backdrop-blur-md border-border/30 shadow-lg min-w-0 overflow-hidden">
             <CardContent className="p-4 md:p-6">
               <p className="text-sm font-medium text-muted-foreground mb-1">Produtivos</p>
               <p className="text-2xl md:text-3xl font-bold text-foreground">
-                {history.filter((h) => h.category === "Produtivo").length}
+                {summary.productive}
               </p>
             </CardContent>
           </Card>
@@ -145,7 +246,7 @@ export function HistoryPage({ history, onNavigate }: HistoryPageProps) {
             <CardContent className="p-4 md:p-6">
               <p className="text-sm font-medium text-muted-foreground mb-1">Improdutivos</p>
               <p className="text-2xl md:text-3xl font-bold text-foreground">
-                {history.filter((h) => h.category === "Improdutivo").length}
+                {summary.unproductive}
               </p>
             </CardContent>
           </Card>
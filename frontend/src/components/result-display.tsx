@@ -1,4 +1,5 @@
-import { CheckCircle2, XCircle, Copy, RotateCcw, Clock, TrendingUp, MessageSquare, FileText } from "lucide-react"
+import { CheckCircle2, XCircle, Copy, RotateCcw, Clock, TrendingUp, MessageSquare, FileText, AlertTriangle } from "lucide-react"
+import { useEffect, useState } from "react"
 import { toast } from "sonner"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Button } from "@/components/ui/button"
@@ -6,6 +7,7 @@ import { Badge } from "@/components/ui/badge"
 import { Progress } from "@/components/ui/progress"
 import { Separator } from "@/components/ui/separator"
 import { EmailClassificationResponse } from "@/types"
+import { responseService } from "@/services/api"
 import { formatDate, truncateText, cn } from "@/lib/utils"
 
 interface ResultDisplayProps {
@@ -15,11 +17,30 @@ interface ResultDisplayProps {
 }
 
 export function ResultDisplay({ result, isLoading, onReset }: ResultDisplayProps) {
+  const [deferredReply, setDeferredReply] = useState<string | null>(null)
+  const [isGenerating, setIsGenerating] = useState(false)
+
+  useEffect(() => {
+    setDeferredReply(null)
+  }, [result?.response_id])
+
   const copyToClipboard = (text: string) => {
     navigator.clipboard.writeText(text)
     toast.success("Resposta copiada para a área de transferência!")
   }
 
+  const generateReply = async (responseId: string) => {
+    setIsGenerating(true)
+    try {
+      const generated = await responseService.get(responseId)
+      setDeferredReply(generated.suggested_response)
+    } catch (error: any) {
+      toast.error(error.response?.data?.detail || "Erro ao gerar resposta")
+    } finally {
+      setIsGenerating(false)
+    }
+  }
+
   if (isLoading) {
     return (
       <Card className="h-full">
@@ -68,6 +89,7 @@ export function ResultDisplay({ result, isLoading, onReset }: ResultDisplayProps
 
   const isProductive = result.category === "Produtivo"
   const confidencePercent = Math.round(result.confidence * 100)
+  const reply = result.suggested_response ?? deferredReply
 
   return (
     <Card className="h-full">
@@ -146,21 +168,41 @@ export function ResultDisplay({ result, isLoading, onReset }: ResultDisplayProps
               <MessageSquare className="h-4 w-4" />
               <span>Resposta Sugerida</span>
             </div>
-            <Button
-              variant="outline"
-              size="sm"
-              onClick={() => copyToClipboard(result.suggested_response)}
-            >
-              <Copy className="h-3 w-3 mr-1" />
-              Copiar
-            </Button>
+            {reply !== null ? (
+              <Button
+                variant="outline"
+                size="sm"
+                onClick={() => copyToClipboard(reply)}
+              >
+                <Copy className="h-3 w-3 mr-1" />
+                Copiar
+              </Button>
+            ) : result.response_id ? (
+              <Button
+                variant="outline"
+                size="sm"
+                disabled={isGenerating}
+                onClick={() => generateReply(result.response_id!)}
+              >
+                <MessageSquare className="h-3 w-3 mr-1" />
+                {isGenerating ? "Gerando..." : "Gerar resposta"}
+              </Button>
+            ) : null}
           </div>
           <div className="rounded-lg bg-primary/5 border border-primary/10 p-4">
             <p className="text-sm leading-relaxed whitespace-pre-line">
-              {result.suggested_response}
+              {reply ?? "Resposta não gerada nesta classificação."}
             </p>
           </div>
         </div>
+        {result.degraded && (
+          <div className="flex items-start gap-2 rounded-lg border border-amber-200 bg-amber-50 p-3 text-xs text-amber-800">
+            <AlertTriangle className="h-4 w-4 shrink-0" />
+            <span>
+              O serviço de IA está sobrecarregado ou indisponível. Este resultado foi gerado pelo modo de contingência e pode ser menos preciso.
+            </span>
+          </div>
+        )}
         <div className="flex items-center gap-2 text-xs text-muted-foreground pt-2">
           <Clock className="h-3 w-3" />
           <span>Processado em: {formatDate(result.processed_at)}</span>
@@ -1,5 +1,13 @@
 import axios, { CancelTokenSource } from "axios"
-import { EmailInput, EmailClassificationResponse } from "@/types"
+import {
+  EmailInput,
+  EmailClassificationResponse,
+  HistoryAggregates,
+  HistoryPage,
+  HistoryQuery,
+  ResponseMode,
+  SuggestedResponse,
+} from "@/types"
 
 export const API_URL = import.meta.env.VITE_API_URL || "http://localhost:8000/api/v1"
 
@@ -11,6 +19,12 @@ const api = axios.create({
   },
 })
 let currentRequestSource: CancelTokenSource | null = null
+let currentStreamController: AbortController | null = null
+
+export interface ClassificationStreamHandlers {
+  onClassification: (result: EmailClassificationResponse) => void
+  onToken: (text: string) => void
+}
 
 export const emailService = {
   classifyText: async (input: EmailInput): Promise<EmailClassificationResponse> => {
@@ -37,7 +51,72 @@ export const emailService = {
       throw error
     }
   },
-  classifyFile: async (file: File, subject?: string): Promise<EmailClassificationResponse> => {
+  classifyTextStream: async (
+    input: EmailInput,
+    handlers: ClassificationStreamHandlers
+  ): Promise<EmailClassificationResponse> => {
+    if (currentStreamController) {
+      currentStreamController.abort()
+    }
+    const controller = new AbortController()
+    currentStreamController = controller
+
+    try {
+      const response = await fetch(`${API_URL}/classify/stream`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(input),
+        signal: controller.signal,
+      })
+      if (!response.ok || !response.body) {
+        const error = await response.json().catch(() => null)
+        throw new Error(error?.detail || "Erro ao classificar email")
+      }
+
+      // Eventos SSE: "classification" primeiro, depois "token" com partes da resposta e "done" no final
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ""
+      let result: EmailClassificationResponse | null = null
+      while (true) {
+        const { value, done } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+        let separator = buffer.indexOf("\n\n")
+        while (separator !== -1) {
+          const block = buffer.slice(0, separator)
+          buffer = buffer.slice(separator + 2)
+          separator = buffer.indexOf("\n\n")
+          const event = block.match(/^event: (.*)$/m)?.[1]
+          const data = block.match(/^data: (.*)$/m)?.[1]
+          if (!event || data === undefined) continue
+          const payload = JSON.parse(data)
+          if (event === "classification") handlers.onClassification(payload)
+          else if (event === "token") handlers.onToken(payload.text)
+          else if (event === "done") result = payload
+          else if (event === "error") throw new Error(payload.detail)
+        }
+      }
+      if (!result) {
+        throw new Error("Resposta incompleta do servidor")
+      }
+      return result
+    } catch (error) {
+      if (error instanceof DOMException && error.name === "AbortError") {
+        throw new Error("Requisição cancelada")
+      }
+      throw error
+    } finally {
+      if (currentStreamController === controller) {
+        currentStreamController = null
+      }
+    }
+  },
+  classifyFile: async (
+    file: File,
+    subject?: string,
+    responseMode?: ResponseMode
+  ): Promise<EmailClassificationResponse> => {
     if (currentRequestSource) {
       currentRequestSource.cancel("Nova requisição iniciada")
     }
@@ -50,6 +129,9 @@ export const emailService = {
     if (subject) {
       formData.append("subject", subject)
     }
+    if (responseMode) {
+      formData.append("response_mode", responseMode)
+    }
     
     try {
       const response = await api.post<EmailClassificationResponse>(
@@ -74,4 +156,25 @@ export const emailService = {
   },
 }
 
+export const responseService = {
+  // Gera (na primeira chamada) a resposta sugerida de uma classificação feita com response_mode "defer"
+  get: async (responseId: string): Promise<SuggestedResponse> => {
+    const response = await api.get<SuggestedResponse>(`/responses/${responseId}`)
+    return response.data
+  },
+}
+
+export const historyService = {
+  list: async (query: HistoryQuery = {}): Promise<HistoryPage> => {
+    const response = await api.get<HistoryPage>("/history", { params: query })
+    return response.data
+  },
+  aggregates: async (
+    query: Pick<HistoryQuery, "category" | "start" | "end"> = {}
+  ): Promise<HistoryAggregates> => {
+    const response = await api.get<HistoryAggregates>("/history/aggregates", { params: query })
+    return response.data
+  },
+}
+
 export default api
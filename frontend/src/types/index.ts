@@ -1,18 +1,70 @@
 export type ClassificationCategory = "Produtivo" | "Improdutivo"
 
+export type ResponseMode = "inline" | "defer" | "skip"
+
 export interface EmailInput {
   content?: string
   subject?: string
+  response_mode?: ResponseMode
 }
 
 export interface EmailClassificationResponse {
   category: ClassificationCategory
   confidence: number
-  suggested_response: string
+  suggested_response: string | null
+  response_id?: string | null
   original_content: string
   processed_at: string
+  decided_by?: string | null
+  degraded?: boolean
+}
+
+export interface SuggestedResponse {
+  response_id: string
+  category: ClassificationCategory
+  suggested_response: string
+  degraded: boolean
+  generated_at: string
 }
 
 export interface ApiError {
   detail: string
 }
+
+export interface HistoryItem {
+  id: number
+  category: ClassificationCategory
+  confidence: number
+  subject?: string | null
+  content: string
+  suggested_response?: string | null
+  decided_by?: string | null
+  created_at: string
+}
+
+export interface HistoryPage {
+  items: HistoryItem[]
+  next_cursor?: string | null
+}
+
+export interface HistoryQuery {
+  limit?: number
+  cursor?: string
+  category?: ClassificationCategory
+  start?: string
+  end?: string
+}
+
+export interface DailyCategoryCount {
+  day: string
+  category: ClassificationCategory
+  count: number
+  mean_confidence: number
+}
+
+export interface HistoryAggregates {
+  days: DailyCategoryCount[]
+  total: number
+  by_category: Partial<Record<ClassificationCategory, number>>
+  mean_confidence?: number | null
+}